@@ -0,0 +1,326 @@
+import argparse
+import copy
+import gc
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# The game models import each other by module name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "models"))
+
+from Agent import GreedyAgent, RandomAgent
+from Events import NULL_SINK
+from Gamestate import Gamestate
+from Player import Player
+from Profiler import Profiler
+from TestingModels import build_decks, card_pool, holy_elemental
+
+# Baselines depend on the machine, so each checkout saves its own with --save
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.2
+
+class Case(NamedTuple):
+    """
+    One benchmark: run performs ops operations and is timed; setup, if given,
+    runs untimed before every call of run to put the state back.
+    """
+    run: Callable[[], object]
+    ops: int = 1
+    setup: Optional[Callable[[], object]] = None
+
+# Benchmark factories by name, in the order they are run
+BENCHMARKS: Dict[str, Callable[[], Case]] = {}
+
+def benchmark(name: str):
+    """Register a function that builds a Case under a benchmark name."""
+    def register(factory: Callable[[], Case]) -> Callable[[], Case]:
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+def new_game(seed: int = 0, agents: Tuple = None) -> Gamestate:
+    """A silent scripted game between the TestingModels decks, shuffled by the game's seed."""
+    deck1, deck2 = build_decks()
+    agents = agents or (GreedyAgent(random.Random(seed)), RandomAgent(random.Random(seed + 1)))
+    game = Gamestate(Player("Player 1", 1, deck1, agent=agents[0]), Player("Player 2", 2, deck2, agent=agents[1]), headless=True, seed=seed)
+    deck1.shuffle(game.rng)
+    deck2.shuffle(game.rng)
+    return game
+
+def mid_game(turns: int = 8, seed: int = 3) -> Gamestate:
+    """A scripted game played for a few turns, so the battlefields are populated."""
+    game = new_game(seed, (GreedyAgent(random.Random(seed)), GreedyAgent(random.Random(seed + 1))))
+    for _ in range(turns):
+        game.play_turn()
+    return game
+
+def new_player() -> Player:
+    player = Player("Player", 1, build_decks()[0], agent=GreedyAgent(random.Random(0)))
+    player.bind_events(NULL_SINK)
+    return player
+
+@benchmark("deck.shuffle")
+def bench_shuffle() -> Case:
+    deck = new_player().deck
+    rng = random.Random(0)
+    return Case(lambda: deck.shuffle(rng))
+
+@benchmark("hand.draw_card")
+def bench_draw_card() -> Case:
+    player = new_player()
+    state = player.snapshot()
+
+    def draw_deck():
+        for _ in range(len(player.deck)):
+            player.hand.draw_card(player.deck)
+    return Case(draw_deck, len(player.deck), lambda: player.restore(state))
+
+@benchmark("hand.draw_initial_hand")
+def bench_draw_initial_hand() -> Case:
+    player = new_player()
+    state = player.snapshot()
+    return Case(player.draw_initial_hand, 1, lambda: player.restore(state))
+
+@benchmark("player.play_card_to_battlefield")
+def bench_play_card() -> Case:
+    player = new_player()
+    for _ in range(20):
+        player.hand.add_card(holy_elemental.create_instance())
+    player.current_mana = 100
+    state = player.snapshot()
+
+    def play_hand():
+        for _ in range(20):
+            player.play_card_to_battlefield("Holy Angel")
+    return Case(play_hand, 20, lambda: player.restore(state))
+
+@benchmark("player.can_pay_cost")
+def bench_can_pay_cost() -> Case:
+    player = new_player()
+    player.current_mana = 5
+    costs = [card.cost_vector for card in card_pool] * 100
+
+    def check():
+        can_pay_cost = player.can_pay_cost
+        for cost in costs:
+            can_pay_cost(cost)
+    return Case(check, len(costs))
+
+@benchmark("player.pay_cost")
+def bench_pay_cost() -> Case:
+    player = new_player()
+    costs = [card.cost_vector for card in card_pool] * 100
+    full = player.pool + sum(costs)
+
+    def pay():
+        player.pool = full
+        pay_cost = player.pay_cost
+        for cost in costs:
+            pay_cost(cost)
+    return Case(pay, len(costs))
+
+def phase_case(phase: Callable[[Gamestate], object]) -> Case:
+    game = mid_game()
+    state = game.snapshot()
+    return Case(lambda: phase(game), 1, lambda: game.restore(state))
+
+@benchmark("gamestate.untap_phase")
+def bench_untap_phase() -> Case:
+    return phase_case(Gamestate.untap_phase)
+
+@benchmark("gamestate.upkeep_phase")
+def bench_upkeep_phase() -> Case:
+    return phase_case(Gamestate.upkeep_phase)
+
+@benchmark("gamestate.combat_phase")
+def bench_combat_phase() -> Case:
+    return phase_case(Gamestate.combat_phase)
+
+@benchmark("gamestate.snapshot")
+def bench_snapshot() -> Case:
+    return Case(mid_game().snapshot)
+
+@benchmark("gamestate.restore")
+def bench_restore() -> Case:
+    game = mid_game()
+    state = game.snapshot()
+    return Case(lambda: game.restore(state))
+
+@benchmark("gamestate.clone")
+def bench_clone() -> Case:
+    return Case(mid_game().clone)
+
+@benchmark("gamestate.deepcopy")
+def bench_deepcopy() -> Case:
+    game = mid_game()
+    return Case(lambda: copy.deepcopy(game))
+
+@benchmark("game.full")
+def bench_full_game() -> Case:
+    seeds = itertools.cycle(range(20))
+    games = []
+
+    def setup():
+        games[:] = [new_game(next(seeds))]
+    return Case(lambda: games[0].start_game(max_turns=200), 1, setup)
+
+@benchmark("simulator.batch")
+def bench_simulator() -> Case:
+    from Simulator import BatchSimulator
+    simulator = BatchSimulator(card_pool)
+    deck_list = [card.card_id for card in card_pool] * 5
+    decks, first_player = simulator.shuffled_decks(deck_list, deck_list, 1000, seed=0)
+    return Case(lambda: simulator.run(decks, first_player), len(decks))
+
+def time_case(case: Case, min_time: float, repeats: int) -> Dict[str, float]:
+    """
+    Time a case, calling it until min_time has passed in each of several rounds.
+
+    :return: The operations per second of the fastest round and the mean time of one operation in it.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        elapsed, calls = 0.0, 0
+        while elapsed < min_time or not calls:
+            if case.setup:
+                case.setup()
+            started = time.perf_counter()
+            case.run()
+            elapsed += time.perf_counter() - started
+            calls += 1
+        best = min(best, elapsed / (calls * case.ops))
+    return {"ops_per_sec": 1 / best, "mean_us": best * 1e6}
+
+def memory_per_game(games: int = 5) -> Dict[str, float]:
+    """
+    Measure the memory of full scripted games with tracemalloc.
+
+    :return: The mean peak memory while a game is set up and played, and the memory the finished game keeps.
+    """
+    peaks, retained = [], []
+    for seed in range(games):
+        gc.collect()
+        tracemalloc.start()
+        game = new_game(seed)
+        game.start_game(max_turns=200)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks.append(peak)
+        retained.append(current)
+        del game
+    return {"peak_bytes": sum(peaks) / games, "retained_bytes": sum(retained) / games}
+
+def profile_games(games: int = 20, allocations: bool = False) -> Profiler:
+    """Play full scripted games with one profiler attached to all of them."""
+    with Profiler(allocations) as profiler:
+        for seed in range(games):
+            game = new_game(seed)
+            profiler.attach(game)
+            game.start_game(max_turns=200)
+    return profiler
+
+def run_benchmarks(names: Optional[List[str]] = None, min_time: float = 0.2, repeats: int = 3) -> Dict[str, dict]:
+    """
+    Run the benchmarks and measure memory per game.
+
+    :param names: Only run the benchmarks whose name starts with one of these.
+    :return: The results by benchmark name, plus "memory.game" and the environment they were measured in.
+    """
+    def selected(name: str) -> bool:
+        return not names or any(name.startswith(prefix) for prefix in names)
+
+    results = {}
+    for name, factory in BENCHMARKS.items():
+        if selected(name):
+            results[name] = time_case(factory(), min_time, repeats)
+    if selected("memory.game"):
+        results["memory.game"] = memory_per_game()
+    return {"environment": {"python": platform.python_version(), "machine": platform.machine()}, "results": results}
+
+def compare(report: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Compare a report with a baseline.
+
+    :param threshold: The relative slowdown (or memory growth) that counts as a regression.
+    :return: A description of every regression.
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        for metric, value in result.items():
+            old = before.get(metric)
+            if not old or metric == "mean_us":
+                continue
+            # Throughput regresses when it drops, memory when it grows
+            change = (old - value) / old if metric == "ops_per_sec" else (value - old) / old
+            if change > threshold:
+                regressions.append(f"{name} {metric}: {old:,.0f} -> {value:,.0f} ({change:+.0%} worse)")
+    return regressions
+
+def load_baseline(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+def save_baseline(report: dict, path: str):
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+
+def print_report(report: dict, baseline: Optional[dict] = None):
+    for name, result in report["results"].items():
+        before = (baseline or {}).get("results", {}).get(name, {})
+        if "ops_per_sec" in result:
+            line = f"{name:<36}{result['ops_per_sec']:>16,.0f} ops/s{result['mean_us']:>14,.2f} us/op"
+            if before.get("ops_per_sec"):
+                line += f"  ({result['ops_per_sec'] / before['ops_per_sec'] - 1:+.0%})"
+        else:
+            line = f"{name:<36}{result['peak_bytes'] / 1024:>14,.0f} KiB peak{result['retained_bytes'] / 1024:>10,.0f} KiB retained"
+        print(line)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the game models.")
+    parser.add_argument("names", nargs="*", help="Only run the benchmarks whose name starts with one of these.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="The JSON baseline to compare with.")
+    parser.add_argument("--save", action="store_true", help="Store the results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="The relative slowdown that counts as a regression.")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds to run each benchmark per round.")
+    parser.add_argument("--repeats", type=int, default=3, help="Rounds per benchmark; the fastest one counts.")
+    parser.add_argument("--profile", metavar="PATH", help="Profile full games instead and write a collapsed-stack profile to PATH.")
+    parser.add_argument("--games", type=int, default=20, help="Games to play with --profile.")
+    parser.add_argument("--allocations", action="store_true", help="Also record allocations with --profile.")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        profiler = profile_games(args.games, args.allocations)
+        print(profiler.summary())
+        profiler.dump(args.profile)
+        print(f"Wrote profile to {args.profile}")
+        return 0
+
+    report = run_benchmarks(args.names, args.min_time, args.repeats)
+    baseline = load_baseline(args.baseline)
+    print_report(report, baseline)
+
+    if args.save:
+        save_baseline(report, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"No baseline at {args.baseline} to compare with; run with --save to store these results as the baseline.", file=sys.stderr)
+        return 2
+    regressions = compare(report, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+from bot.utils.currencyUtils import format_amount, interaction_key
+
+NAME = "buy-currency"
+DESCRIPTION = "Add purchased coins to your balance."
+
+# The coin bundles on sale, by key: (coins, label)
+BUNDLES = {
+    "small": (500, "Pouch of coins"),
+    "medium": (1200, "Chest of coins"),
+    "large": (3000, "Vault of coins"),
+}
+
+async def buy_currency(currency_service, user_id: int, bundle: str, purchase_id: str) -> str:
+    """
+    Credit a purchased bundle of coins.
+
+    :param currency_service: The bot's CurrencyService.
+    :param user_id: The Discord id of the user.
+    :param bundle: The key of the bundle in BUNDLES.
+    :param purchase_id: The id of the completed payment; a payment is only ever credited once.
+    :return: The reply message.
+    """
+    if bundle not in BUNDLES:
+        return f"There is no '{bundle}' bundle. Available bundles: {', '.join(BUNDLES)}."
+    coins, label = BUNDLES[bundle]
+    entry = await currency_service.credit(user_id, coins, f"purchase:{bundle}", interaction_key(purchase_id, "purchase"))
+    if entry.duplicate:
+        return f"That purchase was already credited. Your balance is {format_amount(await currency_service.balance(user_id))}."
+    return f"You bought a {label} for {format_amount(coins)}. Your balance is {format_amount(entry.balance)}."
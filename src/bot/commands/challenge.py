@@ -0,0 +1,23 @@
+from bot.utils.gameUtils import format_reply
+
+NAME = "challenge"
+DESCRIPTION = "Challenge another player, or the computer, to a match."
+
+async def challenge(game_service, challenger_id: int, opponent_id: int = None) -> str:
+    """
+    Start a match.
+
+    :param game_service: The bot's GameService.
+    :param challenger_id: The Discord id of the user who challenges.
+    :param opponent_id: The Discord id of the user challenged, or None to play the computer.
+    :return: The reply message, with the narration of the opening.
+    """
+    try:
+        match, opening = game_service.create_match(challenger_id, opponent_id)
+    except ValueError as error:
+        return str(error)
+    waiting = match.waiting
+    prompt = f"Match {match.match_id} started."
+    if waiting is not None:
+        prompt += f" <@{waiting[0]}>, it is your move."
+    return format_reply(prompt, opening)
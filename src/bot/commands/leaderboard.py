@@ -0,0 +1,34 @@
+from bot.utils.gameUtils import format_reply
+
+NAME = "leaderboard"
+DESCRIPTION = "See the top players, or a page of the ranking, and where you stand."
+
+def format_standing(standing, user_id: int = None) -> str:
+    line = f"#{standing.rank} <@{standing.user_id}> — {standing.rating} ({standing.victories} win{'s' if standing.victories != 1 else ''})"
+    return f"**{line}**" if standing.user_id == user_id else line
+
+async def leaderboard(leaderboard_service, user_id: int, page: int = 1) -> str:
+    """
+    Show a page of the ranking and the players around the user.
+
+    :param leaderboard_service: The bot's LeaderboardService.
+    :param user_id: The Discord id of the user asking.
+    :param page: The 1-based page of the ranking to show.
+    :return: The reply message.
+    """
+    pages = leaderboard_service.pages()
+    if not 1 <= page <= pages:
+        return f"The leaderboard has {pages} page{'s' if pages != 1 else ''}."
+    standings = leaderboard_service.page(page)
+    if not standings:
+        return "Nobody has finished a match yet."
+    lines = [format_standing(standing, user_id) for standing in standings]
+    shown = {standing.user_id for standing in standings}
+    if user_id not in shown:
+        around = leaderboard_service.around(user_id, radius=2)
+        if around:
+            lines.append("…")
+            lines.extend(format_standing(standing, user_id) for standing in around)
+        else:
+            lines.append("Finish a match to be ranked.")
+    return format_reply(f"Leaderboard, page {page} of {pages}:", lines)
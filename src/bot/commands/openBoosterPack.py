@@ -0,0 +1,50 @@
+from collections import Counter
+from bot.utils.currencyUtils import format_amount, interaction_key
+from services.currencyService import InsufficientFunds
+
+NAME = "open-booster-pack"
+DESCRIPTION = "Open booster packs and add their cards to your collection."
+DEFAULT_PACK = "standard"
+MAX_PACKS = 10
+
+async def open_booster_pack(pack_service, user_id: int, pack_type: str = DEFAULT_PACK, count: int = 1,
+                            currency_service=None, interaction_id=None) -> str:
+    """
+    Open one or more packs of a type for a user, charging their price when a currency service is given.
+
+    The payment and the cards are stored in one transaction, so packs are never paid for without
+    their cards, and a retried interaction is only told its packs were opened once they were.
+
+    :param pack_service: The bot's PackService.
+    :param user_id: The Discord id of the user.
+    :param pack_type: The key of the pack type in boosterPacks.json.
+    :param count: How many packs to open, at most MAX_PACKS.
+    :param currency_service: The bot's CurrencyService, or None to open packs for free.
+    :param interaction_id: The id of the Discord interaction, so a retried command is only charged once.
+    :return: The message listing the cards of every pack.
+    """
+    if pack_type not in pack_service.pack_types:
+        return f"There is no '{pack_type}' pack. Available packs: {', '.join(pack_service.pack_types)}."
+    if not 1 <= count <= MAX_PACKS:
+        return f"You can open between 1 and {MAX_PACKS} packs at once."
+
+    name = pack_service.pack_type(pack_type).name
+    price = pack_service.pack_type(pack_type).price * count
+    charge_key = interaction_key(interaction_id, "pack") if interaction_id is not None else None
+    if currency_service is not None and price:
+        try:
+            charge, packs = await currency_service.spend(
+                user_id, price, f"pack:{pack_type}",
+                lambda connection: pack_service.open_packs(user_id, pack_type, count, connection=connection), charge_key)
+        except InsufficientFunds as error:
+            return f"{count} {name}{'s' if count > 1 else ''} cost {format_amount(price)}, but you have {format_amount(error.balance)}."
+        if charge.duplicate:
+            return "Those packs were already opened."
+    else:
+        packs = await pack_service.open_packs(user_id, pack_type, count)
+    lines = [f"You opened {count} {name}{'s' if count > 1 else ''}:"]
+    for number, pack in enumerate(packs, start=1):
+        cards = ", ".join(f"{pack_service.card_name(card_id)}{f' x{copies}' if copies > 1 else ''}"
+                          for card_id, copies in Counter(pack).items())
+        lines.append(f"Pack {number}: {cards}")
+    return "\n".join(lines)
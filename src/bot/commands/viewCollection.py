@@ -0,0 +1,18 @@
+from bot.utils.cardUtils import collection_embed, embed_text
+
+NAME = "collection"
+DESCRIPTION = "See the cards you own."
+
+async def view_collection(database, user_id: int, page: int = 1) -> str:
+    """
+    Show a page of the user's collection.
+
+    :param database: The bot's Database.
+    :param user_id: The Discord id of the user.
+    :param page: The 1-based page to show.
+    :return: The reply message.
+    """
+    # Counted from the owned_cards_collection index alone
+    rows = await database.fetchall("SELECT card_id, COUNT(*) FROM owned_cards WHERE user_id = ? GROUP BY card_id", (user_id,))
+    counts = {card_id: count for card_id, count in rows}
+    return embed_text(collection_embed(f"<@{user_id}>'s collection", counts, max(page, 1)))
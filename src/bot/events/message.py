@@ -0,0 +1,406 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from bot.utils.cardUtils import board_embed
+from bot.utils.gameUtils import parse_action
+
+MAX_MESSAGE_LENGTH = 2000
+# Discord lets a bot make five calls every five seconds in one channel
+DISCORD_LIMIT = 5
+DISCORD_PERIOD = 5.0
+# One token refilled every second never makes more than five calls in any five seconds, so it stays
+# inside Discord's window; a bigger burst would, for example, allow ten calls across one second
+DEFAULT_RATE = DISCORD_LIMIT / DISCORD_PERIOD
+DEFAULT_BURST = 1
+# Seconds narration waits for the decision point that flushes it before it is sent anyway
+DEFAULT_LINGER = 1.0
+# Narration kept per channel while it waits for the rate limit; older lines beyond it are dropped
+DEFAULT_BACKLOG = 200
+
+class RateLimited(Exception):
+    """Raised by a gateway when Discord answers 429; the call may be retried after retry_after seconds."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limited, retry after {retry_after:.2f}s.")
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """
+    A token bucket: up to capacity calls at once, then rate calls per second.
+
+    Tokens are counted lazily from the time of the last call, so an idle
+    bucket costs nothing.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, capacity: int = DEFAULT_BURST, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+    def _refill(self) -> float:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def delay(self) -> float:
+        """Seconds until a token is available, 0 if one is now."""
+        tokens = self._refill()
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def take(self) -> bool:
+        """Take a token if one is available."""
+        if self._refill() < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def pause(self, seconds: float):
+        """Empty the bucket so the next token comes in seconds, as told by a 429."""
+        self._refill()
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+class _Channel:
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.lines: List[str] = []
+        self.dropped = 0
+        # The latest version of every keyed update not sent yet, and the message each key was sent as
+        self.updates: "OrderedDict[Hashable, Tuple[Optional[str], Optional[dict]]]" = OrderedDict()
+        self.messages: Dict[Hashable, int] = {}
+        self.first_post = 0.0
+        self.flushing = False
+        self.signal = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.lines or self.updates)
+
+class MessageBatcher:
+    """
+    The bot's outbound messages, coalesced per channel.
+
+    Narration posted for a channel is collected until a decision point
+    flushes it, or until it has waited linger seconds, and is then sent as
+    one message (or as few messages of up to 2000 characters as it takes).
+    An update with a key, such as a match's board, replaces the pending
+    version with the same key, so only the latest is sent; after it has
+    been sent once, later versions edit that message instead of adding one.
+
+    Every channel has a token bucket matching Discord's per-channel limit
+    and a worker task that sends when a token is available. While it waits,
+    more narration merges into the same message and superseded updates are
+    dropped, so a busy channel makes fewer calls rather than falling behind.
+    A 429 from the gateway empties the bucket for the time Discord asks.
+
+    The gateway is anything with the two calls the batcher makes:
+        async send(channel_id, content=None, embed=None) -> message id
+        async edit(channel_id, message_id, content=None, embed=None)
+    and raises RateLimited when Discord answers 429.
+    """
+
+    def __init__(self, gateway, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST, linger: float = DEFAULT_LINGER,
+                 backlog: int = DEFAULT_BACKLOG, max_length: int = MAX_MESSAGE_LENGTH):
+        """
+        :param gateway: Sends and edits messages, e.g. the Discord client or a LocalGateway.
+        :param rate: Calls per second allowed in one channel.
+        :param burst: Calls one channel may make at once after being quiet.
+        :param linger: Seconds narration waits for a flush before being sent anyway.
+        :param backlog: The most narration lines kept per channel while waiting; older ones are dropped.
+        """
+        self.gateway = gateway
+        self.rate = rate
+        self.burst = burst
+        self.linger = linger
+        self.backlog = backlog
+        self.max_length = max_length
+        self.channels: Dict[int, _Channel] = {}
+        self.calls = 0
+        self.lines = 0
+        self.superseded = 0
+        self.failures = 0
+        self._closing = False
+
+    def _channel(self, channel_id: int) -> _Channel:
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            channel = self.channels[channel_id] = _Channel(TokenBucket(self.rate, self.burst))
+            channel.task = asyncio.create_task(self._deliver(channel_id, channel), name=f"deliver-{channel_id}")
+        return channel
+
+    def post(self, channel_id: int, lines: List[str]):
+        """Add narration to a channel's next message."""
+        if not lines:
+            return
+        if self._closing:
+            raise RuntimeError("The batcher is closed.")
+        channel = self._channel(channel_id)
+        if not channel.pending:
+            channel.first_post = asyncio.get_running_loop().time()
+        channel.lines.extend(lines)
+        self.lines += len(lines)
+        excess = len(channel.lines) - self.backlog
+        if excess > 0:
+            del channel.lines[:excess]
+            channel.dropped += excess
+        channel.idle.clear()
+        channel.signal.set()
+
+    def update(self, channel_id: int, key: Hashable, content: Optional[str] = None, embed: Optional[dict] = None):
+        """Set the latest version of a keyed message, replacing a version not sent yet."""
+        if self._closing:
+            raise RuntimeError("The batcher is closed.")
+        channel = self._channel(channel_id)
+        if not channel.pending:
+            channel.first_post = asyncio.get_running_loop().time()
+        if key in channel.updates:
+            self.superseded += 1
+            del channel.updates[key]
+        channel.updates[key] = (content, embed)
+        channel.idle.clear()
+        channel.signal.set()
+
+    def forget(self, channel_id: int, key: Hashable):
+        """Send the next update with a key as a new message instead of editing the last one."""
+        channel = self.channels.get(channel_id)
+        if channel is not None:
+            channel.messages.pop(key, None)
+
+    def flush(self, channel_id: int):
+        """Send what a channel has pending as soon as its rate limit allows, e.g. when a match waits for a move."""
+        channel = self.channels.get(channel_id)
+        if channel is not None and channel.pending:
+            channel.flushing = True
+            channel.signal.set()
+
+    async def wait_idle(self, channel_id: int):
+        channel = self.channels.get(channel_id)
+        if channel is not None:
+            await channel.idle.wait()
+
+    async def close(self):
+        """Send everything pending in every channel, then stop the workers."""
+        self._closing = True
+        for channel_id in list(self.channels):
+            self.flush(channel_id)
+        await asyncio.gather(*(channel.idle.wait() for channel in self.channels.values()))
+        for channel in self.channels.values():
+            channel.task.cancel()
+        await asyncio.gather(*(channel.task for channel in self.channels.values()), return_exceptions=True)
+        self.channels.clear()
+
+    async def __aenter__(self) -> "MessageBatcher":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _take_lines(self, channel: _Channel) -> List[str]:
+        lines, length = [], 0
+        if channel.dropped:
+            lines.append(f"… {channel.dropped} earlier line{'s' if channel.dropped != 1 else ''} skipped")
+            length = len(lines[0]) + 1
+            channel.dropped = 0
+        while channel.lines:
+            line = channel.lines[0]
+            if len(line) > self.max_length:
+                line = line[:self.max_length - 1] + "…"
+            if lines and length + len(line) > self.max_length:
+                break
+            lines.append(line)
+            length += len(line) + 1
+            channel.lines.pop(0)
+        return lines
+
+    async def _send(self, channel_id: int, channel: _Channel):
+        """Make one call for the oldest pending message of a channel; the bucket has a token for it."""
+        if channel.lines:
+            lines = self._take_lines(channel)
+            try:
+                await self.gateway.send(channel_id, content="\n".join(lines))
+            except RateLimited:
+                # Put back in front; anything posted meanwhile follows it
+                channel.lines[:0] = lines
+                raise
+            return
+        key, (content, embed) = channel.updates.popitem(last=False)
+        message_id = channel.messages.get(key)
+        try:
+            if message_id is None:
+                channel.messages[key] = await self.gateway.send(channel_id, content=content, embed=embed)
+            else:
+                await self.gateway.edit(channel_id, message_id, content=content, embed=embed)
+        except RateLimited:
+            # A newer version posted while the call was made replaces this one
+            if key not in channel.updates:
+                channel.updates[key] = (content, embed)
+                channel.updates.move_to_end(key, last=False)
+            raise
+
+    async def _deliver(self, channel_id: int, channel: _Channel):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not channel.pending:
+                channel.flushing = False
+                channel.idle.set()
+                channel.signal.clear()
+                await channel.signal.wait()
+                continue
+            if not channel.flushing:
+                remaining = channel.first_post + self.linger - loop.time()
+                if remaining > 0:
+                    channel.signal.clear()
+                    try:
+                        await asyncio.wait_for(channel.signal.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        channel.flushing = True
+                    continue
+            if not channel.bucket.take():
+                await asyncio.sleep(channel.bucket.delay())
+                continue
+            self.calls += 1
+            try:
+                await self._send(channel_id, channel)
+            except RateLimited as limited:
+                channel.bucket.pause(limited.retry_after)
+            except Exception:
+                # The message is lost, but the channel keeps delivering
+                self.failures += 1
+
+async def on_message(game_service, batcher: MessageBatcher, channel_id: int, user_id: int, text: str) -> bool:
+    """
+    Handle a message sent in a match channel: apply it as a move and deliver what it caused.
+
+    The narration of the move is posted to the channel and the board is
+    updated in place; both are flushed when the match waits for the next
+    decision or is over, so a whole turn reaches Discord in one or two calls.
+
+    :return: False if the text is not a move.
+    """
+    action = parse_action(text)
+    if action is None:
+        return False
+    reply = await game_service.act(user_id, action)
+    if not reply.ok:
+        batcher.post(channel_id, [f"<@{user_id}> {reply.message}"])
+        batcher.flush(channel_id)
+        return True
+    batcher.post(channel_id, ([reply.message] if reply.message else []) + reply.lines)
+    match = game_service.match_of(user_id)
+    if match is None or match.finished:
+        # The match is over and the final narration is all there is to show
+        batcher.flush(channel_id)
+        return True
+    batcher.update(channel_id, ("board", match.match_id), embed=board_embed(match.game, user_id))
+    if match.waiting is not None:
+        waiting_id, decision = match.waiting
+        batcher.post(channel_id, [f"<@{waiting_id}>, your {decision} move."])
+        batcher.flush(channel_id)
+    return True
+
+class LocalGateway:
+    """
+    A stand-in for Discord that keeps the messages it is sent and enforces
+    Discord's per-channel limit with 429s, for trying the batcher without a bot.
+    """
+
+    def __init__(self, limit: int = DISCORD_LIMIT, period: float = DISCORD_PERIOD, latency: float = 0.0):
+        """
+        :param limit: Calls allowed in one channel per period.
+        :param period: Seconds of the rate limit window.
+        :param latency: Seconds every call takes.
+        """
+        self.limit = limit
+        self.period = period
+        self.latency = latency
+        self.messages: Dict[int, Dict[int, dict]] = {}
+        self.calls: List[Tuple[float, str, int]] = []
+        self.rate_limited = 0
+        self._windows: Dict[int, List[float]] = {}
+        self._ids = 0
+
+    def _check(self, channel_id: int):
+        now = time.monotonic()
+        window = [sent for sent in self._windows.get(channel_id, ()) if now - sent < self.period]
+        if len(window) >= self.limit:
+            self.rate_limited += 1
+            self._windows[channel_id] = window
+            raise RateLimited(window[0] + self.period - now)
+        window.append(now)
+        self._windows[channel_id] = window
+
+    async def send(self, channel_id: int, content: Optional[str] = None, embed: Optional[dict] = None) -> int:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._check(channel_id)
+        self._ids += 1
+        self.messages.setdefault(channel_id, {})[self._ids] = {"content": content, "embed": embed}
+        self.calls.append((time.monotonic(), "send", channel_id))
+        return self._ids
+
+    async def edit(self, channel_id: int, message_id: int, content: Optional[str] = None, embed: Optional[dict] = None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._check(channel_id)
+        self.messages[channel_id][message_id] = {"content": content, "embed": embed}
+        self.calls.append((time.monotonic(), "edit", channel_id))
+
+async def delivery_benchmark(matches: int = 20, think: float = 0.05, speedup: float = 20.0, seed: int = 0) -> Dict[str, float]:
+    """
+    Play matches between simulated humans who take think seconds per move,
+    delivering every reply through a MessageBatcher to a LocalGateway, and
+    compare the calls made with sending every narration line and board on its own.
+
+    :param speedup: How much faster than Discord's real limit the gateway and the batcher run, to keep the run short.
+    """
+    import random
+    from Agent import GreedyAgent
+    from services.gameService import GameService
+    from TestingModels import build_decks
+    gateway = LocalGateway(DISCORD_LIMIT, DISCORD_PERIOD / speedup)
+    batcher = MessageBatcher(gateway, rate=DEFAULT_RATE * speedup, linger=DEFAULT_LINGER / speedup)
+    service = GameService(lambda user_id: build_decks()[user_id % 2])
+    started = [service.create_match(2 * number + 1, 2 * number + 2, seed=seed + number)[0] for number in range(matches)]
+    moves = 0
+
+    async def drive(match, channel_id: int):
+        nonlocal moves
+        agents = {player.discord_id: GreedyAgent(random.Random(player.discord_id)) for player in match.players}
+        while not match.finished:
+            user_id, decision = match.waiting
+            player = match.seat(user_id)
+            if decision == "combat":
+                attackers = agents[user_id].select_attackers(match.game, player, list(player.creatures))
+                text = "attack " + " ".join(str(number) for number in range(1, len(attackers) + 1))
+            else:
+                action = agents[user_id].choose_action(match.game, player)
+                text = action[0] if len(action) == 1 else f"{action[0]} {action[1]}" if len(action) == 2 else f"attach {action[1]} to {action[2]}"
+            await asyncio.sleep(think * random.random())
+            await on_message(service, batcher, channel_id, user_id, text)
+            moves += 1
+
+    clock = time.perf_counter()
+    await asyncio.gather(*(drive(match, 1000 + number) for number, match in enumerate(started)))
+    await batcher.close()
+    elapsed = time.perf_counter() - clock
+    await service.close()
+    turns = sum(match.game.turn_counter for match in started)
+    # Without batching, every narration line is a message and every move sends a new board
+    unbatched = batcher.lines + moves
+    return {"matches": matches, "turns": turns, "seconds": elapsed, "calls": len(gateway.calls), "unbatched_calls": unbatched,
+            "calls_per_turn": len(gateway.calls) / turns, "unbatched_calls_per_turn": unbatched / turns,
+            "rate_limited": gateway.rate_limited, "superseded": batcher.superseded}
+
+# Example usage:
+if __name__ == "__main__":
+    import sys
+    result = asyncio.run(delivery_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
+    print(f"{result['matches']} matches, {result['turns']} turns in {result['seconds']:.1f}s: "
+          f"{result['calls_per_turn']:.2f} calls per turn batched, {result['unbatched_calls_per_turn']:.2f} unbatched; "
+          f"{result['rate_limited']} 429s, {result['superseded']} board updates merged")
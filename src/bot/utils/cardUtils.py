@@ -0,0 +1,64 @@
+from typing import List, Mapping
+from Rendering import battlefield_lines, card_lines, collection_lines, fragment
+
+# Discord's limits on the text of an embed
+EMBED_DESCRIPTION_LIMIT = 4096
+EMBED_FIELD_VALUE_LIMIT = 1024
+
+def fit_lines(lines: List[str], limit: int) -> str:
+    """Join lines, leaving out the last ones, with a note of how many, if they do not fit in limit characters."""
+    text = "\n".join(lines)
+    if len(text) <= limit:
+        return text
+    kept, length = [], 0
+    for number, line in enumerate(lines):
+        note = f"…and {len(lines) - number} more"
+        if length + len(line) + 1 + len(note) > limit:
+            return "\n".join(kept + [note])
+        kept.append(line)
+        length += len(line) + 1
+    return text
+
+def card_embed(definition) -> dict:
+    """An embed of one card's full text, rendered once per card."""
+    card = fragment(definition)
+    return {"title": card.name, "description": card.text}
+
+def hand_embed(player) -> dict:
+    """A player's hand, one cached line per card."""
+    lines = card_lines(player.hand.cards)
+    return {"title": f"{player.name}'s hand ({len(lines)})", "description": fit_lines(lines, EMBED_DESCRIPTION_LIMIT) or "The hand is empty."}
+
+def board_embed(game, viewer_id: int) -> dict:
+    """Both battlefields of a game as seen by one seat, whose own traps are shown face up."""
+    fields = []
+    for player in (game.player1, game.player2):
+        lines = battlefield_lines(player, hide_traps=player.discord_id != viewer_id)
+        fields.append({
+            "name": f"{player.name} — {player.hp} HP, {player.current_mana}/{player.mana} mana",
+            "value": fit_lines(lines, EMBED_FIELD_VALUE_LIMIT) or "Nothing on the battlefield.",
+            "inline": False,
+        })
+    return {"title": f"Turn {game.turn_counter}, {game.phase}", "fields": fields}
+
+def collection_embed(title: str, counts: Mapping[str, int], page: int = 1, page_size: int = 20) -> dict:
+    """A page of a collection, given as the number of copies of each card id."""
+    lines = collection_lines(counts)
+    pages = max(1, -(-len(lines) // page_size))
+    shown = lines[(page - 1) * page_size:page * page_size]
+    return {
+        "title": title,
+        "description": fit_lines(shown, EMBED_DESCRIPTION_LIMIT) or "No cards yet.",
+        "footer": {"text": f"Page {min(page, pages)} of {pages} · {sum(counts.values())} cards"},
+    }
+
+def embed_text(embed: Mapping) -> str:
+    """The text of an embed, for replies sent as plain messages."""
+    parts = [f"**{embed['title']}**"] if embed.get("title") else []
+    if embed.get("description"):
+        parts.append(embed["description"])
+    for field in embed.get("fields", ()):
+        parts.append(f"__{field['name']}__\n{field['value']}")
+    if embed.get("footer"):
+        parts.append(embed["footer"]["text"])
+    return "\n".join(parts)
@@ -0,0 +1,32 @@
+from decimal import Decimal, InvalidOperation
+CURRENCY_NAME = "coins"
+CURRENCY_SYMBOL = "🪙"
+# The largest amount a ledger column holds, SQLite's largest integer
+MAX_AMOUNT = 2 ** 63 - 1
+
+def format_amount(amount: int) -> str:
+    """Format an amount of currency for a message, e.g. "🪙 1,250 coins"."""
+    return f"{CURRENCY_SYMBOL} {amount:,} {CURRENCY_NAME}"
+
+def parse_amount(text: str) -> int:
+    """
+    Parse an amount typed by a user, accepting separators and a k suffix ("1,500", "2k").
+
+    :raises ValueError: If the text is not a positive whole amount of at most MAX_AMOUNT.
+    """
+    cleaned = text.strip().lower().replace(",", "").replace("_", "")
+    multiplier = 1
+    if cleaned.endswith("k"):
+        cleaned, multiplier = cleaned[:-1], 1000
+    # Decimal rather than float, so large amounts are exact and "inf" or "1e400" are refused rather than overflowing
+    try:
+        amount = Decimal(cleaned) * multiplier
+    except InvalidOperation:
+        amount = None
+    if amount is None or not amount.is_finite() or amount <= 0 or amount != amount.to_integral_value() or amount > MAX_AMOUNT:
+        raise ValueError(f"'{text}' is not a positive whole amount.")
+    return int(amount)
+
+def interaction_key(interaction_id, action: str) -> str:
+    """The idempotency key of one ledger change made by one Discord interaction, so a retried interaction is applied once."""
+    return f"{action}:{interaction_id}"
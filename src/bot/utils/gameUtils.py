@@ -0,0 +1,32 @@
+from typing import List, Optional
+
+def parse_action(text: str) -> Optional[tuple]:
+    """
+    Parse a move typed in a match channel into a match action.
+
+    Accepts "play <card>", "attach <equipment> to <creature>", "activate <technology>",
+    "skip", "attack [numbers]" (1-based, none to hold back) and "concede".
+
+    :return: The action tuple, or None if the text is not a move.
+    """
+    words = text.strip().split(maxsplit=1)
+    if not words:
+        return None
+    kind, rest = words[0].lower(), words[1].strip() if len(words) > 1 else ""
+    if kind in ("skip", "concede") and not rest:
+        return (kind,)
+    if kind in ("play", "activate") and rest:
+        return (kind, rest)
+    if kind == "attach" and " to " in rest:
+        equipment, creature = rest.split(" to ", 1)
+        return ("attach", equipment.strip(), creature.strip())
+    if kind == "attack":
+        numbers = rest.replace(",", " ").split()
+        if all(number.isdigit() and int(number) > 0 for number in numbers):
+            return ("attack", [int(number) - 1 for number in numbers])
+    return None
+
+def format_reply(message: str, lines: List[str], max_length: int = 2000) -> str:
+    """Join a reply and its narration into one Discord message, keeping the newest lines if it is too long."""
+    text = "\n".join(([message] if message else []) + lines)
+    return text if len(text) <= max_length else "…" + text[-(max_length - 1):]
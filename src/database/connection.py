@@ -0,0 +1,306 @@
+import asyncio
+import itertools
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Iterable, List, Optional, Sequence
+
+MEMORY = ":memory:"
+DEFAULT_POOL_SIZE = 4
+DEFAULT_STATEMENT_CACHE = 256
+DEFAULT_BATCH_SIZE = 1000
+
+# Shared-cache in-memory databases are named, so two pools never see each other's tables
+_memory_names = itertools.count()
+
+class DatabaseError(Exception):
+    """Raised when the database is used before it is opened or after it is closed."""
+
+class Connection:
+    """
+    One SQLite connection and the worker thread every call on it runs in.
+
+    SQLite calls block on disk I/O and locks, so they never run on the event
+    loop: each coroutine hands its call to the connection's own thread and
+    awaits the result. The connection is in autocommit mode; transactions are
+    opened explicitly with transaction().
+    """
+
+    def __init__(self, database: str, uri: bool, statement_cache: int, busy_timeout: float):
+        self._database = database
+        self._uri = uri
+        self._statement_cache = statement_cache
+        self._busy_timeout = busy_timeout
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="sqlite")
+        self._sqlite: Optional[sqlite3.Connection] = None
+        self.in_transaction = False
+
+    def _connect(self, wal: bool):
+        # sqlite3 keeps the prepared statements of the last statement_cache distinct SQL strings
+        sqlite = sqlite3.connect(self._database, uri=self._uri, isolation_level=None, check_same_thread=False,
+                                 timeout=self._busy_timeout, cached_statements=self._statement_cache)
+        sqlite.row_factory = sqlite3.Row
+        sqlite.execute("PRAGMA foreign_keys = ON")
+        if wal:
+            sqlite.execute("PRAGMA journal_mode = WAL")
+            sqlite.execute("PRAGMA synchronous = NORMAL")
+        self._sqlite = sqlite
+
+    async def _run(self, function: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def open(self, wal: bool = True):
+        await self._run(self._connect, wal)
+
+    async def close(self):
+        if self._sqlite is not None:
+            await self._run(self._sqlite.close)
+            self._sqlite = None
+        self._executor.shutdown(wait=False)
+
+    async def run(self, function: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        Call function with the underlying sqlite3 connection in the connection's thread,
+        for work of many statements that should not wait on the event loop between them.
+        """
+        return await self._run(function, self._sqlite)
+
+    async def execute(self, sql: str, parameters: Sequence = ()) -> int:
+        """
+        Run one statement.
+
+        :return: The number of rows changed.
+        """
+        return await self._run(lambda: self._sqlite.execute(sql, parameters).rowcount)
+
+    async def insert(self, sql: str, parameters: Sequence = ()) -> int:
+        """
+        Run one INSERT statement.
+
+        :return: The rowid of the inserted row.
+        """
+        return await self._run(lambda: self._sqlite.execute(sql, parameters).lastrowid)
+
+    async def fetchall(self, sql: str, parameters: Sequence = ()) -> List[sqlite3.Row]:
+        return await self._run(lambda: self._sqlite.execute(sql, parameters).fetchall())
+
+    async def fetchone(self, sql: str, parameters: Sequence = ()) -> Optional[sqlite3.Row]:
+        return await self._run(lambda: self._sqlite.execute(sql, parameters).fetchone())
+
+    async def fetchval(self, sql: str, parameters: Sequence = (), default: Any = None) -> Any:
+        """The first column of the first row, or default if there are no rows."""
+        row = await self.fetchone(sql, parameters)
+        return row[0] if row is not None else default
+
+    async def executemany(self, sql: str, rows: Iterable[Sequence], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Run one statement for many parameter rows.
+
+        The rows are consumed in batches of batch_size, so a generator of any
+        length is never held in memory at once. Outside a transaction all the
+        batches run in one transaction of their own.
+
+        :return: The number of rows changed.
+        """
+        def run():
+            changed = 0
+            iterator = iter(rows)
+            own_transaction = not self._sqlite.in_transaction
+            if own_transaction:
+                self._sqlite.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    batch = list(itertools.islice(iterator, batch_size))
+                    if not batch:
+                        break
+                    changed += self._sqlite.executemany(sql, batch).rowcount
+                if own_transaction:
+                    self._sqlite.execute("COMMIT")
+            except BaseException:
+                if own_transaction:
+                    self._sqlite.execute("ROLLBACK")
+                raise
+            return changed
+        return await self._run(run)
+
+    async def executescript(self, script: str):
+        await self._run(self._sqlite.executescript, script)
+
+    @asynccontextmanager
+    async def transaction(self, immediate: bool = True) -> AsyncIterator["Connection"]:
+        """
+        Run the statements of an async with block in one transaction, committed
+        when the block exits and rolled back if it raises (or is cancelled).
+
+        :param immediate: Take the write lock when the transaction begins rather than at its first write, so
+                          a transaction that writes never fails half-way with SQLITE_BUSY. Pass False for read-only work.
+        """
+        if self.in_transaction:
+            raise DatabaseError("Transactions on a connection cannot be nested.")
+        # Set before the first await, so a cancellation at any point below still ends in the rollback
+        self.in_transaction = True
+        committed = False
+        try:
+            await self._run(self._sqlite.execute, "BEGIN IMMEDIATE" if immediate else "BEGIN")
+            yield self
+            # Shielded, as is the rollback: the statement runs in the thread even if the caller is
+            # cancelled, and everything later on the connection is queued behind it
+            await asyncio.shield(self._run(self._commit))
+            committed = True
+        finally:
+            try:
+                if not committed:
+                    await asyncio.shield(self._run(self._rollback))
+            finally:
+                self.in_transaction = False
+
+    def _commit(self):
+        try:
+            self._sqlite.execute("COMMIT")
+        except BaseException:
+            self._rollback()
+            raise
+
+    def _rollback(self):
+        # A BEGIN cancelled before its thread ran it left nothing to roll back
+        if self._sqlite.in_transaction:
+            self._sqlite.execute("ROLLBACK")
+
+class Database:
+    """
+    An asyncio front end to a SQLite database: a bounded pool of Connections.
+
+    A file database runs in WAL mode, so readers never wait for the writer and
+    several connections can read at once while one writes. ":memory:" is
+    served by a single connection to a shared in-memory database, since
+    in-memory databases lock whole tables instead.
+
+    Usage:
+        database = Database("cards.db")
+        await database.open()
+        async with database.transaction() as connection:
+            await connection.execute(...)
+        rows = await database.fetchall(...)
+        await database.close()
+    """
+
+    def __init__(self, path: str = MEMORY, pool_size: int = DEFAULT_POOL_SIZE,
+                 statement_cache: int = DEFAULT_STATEMENT_CACHE, busy_timeout: float = 5.0):
+        """
+        :param path: The database file, or ":memory:".
+        :param pool_size: The most connections open at once; callers wait for a free one beyond that.
+        :param statement_cache: How many prepared statements each connection keeps.
+        :param busy_timeout: Seconds a connection waits for another connection's lock before failing.
+        """
+        self.path = path
+        self.memory = path == MEMORY
+        self.pool_size = 1 if self.memory else pool_size
+        self.statement_cache = statement_cache
+        self.busy_timeout = busy_timeout
+        self._connections: List[Connection] = []
+        self._idle: Optional[asyncio.Queue] = None
+
+    async def open(self):
+        if self._idle is not None:
+            return
+        if self.memory:
+            database, uri = f"file:memory{next(_memory_names)}?mode=memory&cache=shared", True
+        else:
+            database, uri = self.path, False
+        self._connections = [Connection(database, uri, self.statement_cache, self.busy_timeout) for _ in range(self.pool_size)]
+        # The first connection switches the file to WAL before the others open it
+        await self._connections[0].open(wal=not self.memory)
+        await asyncio.gather(*(connection.open(wal=False) for connection in self._connections[1:]))
+        self._idle = asyncio.Queue()
+        for connection in self._connections:
+            self._idle.put_nowait(connection)
+
+    async def close(self):
+        """Close every connection, waiting for the ones in use to be released."""
+        if self._idle is None:
+            return
+        for _ in self._connections:
+            await self._idle.get()
+        await asyncio.gather(*(connection.close() for connection in self._connections))
+        self._connections = []
+        self._idle = None
+
+    async def __aenter__(self) -> "Database":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Connection]:
+        """Borrow a connection from the pool for the duration of an async with block."""
+        if self._idle is None:
+            raise DatabaseError("The database is not open.")
+        idle = self._idle
+        connection = await idle.get()
+        try:
+            yield connection
+        finally:
+            idle.put_nowait(connection)
+
+    @asynccontextmanager
+    async def transaction(self, immediate: bool = True) -> AsyncIterator[Connection]:
+        """Borrow a connection and run an async with block in one transaction on it."""
+        async with self.acquire() as connection:
+            async with connection.transaction(immediate) as transaction:
+                yield transaction
+
+    async def run(self, function: Callable[[sqlite3.Connection], Any]) -> Any:
+        async with self.acquire() as connection:
+            return await connection.run(function)
+
+    async def execute(self, sql: str, parameters: Sequence = ()) -> int:
+        async with self.acquire() as connection:
+            return await connection.execute(sql, parameters)
+
+    async def insert(self, sql: str, parameters: Sequence = ()) -> int:
+        async with self.acquire() as connection:
+            return await connection.insert(sql, parameters)
+
+    async def fetchall(self, sql: str, parameters: Sequence = ()) -> List[sqlite3.Row]:
+        async with self.acquire() as connection:
+            return await connection.fetchall(sql, parameters)
+
+    async def fetchone(self, sql: str, parameters: Sequence = ()) -> Optional[sqlite3.Row]:
+        async with self.acquire() as connection:
+            return await connection.fetchone(sql, parameters)
+
+    async def fetchval(self, sql: str, parameters: Sequence = (), default: Any = None) -> Any:
+        async with self.acquire() as connection:
+            return await connection.fetchval(sql, parameters, default)
+
+    async def executemany(self, sql: str, rows: Iterable[Sequence], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        async with self.acquire() as connection:
+            return await connection.executemany(sql, rows, batch_size)
+
+    async def executescript(self, script: str):
+        async with self.acquire() as connection:
+            await connection.executescript(script)
+
+# Example usage:
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    async def main():
+        path = os.path.join(tempfile.mkdtemp(), "example.db")
+        async with Database(path) as database:
+            await database.execute("CREATE TABLE ledger (user_id INTEGER, amount INTEGER)")
+            started = time.perf_counter()
+            await database.executemany("INSERT INTO ledger VALUES (?, ?)", ((user, 10) for user in range(100000)))
+            print(f"Inserted 100000 rows in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+            async def read(user):
+                return await database.fetchval("SELECT SUM(amount) FROM ledger WHERE user_id = ?", (user,))
+            started = time.perf_counter()
+            totals = await asyncio.gather(*(read(user) for user in range(200)))
+            print(f"200 concurrent reads in {(time.perf_counter() - started) * 1000:.1f}ms, total {sum(totals)}")
+
+    asyncio.run(main())
@@ -0,0 +1,44 @@
+import time
+from typing import List
+from database.migrations import initialMigration, matchHibernation, userCardPlays
+
+# Every migration module, oldest first. A module has a VERSION, a NAME and an async upgrade(connection).
+MIGRATIONS = [
+    initialMigration,
+    matchHibernation,
+    userCardPlays,
+]
+
+async def applied_versions(database) -> List[int]:
+    await database.execute("CREATE TABLE IF NOT EXISTS schema_migrations (version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at REAL NOT NULL)")
+    return [row[0] for row in await database.fetchall("SELECT version FROM schema_migrations ORDER BY version")]
+
+async def migrate(database) -> List[int]:
+    """
+    Bring a database up to the latest schema, applying the migrations it is missing in order.
+
+    Every migration runs in its own transaction together with the row that
+    records it, and is checked for again once the transaction holds the write
+    lock, so running this at every startup, or from several processes at
+    once, applies each migration exactly once.
+
+    :return: The versions applied by this call.
+    """
+    done = set(await applied_versions(database))
+    applied = []
+    for migration in sorted(MIGRATIONS, key=lambda migration: migration.VERSION):
+        if migration.VERSION in done:
+            continue
+        async with database.transaction() as connection:
+            if await connection.fetchone("SELECT 1 FROM schema_migrations WHERE version = ?", (migration.VERSION,)):
+                continue
+            await migration.upgrade(connection)
+            await connection.execute("INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                                     (migration.VERSION, migration.NAME, time.time()))
+        applied.append(migration.VERSION)
+    return applied
+
+async def schema_version(database) -> int:
+    """The version of the newest migration applied to a database, 0 for a new one."""
+    versions = await applied_versions(database)
+    return versions[-1] if versions else 0
@@ -0,0 +1,138 @@
+import json
+from typing import Iterable, Mapping, Optional, Tuple
+
+VERSION = 1
+NAME = "initial schema"
+
+# The tables, each followed by the indexes of the queries that read it.
+# Indexes list every column a hot query reads, so it is answered from the index alone.
+STATEMENTS = (
+    """
+    CREATE TABLE users (
+        user_id INTEGER PRIMARY KEY,  -- The Discord id
+        victories INTEGER NOT NULL DEFAULT 0,
+        losses INTEGER NOT NULL DEFAULT 0,
+        rating INTEGER NOT NULL DEFAULT 1000,
+        games INTEGER NOT NULL DEFAULT 0,  -- Matches the leaderboard has recorded, draws included
+        created_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+    )
+    """,
+    # Leaderboard order, ties broken by who got there first; only users who have played are ranked.
+    # games is listed too, as SQLite reads the columns of the index's WHERE clause to check it
+    "CREATE INDEX users_leaderboard ON users (rating DESC, victories DESC, user_id, games) WHERE games > 0",
+    """
+    CREATE TABLE card_definitions (
+        card_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        card_type TEXT NOT NULL,
+        rarity TEXT NOT NULL,
+        cost TEXT NOT NULL,  -- JSON, by mana type
+        attributes TEXT NOT NULL,  -- JSON
+        details TEXT NOT NULL  -- JSON, the fields of the card type
+    ) WITHOUT ROWID
+    """,
+    # Pack generation reads every card of a rarity
+    "CREATE INDEX card_definitions_rarity ON card_definitions (rarity, card_id)",
+    """
+    CREATE TABLE owned_cards (
+        instance_id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (user_id),
+        card_id TEXT NOT NULL REFERENCES card_definitions (card_id),
+        acquired_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0),
+        source TEXT NOT NULL DEFAULT 'pack'
+    )
+    """,
+    # A user's collection by card: counts per card and the copies of one card, with the instance ids from the rowid
+    "CREATE INDEX owned_cards_collection ON owned_cards (user_id, card_id)",
+    """
+    CREATE TABLE decks (
+        deck_id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (user_id),
+        name TEXT NOT NULL,
+        updated_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+    )
+    """,
+    # A user's decks, by name
+    "CREATE UNIQUE INDEX decks_user ON decks (user_id, name, deck_id)",
+    """
+    CREATE TABLE deck_cards (
+        deck_id INTEGER NOT NULL REFERENCES decks (deck_id) ON DELETE CASCADE,
+        card_id TEXT NOT NULL REFERENCES card_definitions (card_id),
+        copies INTEGER NOT NULL CHECK (copies > 0),
+        PRIMARY KEY (deck_id, card_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE currency_ledger (
+        entry_id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (user_id),
+        amount INTEGER NOT NULL,
+        balance INTEGER NOT NULL CHECK (balance >= 0),  -- The user's balance after the entry
+        reason TEXT NOT NULL,
+        idempotency_key TEXT UNIQUE,
+        created_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+    )
+    """,
+    # A user's history, newest first; its first row holds the current balance
+    "CREATE INDEX currency_ledger_user ON currency_ledger (user_id, entry_id DESC, balance)",
+    """
+    CREATE TABLE match_results (
+        match_id INTEGER PRIMARY KEY,
+        -- 'win': winner_id beat loser_id; 'draw': they are the two seats. The computer's seat is NULL.
+        winner_id INTEGER REFERENCES users (user_id),
+        loser_id INTEGER REFERENCES users (user_id),
+        outcome TEXT NOT NULL CHECK (outcome IN ('win', 'draw')),
+        turns INTEGER NOT NULL,
+        finished_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+    )
+    """,
+    # A user's match history, from either side
+    "CREATE INDEX match_results_winner ON match_results (winner_id, match_id DESC)",
+    "CREATE INDEX match_results_loser ON match_results (loser_id, match_id DESC)",
+)
+
+# The fields each card type adds to CardDefinition, stored in card_definitions.details
+CARD_DETAILS = {
+    "Creature": ("hp", "abilities"),
+    "Resource": ("resource_type", "amount"),
+    "Trap": ("trigger_condition", "effect_name"),
+    "Equipment": ("effects",),
+    "Technologies": ("spell_effect",),
+}
+
+DEFAULT_RARITY = "common"
+
+async def upgrade(connection):
+    """Create the initial schema; runs inside the migration runner's transaction."""
+    for statement in STATEMENTS:
+        await connection.execute(statement)
+
+def _plain(value):
+    # Definitions hold read-only mappings, which json cannot encode directly
+    return dict(value)
+
+def _json(value) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=_plain)
+
+def catalog_row(definition, rarity: str = DEFAULT_RARITY) -> Tuple:
+    """The card_definitions row of a card definition."""
+    details = {field: getattr(definition, field) for field in CARD_DETAILS.get(definition.card_type, ())}
+    return (definition.card_id, definition.name, definition.card_type, rarity,
+            _json(definition.cost), _json(definition.attributes), _json(details))
+
+async def import_catalog(database, definitions: Iterable, rarities: Optional[Mapping[str, str]] = None) -> int:
+    """
+    Load the card catalog in one transaction, replacing the stored version of every card already there.
+
+    :param database: A Database the schema has been applied to.
+    :param definitions: The card definitions, such as Card.registry.values().
+    :param rarities: The rarity of each card by card id; cards not in it are common.
+    :return: The number of cards written.
+    """
+    rarities = rarities or {}
+    rows = (catalog_row(definition, rarities.get(definition.card_id, DEFAULT_RARITY)) for definition in definitions)
+    return await database.executemany(
+        "INSERT INTO card_definitions (card_id, name, card_type, rarity, cost, attributes, details) VALUES (?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (card_id) DO UPDATE SET name = excluded.name, card_type = excluded.card_type, rarity = excluded.rarity, "
+        "cost = excluded.cost, attributes = excluded.attributes, details = excluded.details",
+        rows)
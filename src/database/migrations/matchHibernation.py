@@ -0,0 +1,18 @@
+VERSION = 2
+NAME = "hibernated matches"
+
+STATEMENTS = (
+    """
+    CREATE TABLE hibernated_matches (
+        match_id INTEGER PRIMARY KEY,
+        player1_id INTEGER NOT NULL,
+        player2_id INTEGER NOT NULL,
+        state BLOB NOT NULL,  -- Serialization.encode_game
+        hibernated_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+    )
+    """,
+)
+
+async def upgrade(connection):
+    for statement in STATEMENTS:
+        await connection.execute(statement)
@@ -0,0 +1,18 @@
+VERSION = 3
+NAME = "user card plays"
+
+STATEMENTS = (
+    # The play counters of a user, read whole when the user's stats are loaded
+    """
+    CREATE TABLE user_card_plays (
+        user_id INTEGER NOT NULL REFERENCES users (user_id),
+        card_id TEXT NOT NULL,
+        plays INTEGER NOT NULL,
+        PRIMARY KEY (user_id, card_id)
+    ) WITHOUT ROWID
+    """,
+)
+
+async def upgrade(connection):
+    for statement in STATEMENTS:
+        await connection.execute(statement)
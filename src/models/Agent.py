@@ -0,0 +1,159 @@
+import random
+from typing import List, Optional
+
+class PlayerAgent:
+    """
+    Base class for anything that makes decisions for a Player.
+
+    The Gamestate never reads from stdin itself. Every decision point in the
+    turn cycle is handed to the agent of the player who has to decide, and the
+    agent returns the result:
+
+    - choose_action: a tuple describing a main phase action, one of
+      ("play", card_name), ("attach", equipment_name, creature_name),
+      ("activate", technology_name) or ("skip",).
+    - select_attackers: the creatures that attack this combat.
+    - activate_trap: whether a trap whose condition was met should fire.
+    - choose_discard: the card to discard during cleanup.
+    """
+
+    def choose_action(self, game_state, player) -> tuple:
+        return ("skip",)
+
+    def select_attackers(self, game_state, player, valid_attackers: List) -> List:
+        return []
+
+    def activate_trap(self, game_state, player, trap, target) -> bool:
+        return False
+
+    def choose_discard(self, game_state, player):
+        return player.hand.cards[-1]
+
+class PassiveAgent(PlayerAgent):
+    """An agent that skips every action, never attacks and never triggers traps."""
+
+class ConsoleAgent(PlayerAgent):
+    """An agent that asks a human at the terminal for every decision."""
+
+    def choose_action(self, game_state, player) -> tuple:
+        player.hand.view_hand()
+        print(f"Your Common Mana: {player.get_common_mana()}")
+        print(f"Your Resource Pool: {player.get_resource_pool()}")
+        action = input(f"{player.name}, choose an action (play/attach/activate/skip): ").strip().lower()
+
+        if action == "play":
+            player.hand.view_hand()
+            return ("play", input("Enter the name of the card you want to play: ").strip())
+        if action == "attach":
+            player.hand.view_hand()
+            equipment_name = input("Enter the name of the equipment to attach: ").strip()
+            target_name = input("Enter the name of the creature to attach it to: ").strip()
+            return ("attach", equipment_name, target_name)
+        if action == "activate":
+            player.hand.view_hand()
+            return ("activate", input("Enter the name of the technology to activate: ").strip())
+        return (action,)
+
+    def select_attackers(self, game_state, player, valid_attackers: List) -> List:
+        print(f"{player.name}, select attackers for combat:")
+        print("Your Battlefield:")
+        for index, card in enumerate(valid_attackers, start=1):
+            print(f"{index}. {card.name} ({card.card_type}) - Attack: {card.attack}")
+
+        selected_attackers = []
+        while True:
+            try:
+                selection = input("Enter the number of the card to attack with (0 to finish selecting): ")
+                index = int(selection) - 1
+                if index == -1:
+                    break
+                if 0 <= index < len(valid_attackers):
+                    selected_attackers.append(valid_attackers[index])
+                    print(f"{valid_attackers[index].name} selected as an attacker.")
+                else:
+                    print("Invalid selection. Please enter a valid number.")
+            except (ValueError, IndexError):
+                print("Invalid selection. Please enter a valid number.")
+
+        return selected_attackers
+
+    def activate_trap(self, game_state, player, trap, target) -> bool:
+        print(f"{player.name} can activate {trap.name}.")
+        return input(f"Do you want to activate {trap.name}? (yes/no): ").strip().lower() == "yes"
+
+    def choose_discard(self, game_state, player):
+        print("Choose a card to discard:")
+        player.hand.view_hand()
+        choice = int(input("Enter the number of the card to discard: ")) - 1
+        while choice < 0 or choice >= len(player.hand.cards):
+            print("Invalid selection. Please try again.")
+            choice = int(input("Enter the number of the card to discard: ")) - 1
+        return player.hand.cards[choice]
+
+class RandomAgent(PlayerAgent):
+    """An agent that picks uniformly among the actions it could legally take."""
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()
+
+    def legal_actions(self, game_state, player) -> List[tuple]:
+        """
+        List the main phase actions the player can currently afford.
+
+        :return: A list of action tuples, always ending with ("skip",).
+        """
+        actions = []
+        creatures = player.creatures
+        for card in player.playable_cards():
+            if card.card_type == "Resource":
+                if not player.land_played:
+                    actions.append(("play", card.name))
+            elif card.card_type == "Equipment":
+                for creature in creatures:
+                    actions.append(("attach", card.name, creature.name))
+            elif card.card_type == "Technologies":
+                actions.append(("activate", card.name))
+            else:
+                actions.append(("play", card.name))
+        actions.append(("skip",))
+        return actions
+
+    def choose_action(self, game_state, player) -> tuple:
+        return self.rng.choice(self.legal_actions(game_state, player))
+
+    def select_attackers(self, game_state, player, valid_attackers: List) -> List:
+        return [card for card in valid_attackers if self.rng.random() < 0.5]
+
+    def activate_trap(self, game_state, player, trap, target) -> bool:
+        return self.rng.random() < 0.5
+
+    def choose_discard(self, game_state, player):
+        return self.rng.choice(player.hand.cards)
+
+class GreedyAgent(RandomAgent):
+    """
+    A scripted agent for simulations: it plays a land first, then the most
+    expensive card it can afford, attacks with every creature and always
+    triggers its traps.
+    """
+
+    def choose_action(self, game_state, player) -> tuple:
+        actions = self.legal_actions(game_state, player)
+        for action in actions:
+            if action[0] == "play" and player.hand.find_card(action[1]).card_type == "Resource":
+                return action
+        best_action, best_cost = actions[-1], -1
+        for action in actions[:-1]:
+            cost = sum(player.hand.find_card(action[1]).cost.values())
+            if cost > best_cost:
+                best_action, best_cost = action, cost
+        return best_action
+
+    def select_attackers(self, game_state, player, valid_attackers: List) -> List:
+        return list(valid_attackers)
+
+    def activate_trap(self, game_state, player, trap, target) -> bool:
+        return True
+
+    def choose_discard(self, game_state, player):
+        return max(player.hand.cards, key=lambda card: sum(card.cost.values()))
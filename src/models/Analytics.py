@@ -0,0 +1,228 @@
+import math
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
+from Card import CardDefinition, get_definition
+from Mana import MANA_TYPES
+
+INITIAL_HAND_SIZE = 8
+MAX_DECK_SIZE = 60
+MAX_MANA = 10
+
+# Binomial coefficients up to the largest deck, as floats so whole rows are combined with array operations
+_COMB = np.array([[math.comb(n, k) for k in range(MAX_DECK_SIZE + 1)] for n in range(MAX_DECK_SIZE + 1)], np.float64)
+
+CardGroup = Union[str, Sequence[str]]
+
+def cards_seen(turn: int, deck_size: int) -> int:
+    """
+    The number of cards a player has drawn by their own turn number turn:
+    the initial hand of Hand.draw_initial_hand on their first turn, then one per turn.
+    """
+    return min(deck_size, INITIAL_HAND_SIZE + turn - 1)
+
+def common_mana(turn: int) -> int:
+    """
+    The Common mana a player has on their own turn number turn.
+
+    Player.increase_mana runs for both players after every second turn, so
+    both the first and the second player have one more each turn, up to the maximum.
+    """
+    return min(turn, MAX_MANA)
+
+class DeckAnalytics:
+    """
+    Draw odds, castability and opening-hand statistics of a deck, computed from its card-id counts.
+
+    Exact answers use the (multivariate) hypergeometric distribution;
+    conditions too complex for that are estimated by vectorized Monte Carlo
+    sampling with monte_carlo.
+    """
+
+    def __init__(self, counts: Mapping[str, int], definitions: Optional[Mapping[str, CardDefinition]] = None):
+        """
+        :param counts: The number of copies of each card in the deck, by card id.
+        :param definitions: The definitions of those cards; by default they are looked up in the card registry.
+        """
+        self.card_ids: List[str] = [card_id for card_id, copies in counts.items() if copies > 0]
+        self.copies = np.array([counts[card_id] for card_id in self.card_ids], np.int64)
+        self.size = int(self.copies.sum())
+        if self.size > MAX_DECK_SIZE:
+            raise ValueError(f"A deck holds at most {MAX_DECK_SIZE} cards, got {self.size}.")
+        self.index = {card_id: number for number, card_id in enumerate(self.card_ids)}
+        definitions = definitions or {}
+        self.definitions = {card_id: definitions.get(card_id) or get_definition(card_id) for card_id in self.card_ids}
+
+    @classmethod
+    def from_deck(cls, deck) -> "DeckAnalytics":
+        """Analyse the cards currently in a Deck."""
+        cards = deck.cards
+        return cls(Counter(card.card_id for card in cards), {card.card_id: card.definition for card in cards})
+
+    def _group(self, cards: CardGroup) -> List[str]:
+        card_ids = [cards] if isinstance(cards, str) else list(cards)
+        for card_id in card_ids:
+            if card_id not in self.index:
+                raise KeyError(f"Card '{card_id}' is not in the deck.")
+        return card_ids
+
+    def _copies_of(self, card_ids: Iterable[str]) -> int:
+        return int(sum(self.copies[self.index[card_id]] for card_id in card_ids))
+
+    def probability(self, requirements: Sequence[Tuple[CardGroup, int]], seen: Union[int, Sequence[int]]) -> np.ndarray:
+        """
+        The exact probability of drawing at least a minimum number of cards from
+        each of several disjoint groups, within the first seen cards of the deck.
+
+        The groups are combined by convolving their hypergeometric terms, so the
+        cost grows with the number of cards in the groups, not with the number
+        of ways to draw them.
+
+        :param requirements: (group, minimum) pairs; a group is a card id or a list of card ids.
+        :param seen: The number of cards drawn, or several numbers to answer at once.
+        :return: The probabilities, shaped like seen.
+        """
+        ways = np.ones(1)
+        grouped = 0
+        used = set()
+        for cards, minimum in requirements:
+            card_ids = self._group(cards)
+            if used.intersection(card_ids):
+                raise ValueError("The groups of a requirement must not share cards.")
+            used.update(card_ids)
+            copies = self._copies_of(card_ids)
+            term = np.zeros(copies + 1)
+            term[minimum:] = _COMB[copies, minimum:copies + 1]
+            ways = np.convolve(ways, term)
+            grouped += copies
+
+        seen = np.asarray(seen)
+        others = self.size - grouped
+        taken = np.arange(len(ways))
+        rest = seen[..., None] - taken  # The cards drawn from outside the groups
+        valid = (rest >= 0) & (rest <= others)
+        other_ways = np.where(valid, _COMB[others, np.clip(rest, 0, others)], 0.0)
+        return (other_ways * ways).sum(axis=-1) / _COMB[self.size, np.clip(seen, 0, self.size)]
+
+    def draw_odds(self, cards: CardGroup, copies: int = 1, turns: Iterable[int] = range(1, 11)) -> np.ndarray:
+        """
+        The probability of having drawn at least copies of a card (or any of a group of cards) by each of the player's turns.
+
+        :param turns: The player's own turn numbers, starting at 1 for the turn the initial hand is drawn.
+        """
+        seen = [cards_seen(turn, self.size) for turn in turns]
+        return self.probability([(cards, copies)], seen)
+
+    def resource_requirements(self, card_id: str) -> List[Tuple[List[str], int]]:
+        """
+        The resource cards a card needs on the battlefield to be paid for, as (group, minimum) pairs.
+
+        :raises ValueError: If the resources of one type provide different amounts, which only monte_carlo handles.
+        """
+        requirements = []
+        for mana_type, amount in self.definitions[card_id].cost.items():
+            if mana_type == MANA_TYPES[0] or not amount:
+                continue
+            sources = [other for other, definition in self.definitions.items()
+                       if definition.card_type == "Resource" and definition.resource_type == mana_type]
+            amounts = {self.definitions[source].amount for source in sources}
+            if len(amounts) > 1:
+                raise ValueError(f"The {mana_type} resources of the deck provide different amounts.")
+            per_card = amounts.pop() if amounts else 0
+            # With no resource of the type the requirement cannot be met, and the probability comes out as 0
+            requirements.append((sources, math.ceil(amount / per_card) if per_card else 1))
+        return requirements
+
+    def castable_odds(self, card_id: str, turns: Iterable[int] = range(1, 11), with_card: bool = True) -> np.ndarray:
+        """
+        The probability that a card can be cast on each of the player's turns.
+
+        A card is castable once the turn's Common mana covers its Common cost
+        and enough resources of each type it needs have been drawn, with one
+        land played per turn. Mana spent on other cards is not accounted for.
+
+        :param with_card: Also require a copy of the card itself to have been drawn.
+        """
+        turns = list(turns)
+        requirements = self.resource_requirements(card_id)
+        common_cost = self.definitions[card_id].cost.get(MANA_TYPES[0], 0)
+        lands_needed = sum(minimum for _, minimum in requirements)
+        if with_card:
+            requirements = requirements + [(card_id, 1)]
+
+        odds = np.zeros(len(turns))
+        affordable = [position for position, turn in enumerate(turns) if common_mana(turn) >= common_cost and lands_needed <= turn]
+        if affordable:
+            odds[affordable] = self.probability(requirements, [cards_seen(turns[position], self.size) for position in affordable])
+        return odds
+
+    def mana_curve(self, turns: Iterable[int] = range(1, 11), with_card: bool = True) -> Dict[str, np.ndarray]:
+        """The castability per turn of every card of the deck, by card id."""
+        turns = list(turns)
+        return {card_id: self.castable_odds(card_id, turns, with_card) for card_id in self.card_ids}
+
+    def land_ids(self) -> List[str]:
+        return [card_id for card_id, definition in self.definitions.items() if definition.card_type == "Resource"]
+
+    def opening_hand(self, min_lands: int = 1, max_lands: int = 4) -> Dict[str, float]:
+        """
+        Summarize the quality of the initial hand.
+
+        :return: The distribution of the number of resources in it, the expected number,
+                 and the probability that it is between min_lands and max_lands.
+        """
+        lands = self._copies_of(self.land_ids())
+        hand = cards_seen(1, self.size)
+        count = np.arange(min(lands, hand) + 1)
+        distribution = _COMB[lands, count] * _COMB[self.size - lands, np.clip(hand - count, 0, None)] / _COMB[self.size, hand]
+        distribution[hand - count > self.size - lands] = 0.0
+        keep = (count >= min_lands) & (count <= max_lands)
+        return {
+            "land_distribution": distribution,
+            "expected_lands": float(lands * hand / self.size) if self.size else 0.0,
+            "keepable": float(distribution[keep].sum()),
+        }
+
+    def sample(self, seen: int, samples: int = 10000, seed: Optional[int] = None) -> np.ndarray:
+        """
+        Sample the first seen cards of many shuffles at once.
+
+        :return: A [sample, card] array of how many copies of each card (in card_ids order) were drawn.
+        """
+        rng = np.random.default_rng(seed)
+        return rng.multivariate_hypergeometric(self.copies, min(seen, self.size), size=samples)
+
+    def monte_carlo(self, condition: Callable[[np.ndarray, "DeckAnalytics"], np.ndarray], turn: int,
+                    samples: int = 10000, seed: Optional[int] = None) -> float:
+        """
+        Estimate the probability of a condition on the cards drawn by one of the player's turns.
+
+        :param condition: Called with the [sample, card] counts from sample() and this object,
+                          returns a boolean array with one entry per sample.
+        :return: The share of samples meeting the condition.
+        """
+        drawn = self.sample(cards_seen(turn, self.size), samples, seed)
+        return float(np.count_nonzero(condition(drawn, self))) / samples
+
+    def column(self, cards: CardGroup) -> np.ndarray:
+        """The card_ids positions of a card or group of cards, for indexing the counts of sample()."""
+        return np.array([self.index[card_id] for card_id in self._group(cards)], np.int64)
+
+# Example usage:
+if __name__ == "__main__":
+    import time
+    from Card import Creature, Resource, Technologies
+
+    fire_elemental = Creature(name="Fire Elemental", attributes={"attack": 6}, cost={"Common": 3}, hp=5)
+    laser_beam = Technologies(name="Laser Beam", attributes={"single_use": True}, cost={"Common": 2, "Physics": 2}, spell_effect={"damage_enemy": 3})
+    physics_lab = Resource(name="Physics Lab", resource_type="Physics", amount=1, cost={"Common": 0})
+    chemistry_lab = Resource(name="Chemistry Lab", resource_type="Chemistry", amount=1, cost={"Common": 0})
+    analytics = DeckAnalytics({"fire_elemental": 20, "laser_beam": 20, "physics_lab": 10, "chemistry_lab": 10})
+
+    started = time.perf_counter()
+    print("Physics Lab by turn:", analytics.draw_odds("physics_lab").round(3))
+    print("Laser Beam castable by turn:", analytics.castable_odds("laser_beam").round(3))
+    print("Opening hand:", analytics.opening_hand())
+    estimate = analytics.monte_carlo(lambda drawn, deck: drawn[:, deck.column("physics_lab")].sum(axis=1) >= 1, turn=3)
+    print(f"Physics Lab by turn 3, sampled: {estimate:.3f}")
+    print(f"Answered in {(time.perf_counter() - started) * 1000:.1f}ms")
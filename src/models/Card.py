@@ -1,215 +1,366 @@
-class Card:
-    def __init__(self, name: str, card_type: str, attributes: dict, cost: dict, upkeep_cost: dict = None, upkeep_ability: callable = None):
+from types import MappingProxyType
+from typing import Dict
+from Events import EventKind, EventSink, NULL_SINK
+from Mana import compile_cost
+from Effects import compile_effect, equipment_effect, opponent_of, technology_effect, trap_effect
+
+# Every card definition that has been created, keyed by card id.
+registry: Dict[str, "CardDefinition"] = {}
+
+def get_definition(card_id: str) -> "CardDefinition":
+    """
+    Look up a registered card definition.
+
+    :param card_id: The id of the card.
+    :return: The shared definition of that card.
+    """
+    return registry[card_id]
+
+def _restore_definition(cls, card_id: str, state: dict) -> "CardDefinition":
+    """Unpickle a definition as the registered one when it exists, so copies of a game keep sharing definitions."""
+    definition = registry.get(card_id)
+    if definition is None:
+        definition = cls.__new__(cls)
+        definition.__dict__.update({key: MappingProxyType(value) if isinstance(value, dict) else value for key, value in state.items()})
+        registry[card_id] = definition
+    return definition
+
+class CardDefinition:
+    def __init__(self, name: str, card_type: str, attributes: dict, cost: dict, upkeep_cost: dict = None, upkeep_ability: callable = None, card_id: str = None):
         """
-        Initialize a card with a name, card type, and attributes.
-        
+        Initialize a card definition with a name, card type, and attributes.
+
+        A definition holds everything that is the same for every copy of a
+        card and is shared by all of them, so it must not be modified once
+        created. The state of one copy in a game lives in a CardInstance.
+
         :param name: The name of the card.
         :param card_type: The type of the card (e.g., "Creature", "Spell").
         :param attributes: A dictionary of card attributes (e.g., {"attack": 5, "defense": 4}).
+        :param card_id: The key of the card in the registry; defaults to the name in snake case.
         """
+        self.card_id = card_id or name.lower().replace(' ', '_').replace('-', '_')
         self.name = name
         self.card_type = card_type
-        self.attributes = attributes
-        self.cost = cost
-        self.tapped = False
-        self.upkeep_cost = upkeep_cost or {}
+        self.attributes = MappingProxyType(dict(attributes))
+        self.cost = MappingProxyType(dict(cost))
+        self.upkeep_cost = MappingProxyType(dict(upkeep_cost or {}))
+        # Costs compiled once into mana vectors, so paying them is a single subtraction
+        self.cost_vector = compile_cost(self.cost)
+        self.upkeep_vector = compile_cost(self.upkeep_cost)
         self.upkeep_ability = upkeep_ability
+        # Whether copies of the card listen for the Upkeep trigger while on the battlefield
+        self.has_upkeep = bool(self.upkeep_cost or upkeep_ability)
         self.single_use = attributes.get('single_use', False)
+        self.hp = 0
+        registry[self.card_id] = self
+
+    def __reduce__(self):
+        # Rendered text is left out; it is cheap to render again
+        state = {key: dict(value) if isinstance(value, MappingProxyType) else value for key, value in self.__dict__.items()
+                 if not key.startswith("_")}
+        return (_restore_definition, (type(self), self.card_id, state))
 
     def __repr__(self):
         """
         Provide a string representation of the card for easier debugging.
-        
+
         :return: A string representation of the card.
         """
         return f"{self.name} ({self.card_type})"
-    
+
     def __str__(self):
         """
         Provide a user-friendly string representation of the card.
-        
+
+        The text is rendered once and kept, as a definition never changes.
+
         :return: A detailed string representation of the card.
         """
+        text = self.__dict__.get("_text")
+        if text is None:
+            text = self._text = self.render()
+        return text
+
+    def render(self) -> str:
+        """Render the text of the card; str() returns it rendered once instead."""
         attributes_str = ', '.join([f"{key}: {value}" for key, value in self.attributes.items()])
         return f"Card: {self.name}\nType: {self.card_type}\nAttributes: {attributes_str}"
-    
+
+    def describe_instance(self, instance: "CardInstance") -> str:
+        """
+        Provide a user-friendly string representation of one copy of the card.
+
+        :param instance: The copy to describe.
+        :return: A detailed string representation of the copy.
+        """
+        return str(self)
+
     def get_cost(self, mana_type: str):
         """
         Get the value of a specific attribute.
-        
+
         :param mana_type: The name of the mana type to retrieve.
         :return: The value of the attribute if it exists, otherwise None.
         """
         return self.attributes.get(mana_type, None)
-    
-    def tap(self):
-        self.tapped = True
 
-    def untap(self):
+    def create_instance(self) -> "CardInstance":
+        """Create a new copy of this card with fresh state."""
+        return CardInstance(self)
+
+class CardInstance:
+    """
+    One physical copy of a card in a game.
+
+    Only the state that changes during a game lives here; everything else is
+    read from the shared definition.
+    """
+    __slots__ = ("definition", "tapped", "hp", "damage", "attachments", "attached_to", "triggered")
+
+    def __init__(self, definition: CardDefinition):
+        self.definition = definition
         self.tapped = False
+        self.hp = definition.hp
+        self.damage = 0
+        self.attachments = ()
+        self.attached_to = None
+        self.triggered = False
 
-class Creature(Card):
-    def __init__(self, name: str, attributes: dict, cost: dict, hp: int, abilities: list = None):
-        super().__init__(name, "Creature", attributes, cost)
-        self.hp = hp
-        self.abilities = abilities if abilities else []
+    @property
+    def card_id(self) -> str:
+        return self.definition.card_id
 
-    def __str__(self):
-        attributes_str = ', '.join([f"{key}: {value}" for key, value in self.attributes.items()])
-        abilities_str = ', '.join(self.abilities)
-        return f"Creature: {self.name}\nHP: {self.hp}\nAttributes: {attributes_str}\nCost: {self.cost}\nAbilities: {abilities_str}"
+    @property
+    def name(self) -> str:
+        return self.definition.name
 
-    def take_damage(self, damage: int):
-        """
-        Apply damage to the creature.
+    @property
+    def card_type(self) -> str:
+        return self.definition.card_type
 
-        :param damage: The amount of damage to apply.
-        """
-        self.hp -= damage
-        if self.hp < 0:
-            self.hp = 0
+    @property
+    def attributes(self):
+        return self.definition.attributes
 
-class Resource(Card):
-    def __init__(self, name: str, resource_type: str, amount: int, cost: dict):
-        attributes = {resource_type: amount}
-        super().__init__(name, "Resource", attributes, cost)
-        self.resource_type = resource_type
-        self.amount = amount
+    @property
+    def cost(self):
+        return self.definition.cost
 
-    def __str__(self):
-        return f"Resource: {self.name}\nType: {self.resource_type}\nAmount: {self.amount}\nCost: {self.cost}"
+    @property
+    def cost_vector(self) -> int:
+        return self.definition.cost_vector
 
-class Trap(Card):
-    def __init__(self, name: str, attributes: dict, cost: dict, trigger_condition: str, effect_name: str):
-        super().__init__(name, "Trap", attributes, cost)
-        self.trigger_condition = trigger_condition
-        self.effect_name = effect_name
-        self.triggered = False
+    @property
+    def upkeep_cost(self):
+        return self.definition.upkeep_cost
+
+    @property
+    def upkeep_ability(self):
+        return self.definition.upkeep_ability
+
+    @property
+    def single_use(self) -> bool:
+        return self.definition.single_use
+
+    @property
+    def attack(self) -> int:
+        """The creature's attack including the bonuses of its attached equipment."""
+        attack = self.definition.attributes.get("attack", 0)
+        for equipment in self.attachments:
+            attack += equipment.definition.damage_increase
+        return attack
+
+    def __getattr__(self, name: str):
+        # Type-specific fields such as resource_type or trigger_condition come from the definition.
+        if name == "definition":
+            raise AttributeError(name)
+        return getattr(self.definition, name)
+
+    def __repr__(self):
+        return repr(self.definition)
 
     def __str__(self):
-        attributes_str = ', '.join([f"{key}: {value}" for key, value in self.attributes.items()])
-        return f"Trap: {self.name}\nAttributes: {attributes_str}\nCost: {self.cost}\nTrigger Condition: {self.trigger_condition}"
+        return self.definition.describe_instance(self)
 
-    def trigger(self, game_state, triggering_player, target):
-        """
-        Trigger the trap's effect.
-        """
-        if not self.triggered:
-            self.triggered = True
-            self.apply_effect(game_state, target)
-            print(f"Trap {self.name} triggered!")
-            # Remove the trap from player's traps list
-            triggering_player.traps.remove(self)
+    def snapshot(self) -> tuple:
+        """Capture the state of this copy as a tuple for restore()."""
+        return (self.tapped, self.hp, self.damage, self.attachments, self.attached_to, self.triggered)
 
-    def apply_effect(self, game_state, target):
-        """
-        Apply the effect based on the effect name.
-        """
-        effects = {
-            "deal_damage": self.deal_damage,
-            "reduce_mana": self.reduce_mana,
-            "apply_debuff": self.apply_debuff,
-            # Add other predefined effects here
-        }
-        effect_method = effects.get(self.effect_name)
-        if effect_method:
-            effect_method(game_state, target)
-        else:
-            print(f"No effect found for {self.effect_name}")
+    def restore(self, state: tuple):
+        """Put this copy back into a state captured by snapshot()."""
+        self.tapped, self.hp, self.damage, self.attachments, self.attached_to, self.triggered = state
 
-    def deal_damage(self, game_state, target):
+    def copy(self) -> "CardInstance":
         """
-        Example effect: Deal damage to a target.
-        """
-        damage = self.attributes.get("damage", 0)
-        target.take_damage(damage)
-        print(f"{target.name} takes {damage} damage from trap {self.name}")
+        Make a new copy with the same state and definition.
 
-    def reduce_mana(self, game_state, target):
-        """
-        Example effect: Reduce target's mana.
+        The attachments of the copy still refer to the original cards; a game
+        being cloned points them at the cloned cards afterwards.
         """
-        mana_reduction = self.attributes.get("mana_reduction", 0)
-        target.mana -= mana_reduction
-        if target.mana < 0:
-            target.mana = 0
-        print(f"{target.name} has {mana_reduction} mana reduced by trap {self.name}")
+        card = CardInstance.__new__(CardInstance)
+        card.definition = self.definition
+        card.tapped, card.hp, card.damage, card.attachments, card.attached_to, card.triggered = self.snapshot()
+        return card
 
-    def apply_debuff(self, game_state, target):
-        """
-        Example effect: Apply a debuff to a target.
+    def tap(self):
+        self.tapped = True
+
+    def untap(self):
+        self.tapped = False
+
+    def take_damage(self, damage: int):
         """
-        debuff = self.attributes.get("debuff", {})
-        for key, value in debuff.items():
-            if hasattr(target, key):
-                setattr(target, key, getattr(target, key) - value)
-                print(f"{target.name} has {key} reduced by {value} from trap {self.name}")
+        Apply damage to the creature.
 
+        :param damage: The amount of damage to apply.
+        """
+        self.damage += damage
+        self.hp -= damage
+        if self.hp < 0:
+            self.hp = 0
 
-class Equipment(Card):
-    def __init__(self, name: str, attributes: dict, cost: dict, effects: dict):
-        super().__init__(name, "Equipment", attributes, cost)
-        self.effects = effects
-        self.attached_to = None
+    def trigger(self, game_state, triggering_player, *targets):
+        """
+        Trigger the trap's effect on every target.
 
-    def __str__(self):
-        attributes_str = ', '.join([f"{key}: {value}" for key, value in self.attributes.items()])
-        effects_str = ', '.join([f"{key}: {value}" for key, value in self.effects.items()])
-        return f"Equipment: {self.name}\nAttributes: {attributes_str}\nCost: {self.cost}\nAttachment Cost: {self.cost}\nEffects: {effects_str}"
+        A trap fires only once, so it then leaves its player's battlefield and stops listening for its trigger condition.
+        """
+        if not self.triggered:
+            self.triggered = True
+            run, opponent = self.definition.effect.run, opponent_of(game_state, triggering_player)
+            for target in targets:
+                run(triggering_player, opponent, target)
+            game_state.events.emit(EventKind.TRAP_TRIGGERED, self.name)
+            triggering_player.leave_battlefield(self)
 
-    def attach_to(self, target_creature):
+    def attach_to(self, target_creature: "CardInstance", events: EventSink = NULL_SINK):
         """
         Attach this equipment to a target creature.
         """
         if target_creature:
             self.attached_to = target_creature
-            target_creature.equipment.append(self)
-            for effect, value in self.effects.items():
-                if effect == "damage":
-                    target_creature.attributes["damage_increase"] += value
-                elif effect == "revival":
-                    target_creature.attributes["Equipmment": "Revives on death, discards into graveyard after."]
-                ## More Elifs to be added in the future.
-            print(f"{self.name} has been attached to {target_creature.name}.")
-    
+            target_creature.attachments += (self,)
+            events.emit(EventKind.EQUIPMENT_ATTACHED, self.name, target_creature.name)
+
     def detach(self):
         """
         Detach this equipment from its target creature.
         """
         if self.attached_to:
-            self.attached_to.equipment.remove(self)
+            self.attached_to.attachments = tuple(card for card in self.attached_to.attachments if card is not self)
             self.attached_to = None
 
     def handle_revival(self, owner):
         """
         Handle the revival effect and move this equipment to the graveyard.
         """
-        if self.attached_to and self.attached_to.hp <= 0:
-            self.attached_to.attributes["hp"] = 1  # Revive the creature with 1 HP
-            self.attached_to.attributes["alive"] = True
-            print(f"{self.attached_to.name} has been revived by {self.name}.")
+        if self.attached_to and self.attached_to.hp <= 0 and self.definition.revival:
+            self.attached_to.hp = 1  # Revive the creature with 1 HP
+            owner.events.emit(EventKind.CREATURE_REVIVED, self.attached_to.name, self.name)
             self.detach()
+            if self in owner.equipment:
+                owner.leave_battlefield(self)
             owner.graveyard.append(self)
-            print(f"{self.name} has been moved to the graveyard.")
+            owner.events.emit(EventKind.CARD_TO_GRAVEYARD, self.name)
 
+class Creature(CardDefinition):
+    def __init__(self, name: str, attributes: dict, cost: dict, hp: int, abilities: list = None, card_id: str = None):
+        super().__init__(name, "Creature", attributes, cost, card_id=card_id)
+        self.hp = hp
+        self.abilities = tuple(abilities) if abilities else ()
 
+    def render(self) -> str:
+        return self.describe(self.hp)
 
-class Technologies(Card):
-    def __init__(self, name: str, attributes: dict, cost: dict, spell_effect: dict):
-        super().__init__(name, "Technologies", attributes, cost)
-        self.spell_effect = spell_effect
+    def describe_instance(self, instance: CardInstance) -> str:
+        return str(self) if instance.hp == self.hp else self.describe(instance.hp)
 
-    def __str__(self):
+    def describe(self, hp: int) -> str:
+        # Only the hp changes between copies, so the text around it is rendered once
+        parts = self.__dict__.get("_parts")
+        if parts is None:
+            attributes_str = ', '.join([f"{key}: {value}" for key, value in self.attributes.items()])
+            abilities_str = ', '.join(self.abilities)
+            parts = self._parts = (f"Creature: {self.name}\nHP: ", f"\nAttributes: {attributes_str}\nCost: {dict(self.cost)}\nAbilities: {abilities_str}")
+        return f"{parts[0]}{hp}{parts[1]}"
+
+class Resource(CardDefinition):
+    def __init__(self, name: str, resource_type: str, amount: int, cost: dict, card_id: str = None):
+        attributes = {resource_type: amount}
+        super().__init__(name, "Resource", attributes, cost, card_id=card_id)
+        self.resource_type = resource_type
+        self.amount = amount
+
+    def render(self) -> str:
+        return f"Resource: {self.name}\nType: {self.resource_type}\nAmount: {self.amount}\nCost: {dict(self.cost)}"
+
+class Trap(CardDefinition):
+    def __init__(self, name: str, attributes: dict, cost: dict, trigger_condition: str, effect_name: str = None, card_id: str = None,
+                 effect: list = None):
+        """
+        :param effect_name: A predefined effect, such as "deal_damage", which takes its parameter from the attributes.
+        :param effect: An effect spec (see Effects.py), used instead of effect_name.
+        """
+        super().__init__(name, "Trap", attributes, cost, card_id=card_id)
+        self.trigger_condition = trigger_condition
+        self.effect_name = effect_name
+        # Compiled once here, so a trigger is a single call
+        self.effect = compile_effect(name, effect) if effect is not None else trap_effect(name, effect_name, self.attributes)
+
+    def render(self) -> str:
+        attributes_str = ', '.join([f"{key}: {value}" for key, value in self.attributes.items()])
+        return f"Trap: {self.name}\nAttributes: {attributes_str}\nCost: {dict(self.cost)}\nTrigger Condition: {self.trigger_condition}"
+
+    def apply_effect(self, game_state, target, owner=None):
+        """
+        Apply the trap's effect to a target.
+
+        :param owner: The player who set the trap; by default the opponent of the current player, whose turn springs it.
+        """
+        owner = owner or game_state.opponent
+        self.effect.run(owner, opponent_of(game_state, owner), target)
+
+class Equipment(CardDefinition):
+    def __init__(self, name: str, attributes: dict, cost: dict, effects: dict, card_id: str = None, effect: list = None):
+        """
+        :param effects: What the equipment gives the creature it is attached to, such as {"damage_increase": 3},
+                        and its owner when used, such as {"heal": 5}.
+        :param effect: An effect spec (see Effects.py) for using the equipment, instead of the keys of effects.
+        """
+        super().__init__(name, "Equipment", attributes, cost, card_id=card_id)
+        self.effects = MappingProxyType(dict(effects))
+        # Read on every attack and creature death, so looked up once here
+        self.damage_increase = self.effects.get("damage_increase", 0)
+        self.revival = bool(self.effects.get("revival"))
+        self.effect = compile_effect(name, effect) if effect is not None else equipment_effect(name, self.effects)
+
+    def render(self) -> str:
+        attributes_str = ', '.join([f"{key}: {value}" for key, value in self.attributes.items()])
+        effects_str = ', '.join([f"{key}: {value}" for key, value in self.effects.items()])
+        return f"Equipment: {self.name}\nAttributes: {attributes_str}\nCost: {dict(self.cost)}\nAttachment Cost: {dict(self.cost)}\nEffects: {effects_str}"
+
+
+class Technologies(CardDefinition):
+    def __init__(self, name: str, attributes: dict, cost: dict, spell_effect: dict = None, card_id: str = None, effect: list = None):
+        """
+        :param spell_effect: The predefined effects of the technology and their amounts, such as {"damage_enemy": 3}.
+        :param effect: An effect spec (see Effects.py), used instead of spell_effect.
+        """
+        super().__init__(name, "Technologies", attributes, cost, card_id=card_id)
+        self.spell_effect = MappingProxyType(dict(spell_effect or {}))
+        self.effect = compile_effect(name, effect) if effect is not None else technology_effect(name, self.spell_effect)
+
+    def render(self) -> str:
         attributes_str = ', '.join([f"{key}: {value}" for key, value in self.attributes.items()])
         effects_str = ', '.join([f"{key}: {value}" for key, value in self.spell_effect.items()])
-        return f"Technologies: {self.name}\nAttributes: {attributes_str}\nCost: {self.cost}\nEffect: {effects_str}"
-
-    def activate(self, game_state):
-        """Activate the technology's effect."""
-        for effect, value in self.spell_effect.items():
-            if effect == "damage_enemy":
-                game_state.opponent.hp -= value
-                print(f"{game_state.opponent.name} takes {value} damage.")
-            elif effect == "reduce_damage":
-                game_state.current_player.damage_reduction += value
-                print(f"{game_state.current_player.name} takes -{value} damage from all sources.")
+        return f"Technologies: {self.name}\nAttributes: {attributes_str}\nCost: {dict(self.cost)}\nEffect: {effects_str}"
+
+    def activate(self, game_state, player=None):
+        """
+        Activate the technology's effect.
+
+        :param player: The player activating it; by default the current player.
+        """
+        player = player or game_state.current_player
+        self.effect.run(player, opponent_of(game_state, player), None)
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import pickle
+import tomllib
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from Card import CardDefinition, Creature, Equipment, Resource, Technologies, Trap
+from Effects import EffectError, compile_effect
+
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "cards.json")
+# Bumped whenever the compiled form changes, so older caches are compiled again
+CACHE_VERSION = 1
+DEFAULT_RARITY = "common"
+
+# The class of every card type and the fields it takes besides name, cost, attributes and card_id
+CARD_TYPES = {
+    "Creature": (Creature, ("hp", "abilities")),
+    "Resource": (Resource, ("resource_type", "amount")),
+    "Trap": (Trap, ("trigger_condition", "effect_name", "effect")),
+    "Equipment": (Equipment, ("effects", "effect")),
+    "Technologies": (Technologies, ("spell_effect", "effect")),
+}
+_REQUIRED = {
+    "Creature": ("hp",),
+    "Resource": ("resource_type", "amount"),
+    "Trap": ("trigger_condition",),
+    "Equipment": (),
+    "Technologies": (),
+}
+_COMMON_FIELDS = ("type", "name", "card_id", "cost", "attributes", "rarity")
+
+class CatalogError(ValueError):
+    """Raised when a catalog file cannot be read into card definitions."""
+
+class Catalog(NamedTuple):
+    definitions: Dict[str, CardDefinition]
+    rarities: Dict[str, str]
+
+def _parse(path: str, data: bytes) -> list:
+    try:
+        if path.endswith(".toml"):
+            document = tomllib.loads(data.decode("utf-8"))
+        else:
+            document = json.loads(data) if data.strip() else {"cards": []}
+    except (ValueError, UnicodeDecodeError) as error:
+        raise CatalogError(f"{path} is not a valid catalog: {error}") from None
+    cards = document.get("cards") if isinstance(document, dict) else None
+    if not isinstance(cards, list):
+        raise CatalogError(f"{path} must hold a list of cards under 'cards'.")
+    return cards
+
+def compile_card(spec: dict) -> Tuple[str, dict, str]:
+    """
+    Check one card of a catalog file and compile its effect.
+
+    :return: The card type, the arguments of its class with the effect compiled, and its rarity.
+    :raises CatalogError: If the card is incomplete or its effect does not compile.
+    """
+    name = spec.get("name")
+    card_type = spec.get("type")
+    if not isinstance(name, str) or card_type not in CARD_TYPES:
+        raise CatalogError(f"Every card needs a name and a type out of {', '.join(CARD_TYPES)}: {spec!r}.")
+    _, fields = CARD_TYPES[card_type]
+    unknown = set(spec) - set(_COMMON_FIELDS) - set(fields)
+    if unknown:
+        raise CatalogError(f"{name}: unknown fields {', '.join(sorted(unknown))} for a {card_type}.")
+    missing = [field for field in _REQUIRED[card_type] if field not in spec]
+    if missing:
+        raise CatalogError(f"{name}: missing {', '.join(missing)}.")
+
+    arguments = {"name": name, "cost": dict(spec.get("cost", {})), "card_id": spec.get("card_id")}
+    if card_type != "Resource":
+        arguments["attributes"] = dict(spec.get("attributes", {}))
+    if card_type == "Equipment":
+        arguments["effects"] = {}
+    for field in fields:
+        if field in spec:
+            arguments[field] = spec[field]
+    if "effect" in arguments:
+        try:
+            arguments["effect"] = compile_effect(name, arguments["effect"])
+        except EffectError as error:
+            raise CatalogError(str(error)) from None
+    return card_type, arguments, spec.get("rarity", DEFAULT_RARITY)
+
+def compile_catalog(path: str, data: bytes) -> List[Tuple[str, dict, str]]:
+    """Parse a catalog file and compile every card in it."""
+    compiled = [compile_card(spec) for spec in _parse(path, data)]
+    names = [arguments["name"] for _, arguments, _ in compiled]
+    if len(set(names)) != len(names):
+        raise CatalogError(f"{path} defines a card twice.")
+    return compiled
+
+def _cache_path(path: str, cache_dir: Optional[str]) -> str:
+    if cache_dir is None:
+        return path + ".cache"
+    return os.path.join(cache_dir, os.path.basename(path) + ".cache")
+
+def _read_cache(cache_path: str, digest: str) -> Optional[list]:
+    try:
+        with open(cache_path, "rb") as file:
+            cached = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(cached, dict) or cached.get("version") != CACHE_VERSION or cached.get("digest") != digest:
+        return None
+    return cached["cards"]
+
+def _write_cache(cache_path: str, digest: str, compiled: list):
+    temporary = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as file:
+            pickle.dump({"version": CACHE_VERSION, "digest": digest, "cards": compiled}, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, cache_path)
+    except OSError:
+        # A read-only install still loads, it just compiles at every start
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+def load_catalog(path: str = DEFAULT_CATALOG, cache: bool = True, cache_dir: Optional[str] = None) -> Catalog:
+    """
+    Load the card definitions of a JSON or TOML catalog file and register them.
+
+    Every card is an object with a type, a name, a cost, attributes, a rarity
+    and the fields of its type, as in the constructors of Card.py. Effects are
+    given by the predefined keys of those constructors (spell_effect,
+    effect_name, effects) or as an effect spec, a list of operations:
+
+        {"type": "Technologies", "name": "Field Medic", "cost": {"Common": 2},
+         "effect": [{"op": "heal", "amount": 4}, {"op": "reduce_damage", "amount": 1}]}
+
+    The compiled catalog is cached next to the file (or in cache_dir), keyed by
+    a digest of the file's contents, so later starts skip parsing and compiling
+    until the file changes. The cache is a pickle and must only be written by this loader.
+
+    :param cache: Read and write the compiled cache.
+    :return: The definitions by card id, and the rarity of each card for import_catalog.
+    :raises CatalogError: If the file is not a valid catalog.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    digest = hashlib.sha256(data).hexdigest()
+    cache_path = _cache_path(path, cache_dir)
+    compiled = _read_cache(cache_path, digest) if cache else None
+    if compiled is None:
+        compiled = compile_catalog(path, data)
+        if cache:
+            _write_cache(cache_path, digest, compiled)
+
+    definitions, rarities = {}, {}
+    for card_type, arguments, rarity in compiled:
+        try:
+            definition = CARD_TYPES[card_type][0](**arguments)
+        except (TypeError, ValueError) as error:
+            raise CatalogError(f"{arguments['name']}: {error}") from None
+        if definition.card_id in definitions:
+            raise CatalogError(f"{path} defines the card id '{definition.card_id}' twice.")
+        definitions[definition.card_id] = definition
+        rarities[definition.card_id] = rarity
+    return Catalog(definitions, rarities)
+
+if __name__ == "__main__":
+    # Example usage:
+    import time
+    started = time.perf_counter()
+    catalog = load_catalog()
+    print(f"Loaded {len(catalog.definitions)} cards in {(time.perf_counter() - started) * 1000:.2f} ms")
+    for card_id, definition in catalog.definitions.items():
+        print(f"{card_id} ({catalog.rarities[card_id]}): {getattr(definition, 'effect', None)!r}")
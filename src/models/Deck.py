@@ -1,58 +1,167 @@
 import random
-from Card import Card 
-from typing import List, Optional
+from collections import deque
+from Card import CardDefinition, CardInstance, Creature, Technologies
+from Events import EventKind, EventSink, NULL_SINK
+from Rendering import zone_text
+from typing import Deque, Dict, List, Optional, Set
 
 class Deck:
     def __init__(self):
-        self.cards: List[Card] = []
+        # The draw pile, bottom card first, so the top card is popped in O(1).
+        self._pile: Deque[CardInstance] = deque()
+        # The copies of each card still in the pile, in pile order, by card id.
+        self._by_id: Dict[str, Deque[CardInstance]] = {}
+        self._ids_by_name: Dict[str, str] = {}
+        # Cards removed from the middle of the pile; they are skipped when they reach the top.
+        self._removed: Set[CardInstance] = set()
+        self._size = 0
+        self.events: EventSink = NULL_SINK
 
-    def add_card(self, card: Card):
-        """Add a card to the deck, ensuring the deck does not exceed 60 cards."""
-        if len(self.cards) < 60:
-            self.cards.append(card)
+    @property
+    def cards(self) -> List[CardInstance]:
+        """The cards in the deck, top card first."""
+        removed = self._removed
+        return [card for card in reversed(self._pile) if card not in removed]
+
+    def add_card(self, card):
+        """
+        Add a card to the bottom of the deck, ensuring the deck does not exceed 60 cards.
+
+        :param card: A CardInstance, or a CardDefinition to add a new copy of.
+        """
+        if isinstance(card, CardDefinition):
+            card = card.create_instance()
+        if self._size < 60:
+            self._pile.appendleft(card)
+            copies = self._by_id.get(card.card_id)
+            if copies is None:
+                copies = self._by_id[card.card_id] = deque()
+                self._ids_by_name[card.name] = card.card_id
+            copies.appendleft(card)
+            self._size += 1
             # print(f"Added {card} to the deck.")
         else:
-            print("Cannot add more cards. The deck is already at its maximum capacity of 60 cards.")
+            self.events.emit(EventKind.DECK_FULL)
+
+    def draw(self) -> Optional[CardInstance]:
+        """
+        Take the top card of the deck.
 
-    def remove_card(self, card_name: str) -> Optional[Card]:
-        """Remove a card from the deck by name, ensuring the deck is not empty."""
-        if not self.cards:
-            print("The deck is empty. No cards to remove.")
+        :return: The top card, or None if the deck is empty.
+        """
+        if not self._size:
             return None
-        
-        for card in self.cards:
-            if card.name == card_name:
-                self.cards.remove(card)
-                # print(f"Removed {card} from the deck.")
-                return card
-        
-        print(f"Card with name '{card_name}' not found in the deck.")
-        return None
-    
-    def shuffle(self):
-        """Shuffle the deck."""
-        random.shuffle(self.cards)
-        print("Deck shuffled.")
+        pile, removed = self._pile, self._removed
+        card = pile.pop()
+        while removed and card in removed:
+            removed.discard(card)
+            card = pile.pop()
+        self._by_id[card.card_id].pop()
+        self._size -= 1
+        return card
+
+    def draw_many(self, amount: int) -> List[CardInstance]:
+        """
+        Take up to amount cards from the top of the deck.
+
+        :return: The cards drawn, top card first.
+        """
+        draw = self.draw
+        return [draw() for _ in range(min(amount, self._size))]
+
+    def remove_card(self, card_name: str) -> Optional[CardInstance]:
+        """Remove the topmost copy of a card from the deck by name or card id, ensuring the deck is not empty."""
+        if not self._size:
+            self.events.emit(EventKind.DECK_EMPTY)
+            return None
+
+        copies = self._by_id.get(self._ids_by_name.get(card_name, card_name))
+        if not copies:
+            self.events.emit(EventKind.CARD_NOT_IN_DECK, card_name)
+            return None
+
+        card = copies.pop()
+        self._size -= 1
+        if card is self._pile[-1]:
+            self._pile.pop()
+        else:
+            self._removed.add(card)
+            if len(self._removed) > self._size:
+                self._compact()
+        # print(f"Removed {card} from the deck.")
+        return card
+
+    def _compact(self):
+        """Drop removed cards from the pile once they outnumber the cards left."""
+        removed = self._removed
+        self._pile = deque(card for card in self._pile if card not in removed)
+        removed.clear()
+
+    def _rebuild(self, cards_bottom_first: List[CardInstance]):
+        """Replace the contents of the deck, rebuilding the indexes."""
+        self._pile = deque(cards_bottom_first)
+        self._removed = set()
+        self._by_id = {}
+        for card in cards_bottom_first:
+            copies = self._by_id.get(card.card_id)
+            if copies is None:
+                copies = self._by_id[card.card_id] = deque()
+                self._ids_by_name[card.name] = card.card_id
+            copies.append(card)
+        self._size = len(cards_bottom_first)
+
+    def snapshot(self) -> tuple:
+        """Capture the cards in the deck, bottom card first, for restore()."""
+        if not self._removed:
+            return tuple(self._pile)
+        removed = self._removed
+        return tuple(card for card in self._pile if card not in removed)
+
+    def restore(self, cards_bottom_first: tuple):
+        """Put the deck back into a state captured by snapshot()."""
+        self._rebuild(cards_bottom_first)
+
+    def clone(self, memo: Dict[CardInstance, CardInstance]) -> "Deck":
+        """
+        Copy the deck, replacing every card by its copy in memo.
+
+        :param memo: The copies of a game's cards, keyed by the original card.
+        """
+        deck = Deck.__new__(Deck)
+        deck._ids_by_name = dict(self._ids_by_name)
+        deck._rebuild([memo[card] for card in self.snapshot()])
+        deck.events = self.events
+        return deck
+
+    def shuffle(self, rng: Optional[random.Random] = None):
+        """
+        Shuffle the deck.
+
+        :param rng: The random generator to shuffle with, so seeded games are reproducible.
+        """
+        removed = self._removed
+        cards = [card for card in self._pile if card not in removed]
+        (rng or random).shuffle(cards)
+        self._rebuild(cards)
+        self.events.emit(EventKind.DECK_SHUFFLED)
 
     def view_deck(self):
         """View all cards in the deck."""
-        if self.cards:
-            print("Current deck:")
-            for card in self.cards:
-                print(f" - {card}")
-        else:
-            print("The deck is empty.")
+        print(zone_text("Current deck:", self.cards, "The deck is empty."))
 
     def count(self) -> int:
         """Get the number of cards in the deck."""
-        return len(self.cards)
+        return self._size
+
+    def __len__(self) -> int:
+        return self._size
 
 # Example usage:
 if __name__ == "__main__":
     # Create some example cards
-    card1 = Card(name="Fire Elemental", card_type="Creature", attributes={"attack": 5, "defense": 4})
-    card2 = Card(name="Healing Potion", card_type="Spell", attributes={"heal": 10})
-    card3 = Card(name="Lightning Bolt", card_type="Spell", attributes={"damage": 7})
+    card1 = Creature(name="Fire Elemental", attributes={"attack": 5, "defense": 4}, cost={"Common": 3}, hp=5)
+    card2 = Technologies(name="Healing Potion", attributes={"single_use": True}, cost={"Common": 1}, spell_effect={"heal": 10})
+    card3 = Technologies(name="Lightning Bolt", attributes={"single_use": True}, cost={"Common": 2}, spell_effect={"damage_enemy": 7})
 
     # Create a deck and add cards to it
     deck = Deck()
@@ -0,0 +1,197 @@
+from collections.abc import Mapping
+from typing import Callable, Dict, Optional, Tuple
+from Events import EventKind
+
+# A compiled step of an effect: step(player, opponent, target), where player
+# controls the card, opponent is the other player (None outside a game) and
+# target is what the effect was aimed at (None for effects without one).
+Step = Callable[[object, object, object], None]
+
+class EffectError(ValueError):
+    """Raised when an effect spec names an unknown operation or gives it bad parameters."""
+
+# Builders of every operation, by name: builder(source, **params) returns the step
+OPERATIONS: Dict[str, Callable[..., Step]] = {}
+
+def operation(name: str):
+    """Register a builder as the operation name, usable in effect specs as {"op": name, ...}."""
+    def register(builder):
+        OPERATIONS[name] = builder
+        return builder
+    return register
+
+@operation("damage_opponent")
+def damage_opponent(source: str, amount: int) -> Step:
+    def step(player, opponent, target):
+        opponent.hp -= amount
+        player.events.emit(EventKind.TECHNOLOGY_DAMAGE, opponent.name, amount)
+    return step
+
+@operation("reduce_damage")
+def reduce_damage(source: str, amount: int) -> Step:
+    def step(player, opponent, target):
+        player.damage_reduction += amount
+        player.events.emit(EventKind.DAMAGE_REDUCTION, player.name, amount)
+    return step
+
+@operation("heal")
+def heal(source: str, amount: int) -> Step:
+    def step(player, opponent, target):
+        player.hp += amount
+        player.events.emit(EventKind.PLAYER_HEALED, player.name, amount, player.hp)
+    return step
+
+@operation("damage_target")
+def damage_target(source: str, amount: int) -> Step:
+    def step(player, opponent, target):
+        target.take_damage(amount)
+        player.events.emit(EventKind.TRAP_DAMAGE, target.name, amount, source)
+    return step
+
+@operation("reduce_mana")
+def reduce_mana(source: str, amount: int) -> Step:
+    def step(player, opponent, target):
+        target.mana = max(target.mana - amount, 0)
+        player.events.emit(EventKind.TRAP_MANA_REDUCED, target.name, amount, source)
+    return step
+
+@operation("debuff")
+def debuff(source: str, stats: Tuple[Tuple[str, int], ...]) -> Step:
+    def step(player, opponent, target):
+        for key, value in stats:
+            if hasattr(target, key):
+                setattr(target, key, getattr(target, key) - value)
+                player.events.emit(EventKind.TRAP_DEBUFF, target.name, key, value, source)
+    return step
+
+@operation("unknown")
+def unknown(source: str, name: str) -> Step:
+    # Keeps cards naming an effect that does not exist playable; they only report it
+    def step(player, opponent, target):
+        player.events.emit(EventKind.UNKNOWN_EFFECT, name)
+    return step
+
+def _nothing(player, opponent, target):
+    pass
+
+def _freeze(value):
+    """Make a parameter hashable and read-only, as it is shared by every copy of a card."""
+    if isinstance(value, Mapping):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+class Effect:
+    """
+    What a card does, compiled once from its spec.
+
+    The spec is a list of operations such as {"op": "damage_opponent", "amount": 3},
+    which is checked and turned into an opcode list, a tuple of (name, params)
+    pairs. The opcodes are then linked into run, a single function that
+    resolving the effect calls directly, with no lookup by name or string
+    comparison left at play time. An Effect pickles as its opcode list, so a
+    compiled catalog can be cached and linked again without parsing its specs.
+    """
+    __slots__ = ("source", "ops", "run")
+
+    def __init__(self, source: str, ops: Tuple[Tuple[str, tuple], ...] = ()):
+        """
+        :param source: The name of the card, used in the effect's events.
+        :param ops: The opcode list, made by compile_effect.
+        """
+        self.source = source
+        self.ops = ops
+        self.run: Step = self._link()
+
+    def _link(self) -> Step:
+        steps = tuple(OPERATIONS[name](self.source, **dict(params)) for name, params in self.ops)
+        if not steps:
+            return _nothing
+        if len(steps) == 1:
+            return steps[0]
+
+        def run(player, opponent, target):
+            for step in steps:
+                step(player, opponent, target)
+        return run
+
+    def __bool__(self) -> bool:
+        return bool(self.ops)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Effect) and self.ops == other.ops
+
+    def __hash__(self) -> int:
+        return hash(self.ops)
+
+    def __reduce__(self):
+        return (Effect, (self.source, self.ops))
+
+    def __repr__(self):
+        return f"Effect({self.source!r}, {self.ops!r})"
+
+def compile_effect(source: str, spec) -> Effect:
+    """
+    Compile an effect spec.
+
+    :param source: The name of the card.
+    :param spec: A list of operations such as [{"op": "heal", "amount": 5}], or an Effect, which is returned as it is.
+    :raises EffectError: If an operation is unknown or its parameters do not fit it.
+    """
+    if isinstance(spec, Effect):
+        return spec
+    ops = []
+    for entry in spec or ():
+        if not isinstance(entry, Mapping) or "op" not in entry:
+            raise EffectError(f"{source}: every operation of an effect needs an 'op', not {entry!r}.")
+        params = {key: value for key, value in entry.items() if key != "op"}
+        builder = OPERATIONS.get(entry["op"])
+        if builder is None:
+            raise EffectError(f"{source}: unknown operation '{entry['op']}'.")
+        amount = params.get("amount", 0)
+        if not isinstance(amount, int) or isinstance(amount, bool):
+            raise EffectError(f"{source}: the amount of '{entry['op']}' must be a whole number, not {amount!r}.")
+        frozen = tuple(sorted((key, _freeze(value)) for key, value in params.items()))
+        try:
+            # Built once here only to check the parameters
+            builder(source, **dict(frozen))
+        except TypeError as error:
+            raise EffectError(f"{source}: bad parameters for '{entry['op']}': {error}") from None
+        ops.append((entry["op"], frozen))
+    return Effect(source, tuple(ops))
+
+# The keys of Technologies.spell_effect that are operations; the others, such as turn_duration, only qualify them
+TECHNOLOGY_OPERATIONS = {"damage_enemy": "damage_opponent", "reduce_damage": "reduce_damage"}
+# Trap.effect_name: the operation and the attribute holding its parameter
+TRAP_OPERATIONS = {
+    "deal_damage": ("damage_target", "amount", "damage", 0),
+    "reduce_mana": ("reduce_mana", "amount", "mana_reduction", 0),
+    "apply_debuff": ("debuff", "stats", "debuff", {}),
+}
+# The keys of Equipment.effects applied when it is used on its owner; damage_increase and revival apply while attached
+EQUIPMENT_OPERATIONS = {"heal": "heal"}
+
+def _keyed_spec(effects: Mapping, operations: Mapping[str, str]) -> list:
+    return [{"op": operations[key], "amount": value} for key, value in effects.items() if key in operations]
+
+def technology_effect(source: str, spell_effect: Mapping) -> Effect:
+    """Compile the spell_effect mapping of a technology, such as {"damage_enemy": 3}."""
+    return compile_effect(source, _keyed_spec(spell_effect, TECHNOLOGY_OPERATIONS))
+
+def equipment_effect(source: str, effects: Mapping) -> Effect:
+    """Compile what an equipment does when used on its owner, from its effects mapping."""
+    return compile_effect(source, _keyed_spec(effects, EQUIPMENT_OPERATIONS))
+
+def trap_effect(source: str, effect_name: Optional[str], attributes: Mapping) -> Effect:
+    """Compile a trap's named effect, taking its parameter from the trap's attributes."""
+    if effect_name not in TRAP_OPERATIONS:
+        return compile_effect(source, [{"op": "unknown", "name": effect_name}])
+    name, parameter, attribute, default = TRAP_OPERATIONS[effect_name]
+    return compile_effect(source, [{"op": name, parameter: attributes.get(attribute, default)}])
+
+def opponent_of(game_state, player):
+    """The other player of a game, or None without one."""
+    if game_state is None:
+        return None
+    return game_state.player2 if player is game_state.player1 else game_state.player1
@@ -0,0 +1,265 @@
+from collections import deque
+from enum import IntEnum
+from typing import Callable, List, NamedTuple, Optional
+from Mana import format_mana
+
+class EventKind(IntEnum):
+    """Every kind of event the game models can emit."""
+    FIRST_PLAYER = 1
+    PHASE_CHANGED = 2
+    TURN_STARTED = 3
+    TURN_PASSED = 4
+    MAIN_PHASE_STARTED = 5
+    ACTIONS_OPEN = 6
+    MAIN_PHASE_SKIPPED = 7
+    INVALID_ACTION = 8
+    COMBAT_STARTED = 9
+    ATTACKERS_DECLARED = 10
+    CREATURE_ATTACKS = 11
+    ATTACKER_MISSING = 12
+    PLAYER_ATTACKED = 13
+    END_STEP = 14
+    CLEANUP_STEP = 15
+    EXCESS_CARDS = 16
+    DAMAGE_REMOVED = 17
+    END_TURN_EFFECTS_CLEARED = 18
+    STATE_BASED_CHECK = 19
+    GAME_WON = 20
+    UPKEEP_UNPAID = 21
+
+    DECK_FULL = 30
+    DECK_EMPTY = 31
+    CARD_NOT_IN_DECK = 32
+    DECK_SHUFFLED = 33
+
+    CARD_DRAWN = 40
+    DRAW_FROM_EMPTY_DECK = 41
+    CARD_PLACED = 42
+    CARD_NOT_IN_HAND = 43
+    INITIAL_HAND_DRAWN = 44
+    CARD_DISCARDED = 45
+    INVALID_DISCARD = 46
+
+    PLAYER_DAMAGED = 50
+    PLAYER_HEALED = 51
+    LAND_ALREADY_PLAYED = 52
+    MUST_ATTACH = 53
+    CARD_ENTERED_BATTLEFIELD = 54
+    COST_UNPAID = 55
+    EQUIPMENT_NOT_IN_HAND = 56
+    TARGET_NOT_ON_BATTLEFIELD = 57
+    EQUIPMENT_USED = 58
+    CREATURE_DESTROYED = 59
+    TECHNOLOGY_NOT_IN_HAND = 60
+    TECHNOLOGY_SPENT = 61
+    EQUIPMENT_TO_GRAVEYARD = 63
+    MANA_INCREASED = 64
+    INVALID_COST = 65
+    COMMON_MANA_USED = 66
+    COMMON_MANA_SHORT = 67
+    RESOURCE_MANA_SHORT = 68
+    RESOURCE_MANA_USED = 69
+    RESOURCE_UNTAPPED = 70
+    RESOURCE_ALREADY_UNTAPPED = 71
+    RESOURCE_UNKNOWN = 72
+
+    TRAP_TRIGGERED = 80
+    UNKNOWN_EFFECT = 81
+    TRAP_DAMAGE = 82
+    TRAP_MANA_REDUCED = 83
+    TRAP_DEBUFF = 84
+    EQUIPMENT_ATTACHED = 85
+    CREATURE_REVIVED = 86
+    CARD_TO_GRAVEYARD = 87
+    TECHNOLOGY_DAMAGE = 88
+    DAMAGE_REDUCTION = 89
+
+TEMPLATES = {
+    EventKind.FIRST_PLAYER: "{0} will go first.",
+    EventKind.PHASE_CHANGED: "Transitioned to {0} phase.",
+    EventKind.TURN_STARTED: "Starting {0}'s turn.",
+    EventKind.TURN_PASSED: "It is now {0}'s turn.",
+    EventKind.MAIN_PHASE_STARTED: "Entering Main Phase {0}.",
+    EventKind.ACTIONS_OPEN: "{0} can perform actions now.",
+    EventKind.MAIN_PHASE_SKIPPED: "{0} skips their main phase.",
+    EventKind.INVALID_ACTION: "Invalid action. Please try again.",
+    EventKind.COMBAT_STARTED: "Entering Combat Phase.",
+    EventKind.ATTACKERS_DECLARED: "{0} is declaring attackers.",
+    EventKind.CREATURE_ATTACKS: "{0} is attacking with {1} attack.",
+    EventKind.ATTACKER_MISSING: "{0} is not on the battlefield and cannot attack.",
+    EventKind.PLAYER_ATTACKED: "{0} took {1} damage.",
+    EventKind.END_STEP: "End Step: resolving end-of-turn effects.",
+    EventKind.CLEANUP_STEP: "Cleanup Step: discarding excess cards and removing damage.",
+    EventKind.EXCESS_CARDS: "{0} has {1} excess cards.",
+    EventKind.DAMAGE_REMOVED: "Removed damage from {0}.",
+    EventKind.END_TURN_EFFECTS_CLEARED: "Cleared end-of-turn effects from {0}.",
+    EventKind.STATE_BASED_CHECK: "Checking for state-based actions and triggered abilities.",
+    EventKind.GAME_WON: "{0} wins the game!",
+    EventKind.UPKEEP_UNPAID: "{0} cannot pay the upkeep cost for {1}. Taking consequences.",
+
+    EventKind.DECK_FULL: "Cannot add more cards. The deck is already at its maximum capacity of 60 cards.",
+    EventKind.DECK_EMPTY: "The deck is empty. No cards to remove.",
+    EventKind.CARD_NOT_IN_DECK: "Card with name '{0}' not found in the deck.",
+    EventKind.DECK_SHUFFLED: "Deck shuffled.",
+
+    EventKind.CARD_DRAWN: "Drew {0} from the deck and added it to the hand.",
+    EventKind.DRAW_FROM_EMPTY_DECK: "Deck is empty.",
+    EventKind.CARD_PLACED: "Placed {0} from the hand.",
+    EventKind.CARD_NOT_IN_HAND: "Card with name '{0}' not found in the hand.",
+    EventKind.INITIAL_HAND_DRAWN: "Initial hand drawn.",
+    EventKind.CARD_DISCARDED: "Discarded {0} from the hand.",
+    EventKind.INVALID_DISCARD: "Error: chosen card is not in the hand.",
+
+    EventKind.PLAYER_DAMAGED: "{0} takes {1} damage and is now at {2} HP.",
+    EventKind.PLAYER_HEALED: "{0} heals {1} and is now at {2} HP.",
+    EventKind.LAND_ALREADY_PLAYED: "{0} cannot play another land this turn.",
+    EventKind.MUST_ATTACH: "{0} cannot play {1} directly. It must be attached to a creature.",
+    EventKind.CARD_ENTERED_BATTLEFIELD: "{0} placed {1} onto the battlefield.",
+    EventKind.COST_UNPAID: "{0} cannot pay the cost for {1}.",
+    EventKind.EQUIPMENT_NOT_IN_HAND: "{0} could not find {1} in hand to attach or it is not an Equipment card.",
+    EventKind.TARGET_NOT_ON_BATTLEFIELD: "{0} is not on the battlefield.",
+    EventKind.EQUIPMENT_USED: "{0} used on {1}, applying effects {2}. Moved to graveyard.",
+    EventKind.CREATURE_DESTROYED: "{0} has 0 or less HP and is moved to the graveyard.",
+    EventKind.TECHNOLOGY_NOT_IN_HAND: "{0} could not find {1} in hand to activate or it is not a Technology card.",
+    EventKind.TECHNOLOGY_SPENT: "{0} activated and moved to graveyard.",
+    EventKind.EQUIPMENT_TO_GRAVEYARD: "{0} attached to {1} has been moved to the graveyard.",
+    EventKind.MANA_INCREASED: "{0} now has {1} max mana and {2} current mana.",
+    EventKind.INVALID_COST: "Invalid cost format. Cost must be a dictionary.",
+    EventKind.COMMON_MANA_USED: "{0} used {1} common mana, {2} remaining.",
+    EventKind.COMMON_MANA_SHORT: "{0} does not have enough common mana. {1} available, {2} needed.",
+    EventKind.RESOURCE_MANA_SHORT: "{0} does not have enough {1} mana. {2} available, {3} needed.",
+    EventKind.RESOURCE_MANA_USED: "{0} used resource mana: {1}.",
+    EventKind.RESOURCE_UNTAPPED: "{0} untapped {1}, {2} available.",
+    EventKind.RESOURCE_ALREADY_UNTAPPED: "{0} already has {1} untapped. No change needed.",
+    EventKind.RESOURCE_UNKNOWN: "{0} does not have {1} to untap.",
+
+    EventKind.TRAP_TRIGGERED: "Trap {0} triggered!",
+    EventKind.UNKNOWN_EFFECT: "No effect found for {0}",
+    EventKind.TRAP_DAMAGE: "{0} takes {1} damage from trap {2}",
+    EventKind.TRAP_MANA_REDUCED: "{0} has {1} mana reduced by trap {2}",
+    EventKind.TRAP_DEBUFF: "{0} has {1} reduced by {2} from trap {3}",
+    EventKind.EQUIPMENT_ATTACHED: "{0} has been attached to {1}.",
+    EventKind.CREATURE_REVIVED: "{0} has been revived by {1}.",
+    EventKind.CARD_TO_GRAVEYARD: "{0} has been moved to the graveyard.",
+    EventKind.TECHNOLOGY_DAMAGE: "{0} takes {1} damage.",
+    EventKind.DAMAGE_REDUCTION: "{0} takes -{1} damage from all sources.",
+}
+
+# Arguments that are packed mana vectors and are rendered as dictionaries
+MANA_ARGUMENTS = {
+    EventKind.RESOURCE_MANA_USED: 1,
+}
+
+def format_event(kind: EventKind, args: tuple) -> str:
+    """Render an event kind and its arguments as a message."""
+    index = MANA_ARGUMENTS.get(kind)
+    if index is not None:
+        args = args[:index] + (format_mana(args[index]),) + args[index + 1:]
+    return TEMPLATES[kind].format(*args)
+
+class GameEvent(NamedTuple):
+    """A single event: its kind and the values its message is built from."""
+    kind: EventKind
+    args: tuple
+
+def render(event: GameEvent) -> str:
+    """
+    Render an event as the human-readable line the game used to print.
+
+    :param event: The event to render.
+    :return: The rendered message.
+    """
+    return format_event(event.kind, event.args)
+
+class EventSink:
+    """
+    Base class for the destinations of game events.
+
+    Models call emit(kind, *args) with plain values (names, numbers, cards),
+    and never build strings themselves; only sinks that actually show events
+    to someone pay for formatting.
+    """
+    enabled = True
+
+    def emit(self, kind: EventKind, *args):
+        raise NotImplementedError
+
+class NullSink(EventSink):
+    """A sink that drops every event, for simulations and servers that do not narrate."""
+    enabled = False
+
+    def emit(self, kind: EventKind, *args):
+        pass
+
+class MemorySink(EventSink):
+    """A sink that keeps the most recent events of a game in a ring buffer."""
+
+    def __init__(self, capacity: int = 1024):
+        """
+        :param capacity: The number of events to keep; older events are dropped first.
+        """
+        self.buffer = deque(maxlen=capacity)
+
+    def emit(self, kind: EventKind, *args):
+        self.buffer.append(GameEvent(kind, args))
+
+    def drain(self) -> List[GameEvent]:
+        """Remove and return every buffered event, oldest first."""
+        events = list(self.buffer)
+        self.buffer.clear()
+        return events
+
+    def lines(self) -> List[str]:
+        """Render the buffered events without removing them."""
+        return [render(event) for event in self.buffer]
+
+class TextSink(EventSink):
+    """A sink that renders every event immediately, one line each."""
+
+    def __init__(self, stream=None):
+        """
+        :param stream: A file-like object to write to; defaults to stdout.
+        """
+        self.stream = stream
+
+    def emit(self, kind: EventKind, *args):
+        print(format_event(kind, args), file=self.stream)
+
+class DiscordBatcher(MemorySink):
+    """
+    A sink that buffers a game's events and sends them as a few Discord
+    messages when flushed, instead of one message per event.
+    """
+
+    def __init__(self, send: Optional[Callable[[str], None]] = None, capacity: int = 1024, max_length: int = 2000):
+        """
+        :param send: Called with the text of every message produced by flush().
+        :param max_length: The longest message Discord accepts.
+        """
+        super().__init__(capacity)
+        self.send = send
+        self.max_length = max_length
+
+    def flush(self) -> List[str]:
+        """
+        Render every buffered event into as few messages as possible and send them.
+
+        :return: The messages that were produced.
+        """
+        messages, lines, length = [], [], 0
+        for event in self.drain():
+            line = render(event)[:self.max_length]
+            if lines and length + len(line) + 1 > self.max_length:
+                messages.append("\n".join(lines))
+                lines, length = [], 0
+            lines.append(line)
+            length += len(line) + 1
+        if lines:
+            messages.append("\n".join(lines))
+        if self.send:
+            for message in messages:
+                self.send(message)
+        return messages
+
+NULL_SINK = NullSink()
+CONSOLE = TextSink()
@@ -1,35 +1,162 @@
-from typing import List
-from Card import Card
-from Player import Player
+from typing import Dict, List, NamedTuple, Optional
+from Card import CardInstance
+from Player import Player, PlayerSnapshot
+from Events import EventKind, EventSink, NULL_SINK, CONSOLE
+from Triggers import TriggerRegistry, OPPONENT_CARD_PLACED, ATTACKED, UPKEEP
 import random
 
+PHASES = ['Untap', 'Upkeep', 'Draw', 'Main1', 'Combat', 'Main2', 'End']
+
+class GameSnapshot(NamedTuple):
+    """
+    The mutable state of a game, captured by Gamestate.snapshot().
+
+    It refers to the game's card instances instead of copying them, together
+    with the state of the cards the game can still change, so taking one
+    costs a few tuples instead of a copy of the whole object graph.
+    """
+    phase: str
+    turn_counter: int
+    player1_first: bool
+    winner: Optional[Player]
+    rng_state: tuple
+    player1: PlayerSnapshot
+    player2: PlayerSnapshot
+    cards: tuple  # (card, card.snapshot()) for every card outside the graveyards
+
 class Gamestate:
-    def __init__(self, player1: Player, player2: Player):
+    def __init__(self, player1: Player, player2: Player, headless: bool = False, seed: Optional[int] = None, events: Optional[EventSink] = None):
+        """
+        Initialize a game between two players.
+
+        Every decision is delegated to each player's agent, so a game whose
+        players have non-console agents never touches stdin.
+
+        :param headless: Drop all events instead of printing them, so the game never touches stdout either.
+        :param seed: Seed for the game's random generator, making the game reproducible.
+        :param events: The sink that receives this game's events; overrides headless.
+        """
         self.player1 = player1
         self.player2 = player2
+        self.rng = random.Random(seed)
+        self.events = events or (NULL_SINK if headless else CONSOLE)
+        player1.bind_events(self.events)
+        player2.bind_events(self.events)
+        self.triggers = TriggerRegistry()
+        player1.bind_triggers(self.triggers)
+        player2.bind_triggers(self.triggers)
         self.current_player, self.opponent = self.determine_first_player()
         self.phase = 'Untap'
         self.turn_counter = 1
+        self.winner: Optional[Player] = None
+        self.history: List[GameSnapshot] = []
+        self.profiler = None  # A Profiler, when profiling is attached (see Profiler.attach)
+
+    def snapshot(self) -> GameSnapshot:
+        """
+        Capture the state of the game so restore() can return to it.
+
+        Cards in the graveyard are never touched again, so only the cards in
+        the decks, hands and battlefields have their state captured.
+        """
+        cards = [(card, card.snapshot()) for player in (self.player1, self.player2) for card in player.zone_cards()]
+        return GameSnapshot(self.phase, self.turn_counter, self.current_player is self.player1, self.winner,
+                            self.rng.getstate(), self.player1.snapshot(), self.player2.snapshot(), tuple(cards))
+
+    def restore(self, snapshot: GameSnapshot):
+        """
+        Put the game back into a state captured by snapshot(), rebuilding the indexes and triggers.
+
+        :param snapshot: A snapshot of this game.
+        """
+        for card, state in snapshot.cards:
+            card.restore(state)
+        self.player1.restore(snapshot.player1)
+        self.player2.restore(snapshot.player2)
+        self.phase, self.turn_counter, self.winner = snapshot.phase, snapshot.turn_counter, snapshot.winner
+        if snapshot.player1_first:
+            self.current_player, self.opponent = self.player1, self.player2
+        else:
+            self.current_player, self.opponent = self.player2, self.player1
+        self.rng.setstate(snapshot.rng_state)
+        self.triggers.clear()
+        self.player1.bind_triggers(self.triggers)
+        self.player2.bind_triggers(self.triggers)
+
+    def checkpoint(self):
+        """Push a snapshot of the game onto its history, for undo()."""
+        self.history.append(self.snapshot())
+
+    def undo(self) -> bool:
+        """
+        Return to the most recent checkpoint and drop it from the history.
+
+        :return: False if there was no checkpoint to return to.
+        """
+        if not self.history:
+            return False
+        self.restore(self.history.pop())
+        return True
+
+    def clone(self, events: Optional[EventSink] = None) -> "Gamestate":
+        """
+        Make an independent copy of the game, such as one for a search to play out.
+
+        Card definitions and the players' agents are shared; every card that
+        can still change is copied.
+
+        :param events: The sink of the copy; by default it drops every event.
+        :return: The copy.
+        """
+        memo: Dict[CardInstance, CardInstance] = {}
+        for player in (self.player1, self.player2):
+            for card in player.zone_cards():
+                memo[card] = card.copy()
+        for card in memo.values():
+            if card.attachments:
+                card.attachments = tuple(memo.get(equipment, equipment) for equipment in card.attachments)
+            if card.attached_to is not None:
+                card.attached_to = memo.get(card.attached_to, card.attached_to)
+
+        game = Gamestate.__new__(Gamestate)
+        game.__dict__.update(self.__dict__)
+        game.player1, game.player2 = self.player1.clone(memo), self.player2.clone(memo)
+        if self.current_player is self.player1:
+            game.current_player, game.opponent = game.player1, game.player2
+        else:
+            game.current_player, game.opponent = game.player2, game.player1
+        if self.winner is not None:
+            game.winner = game.player1 if self.winner is self.player1 else game.player2
+        game.rng = random.Random()
+        game.rng.setstate(self.rng.getstate())
+        game.events = events or NULL_SINK
+        game.history = []
+        if self.profiler is not None:
+            self.profiler.detach(game)
+        game.triggers = TriggerRegistry()
+        for player in (game.player1, game.player2):
+            player.bind_events(game.events)
+            player.bind_triggers(game.triggers)
+        return game
 
     def determine_first_player(self):
         """Randomly determine which player goes first."""
         players = [self.player1, self.player2]
-        random.shuffle(players)
-        print(f"{players[0].name} will go first.")
+        self.rng.shuffle(players)
+        self.events.emit(EventKind.FIRST_PLAYER, players[0].name)
         return players[0], players[1]
 
     def next_phase(self):
         """Progress to the next phase in the turn cycle."""
-        phases = ['Untap', 'Upkeep', 'Draw', 'Main1', 'Combat', 'Main2', 'End']
-        current_index = phases.index(self.phase)
-        self.phase = phases[(current_index + 1) % len(phases)]
-        print(f"Transitioned to {self.phase} phase.")
+        current_index = PHASES.index(self.phase)
+        self.phase = PHASES[(current_index + 1) % len(PHASES)]
+        self.events.emit(EventKind.PHASE_CHANGED, self.phase)
 
     def switch_player(self):
         """Switch the current player to the opponent."""
         self.current_player, self.opponent = self.opponent, self.current_player
         self.current_player.reset_land_played()
-        print(f"It is now {self.current_player.name}'s turn.")
+        self.events.emit(EventKind.TURN_PASSED, self.current_player.name)
         
         if self.turn_counter % 2 == 0:
             self.current_player.increase_mana()
@@ -39,21 +166,17 @@ class Gamestate:
 
     def untap_phase(self):
         """Handle the Untap phase."""
-        for card in self.current_player.battlefield:
-            card.untap()  # Assuming an untap method in Card
-        for card in self.current_player.battlefield:
-            if card.card_type == "Resource":
-                card.untap()
-                self.current_player.untap_resource(card.resource_type)
-            else:
-                card.untap()
+        player = self.current_player
+        for card in player.battlefield:
+            card.untap()
+        for resource_type in player.resources:
+            player.untap_resource(resource_type)
         self.next_phase()
 
     def upkeep_phase(self):
         """Handle the Upkeep phase."""
-        for card in self.current_player.battlefield:
-            self.trigger_upkeep(self.current_player, card)  
-            print(card.card_type)
+        for card in self.triggers.listeners(self.current_player, UPKEEP):
+            self.trigger_upkeep(self.current_player, card)
         self.next_phase()
 
     def trigger_upkeep(self, player, card):
@@ -64,193 +187,116 @@ class Gamestate:
         :param card: The card with an upkeep trigger.
         """
         if card.upkeep_cost:
-            can_pay = player.use_mana(card.upkeep_cost)
+            can_pay = player.use_mana(card.definition.upkeep_vector)
             if not can_pay:
-                print(f"{player.name} cannot pay the upkeep cost for {card.name}. Taking consequences.")
+                self.events.emit(EventKind.UPKEEP_UNPAID, player.name, card.name)
                 # Handle consequences here (e.g., sacrifice the card)
         if card.upkeep_ability:
             card.upkeep_ability(player, card)
 
     def draw_phase(self):
         """Handle the Draw phase."""
-        if self.turn_counter == 1 or 2:
+        if self.turn_counter in (1, 2):
             self.current_player.hand.draw_initial_hand(self.current_player.deck)
         else:
             self.current_player.hand.draw_card(self.current_player.deck)
         self.next_phase()
 
     def main_phase(self, phase_num: int):
-        if phase_num == 1:
-            print("Entering Main Phase 1.")
-        else:
-            print("Entering Main Phase 2.")
+        self.events.emit(EventKind.MAIN_PHASE_STARTED, phase_num)
         
         # Allow the player to perform any legal actions such as playing lands, casting spells, or activating abilities
         self.perform_actions()
         self.next_phase()
 
     def perform_actions(self):
-        print(f"{self.current_player.name} can perform actions now.")
-        self.current_player.hand.view_hand()
+        """Ask the current player's agent for actions until one of them succeeds or the player skips."""
+        self.events.emit(EventKind.ACTIONS_OPEN, self.current_player.name)
         action_taken = False
 
         while not action_taken:
-            print(f"Your Common Mana: {self.current_player.get_common_mana()}")
-            print(f"Your Resource Pool: {self.current_player.get_resource_pool()}")
-            action = input(f"{self.current_player.name}, choose an action (play/attach/activate/skip): ").strip().lower()
-
-            if action == "skip":
-                print(f"{self.current_player.name} skips their main phase.")
-                action_taken = True
-
-            elif action == "play":
-                self.current_player.hand.view_hand()
-                card_name = input("Enter the name of the card you want to play: ").strip()
-
-                card = self.current_player.hand.place_card(card_name)
-                if card:
-                    if card.card_type == "Resource" and self.current_player.land_played:
-                        print(f"{self.current_player.name} cannot play another land this turn.")
-                        self.current_player.hand.cards.append(card)  # Return card to hand
-                    elif card.card_type == "Equipment" and card.attributes.get("Attach", True):
-                        print(f"{self.current_player.name} cannot play {card_name} directly. It must be attached to a creature.")
-                        self.current_player.hand.cards.append(card)  # Return card to hand
-                    else:
-                        if self.current_player.can_pay_cost(card.cost):
-                            self.current_player.pay_cost(card.cost)
-                            if card.card_type == "Resource":
-                                self.current_player.land_played = True
-                                for resource_type, amount in card.attributes.items():
-                                    self.current_player.resource_pool[resource_type] += amount
-                            self.current_player.battlefield.append(card)
-                            if card.card_type == "Trap":
-                                self.current_player.traps.append(card)  # Add the trap to the player's traps list
-                            print(f"{self.current_player.name} placed {card} onto the battlefield.")
-                            action_taken = True
-                            if card.card_type == "Creature":
-                                self.current_player.check_traps_on_card_placed(card)
-
-                        else:
-                            print(f"{self.current_player.name} cannot pay the cost for {card_name}.")
-                            self.current_player.hand.cards.append(card)  # Return card to hand
-                else:
-                    print(f"{self.current_player.name} could not find {card_name} in hand to play.")
-
-
-            elif action == "attach":
-                self.current_player.hand.view_hand()
-                equipment_name = input("Enter the name of the equipment to attach: ").strip()
-                equipment = self.current_player.hand.place_card(equipment_name)
-
-                if equipment and equipment.card_type == "Equipment":
-                    if self.current_player.can_pay_cost(equipment.cost):
-                        self.current_player.get_battlefield()
-                        target_name = input("Enter the name of the creature to attach it to: ").strip()
-                        target_creature = next((card for card in self.current_player.battlefield if card.name == target_name), None)
-                        if target_creature:
-                            self.current_player.pay_cost(equipment.cost)
-                            self.current_player.attach_equipment(equipment, target_creature)
-                            action_taken = True
-                        else:
-                            print(f"{target_name} is not on the battlefield.")
-                            self.current_player.hand.cards.append(equipment)  # Return equipment to hand
-                    else:
-                        print(f"{self.current_player.name} could not find {equipment_name} in hand to attach or cannot pay the cost.")
-                        if equipment:
-                            self.current_player.hand.cards.append(equipment)  # Return equipment to hand
-                else: 
-                    print(f"{self.current_player.name} could not find {equipment_name} in hand to activate or it is not a Equipment card.")
-                    if equipment:
-                        self.current_player.hand.cards.append(technology)
-
-            elif action == "activate":
-                self.current_player.hand.view_hand()
-                technology_name = input("Enter the name of the technology to activate: ").strip()
-                technology = self.current_player.hand.place_card(technology_name)
-
-                if technology and technology.card_type == "Technology":
-                    if self.current_player.can_pay_cost(technology.cost):
-                        self.current_player.pay_cost(technology.cost)
-                        self.current_player.activate_technology(technology, self)
-                        action_taken = True
-                    else:
-                        print(f"{self.current_player.name} cannot pay the cost for {technology_name}.")
-                        self.current_player.hand.cards.append(technology)  # Return technology to hand
-                else:
-                    print(f"{self.current_player.name} could not find {technology_name} in hand to activate or it is not a Technology card.")
-                    if technology:
-                        self.current_player.hand.cards.append(technology)  # Return technology to hand
+            action = self.current_player.agent.choose_action(self, self.current_player)
+            action_taken = self.resolve_action(action)
 
-            else:
-                print("Invalid action. Please try again.")
-            
-            # Checks for creatures with 0 HP or less and moves them from Battlefield to Graveyard
-            self.current_player.check_creatures()
-            self.opponent.check_creatures()
+    def resolve_action(self, action: tuple) -> bool:
+        """
+        Apply a main phase action and then the state-based checks that follow every action.
+
+        :return: True if the action ends the player's main phase.
+        """
+        action_taken = self.apply_action(action)
+
+        # Checks for creatures with 0 HP or less and moves them from Battlefield to Graveyard
+        self.current_player.check_creatures()
+        self.opponent.check_creatures()
+        return action_taken
+
+    def apply_action(self, action: tuple) -> bool:
+        """
+        Apply a main phase action for the current player.
+
+        :param action: ("play", card_name), ("attach", equipment_name, creature_name), ("activate", technology_name) or ("skip",).
+        :return: True if the action ends the player's main phase.
+        """
+        kind = action[0] if action else None
+
+        if kind == "skip":
+            self.events.emit(EventKind.MAIN_PHASE_SKIPPED, self.current_player.name)
+            return True
 
+        if kind == "play":
+            card = self.current_player.play_card_to_battlefield(action[1])
+            if card and card.card_type == "Creature":
+                self.check_traps_on_card_placed(card)
+            return card is not None
 
+        if kind == "attach":
+            return self.current_player.attach_equipment(action[1], action[2])
+
+        if kind == "activate":
+            return self.current_player.activate_technology(action[1], self)
+
+        self.events.emit(EventKind.INVALID_ACTION)
+        return False
 
     def can_pay_cost(self, cost):
         """
         Check if the player can pay the cost.
         """
-        for resource, amount in cost.items():
-            if self.current_player.resource_pool.get(resource, 0) < amount:
-                return False
-        return True
+        return self.current_player.can_pay_cost(cost)
 
 
     def combat_phase(self):
         """Handle the Combat phase."""
-        print("Entering Combat Phase.")
+        self.events.emit(EventKind.COMBAT_STARTED)
         attackers = self.select_attackers()
         if attackers.__len__() != 0:
             self.declare_attackers(attackers)
         self.next_phase()
 
-    def select_attackers(self) -> List[Card]:
-        """Select attackers from the current player's battlefield."""
-        print(f"{self.current_player.name}, select attackers for combat:")
-        print("Your Battlefield:")
-
-        valid_attackers = [card for card in self.current_player.battlefield if card.card_type == "Creature"]
-        for index, card in enumerate(valid_attackers, start=1):
-            print(f"{index}. {card.name} ({card.card_type}) - Attack: {card.attributes['attack']}")
+    def select_attackers(self) -> List[CardInstance]:
+        """Ask the current player's agent to select attackers from their battlefield."""
+        valid_attackers = list(self.current_player.creatures)
+        return self.current_player.agent.select_attackers(self, self.current_player, valid_attackers)
 
-        selected_attackers = []
-        while True:
-            try:
-                selection = input("Enter the number of the card to attack with (0 to finish selecting): ")
-                index = int(selection) - 1
-                if index == -1:
-                    break
-                if 0 <= index < len(valid_attackers):
-                    selected_attackers.append(valid_attackers[index])
-                    print(f"{valid_attackers[index].name} selected as an attacker.")
-                else:
-                    print("Invalid selection. Please enter a valid number.")
-            except (ValueError, IndexError):
-                print("Invalid selection. Please enter a valid number.")
-
-        return selected_attackers
-
-    def declare_attackers(self, attackers: List[Card]):
+    def declare_attackers(self, attackers: List[CardInstance]):
         """Handle the Declare Attackers step."""
-        print(f"{self.current_player.name} is declaring attackers.")
+        self.events.emit(EventKind.ATTACKERS_DECLARED, self.current_player.name)
         total_attack = 0
         for attacker in attackers:
             attacker.tap()
-            if attacker in self.current_player.battlefield:
-                print(f"{attacker.name} is attacking with {attacker.attributes['attack']} attack.")
-                total_attack += attacker.attributes['attack']
+            if attacker in self.current_player.creatures:
+                attack = attacker.attack
+                self.events.emit(EventKind.CREATURE_ATTACKS, attacker.name, attack)
+                total_attack += attack
             else:
-                print(f"{attacker.name} is not on the battlefield and cannot attack.")
+                self.events.emit(EventKind.ATTACKER_MISSING, attacker.name)
         self.damage_enemy_player(total_attack)
         self.check_traps_on_attack(attackers)
 
     def damage_enemy_player(self, attack_points: int):
         self.opponent.take_damage(attack_points)
-        print(f"{self.opponent.name} took {attack_points} damage.")
+        self.events.emit(EventKind.PLAYER_ATTACKED, self.opponent.name, attack_points)
         #self.check_traps("Damage Dealt", attack_points)
 
     def end_phase(self):
@@ -262,32 +308,33 @@ class Gamestate:
 
     def end_step(self):
         """Handle the End Step."""
-        print("End Step: resolving end-of-turn effects.")
+        self.events.emit(EventKind.END_STEP)
         # Handle end-of-turn effects here
 
     def cleanup_step(self):
         """Handle the Cleanup Step."""
-        print("Cleanup Step: discarding excess cards and removing damage.")
+        self.events.emit(EventKind.CLEANUP_STEP)
 
         # Discard excess cards if hand size exceeds maximum (normally seven)
         max_hand_size = 7
         if self.current_player.hand.count() > max_hand_size:
             excess_cards = self.current_player.hand.count() - max_hand_size
-            print(f"{self.current_player.name} has {excess_cards} excess cards.")
-            self.current_player.hand.discard_excess(max_hand_size, self.current_player.hand.choose_discard())
+            self.events.emit(EventKind.EXCESS_CARDS, self.current_player.name, excess_cards)
+            agent = self.current_player.agent
+            self.current_player.hand.discard_excess(max_hand_size, lambda: agent.choose_discard(self, self.current_player))
 
 
         # Remove all damage marked on permanents
         for card in self.current_player.battlefield:
-            if hasattr(card, "damage"):
+            if card.damage:
                 card.damage = 0  # Reset damage to 0
-                print(f"Removed damage from {card.name}.")
+                self.events.emit(EventKind.DAMAGE_REMOVED, card.name)
 
         # End all "until end of turn" and "this turn" effects
         for card in self.current_player.battlefield:
             if hasattr(card, "end_turn_effects"):
                 card.end_turn_effects.clear()  # Clear end turn effects
-                print(f"Cleared end-of-turn effects from {card.name}.")
+                self.events.emit(EventKind.END_TURN_EFFECTS_CLEARED, card.name)
 
         # Check for state-based actions or triggered abilities
         self.check_state_based_actions_and_triggered_abilities()
@@ -297,50 +344,74 @@ class Gamestate:
         """Check for state-based actions or triggered abilities and handle them."""
         # Placeholder for checking state-based actions and triggered abilities
         # If any, put them on the stack and handle priority
-        print("Checking for state-based actions and triggered abilities.")
+        self.events.emit(EventKind.STATE_BASED_CHECK)
         # This can be implemented with more details as needed
 
 
     def check_traps_on_card_placed(self, card):
         """Check and handle trap cards when a card is placed."""
-        for trap in self.opponent.traps:
-            if trap.trigger_condition == "Opponent Card Placed":
-                print(f"{self.opponent.name} can activate {trap.name}.")
-                activate = input(f"Do you want to activate {trap.name}? (yes/no): ").strip().lower()
-                if activate == "yes":
-                    trap.trigger(self, self.opponent, card)
+        for trap in self.triggers.listeners(self.opponent, OPPONENT_CARD_PLACED):
+            if self.opponent.agent.activate_trap(self, self.opponent, trap, card):
+                trap.trigger(self, self.opponent, card)
 
     def check_traps_on_attack(self, attackers):
         """Check and handle trap cards when an attack is declared."""
-        for trap in self.opponent.traps:
-            if trap.trigger_condition == "Attacked":
-                print(f"{self.opponent.name} can activate {trap.name}.")
-                activate = input(f"Do you want to activate {trap.name}? (yes/no): ").strip().lower()
-                if activate == "yes":
-                    for attacker in attackers:
-                        trap.trigger(self, self.opponent, attacker)
+        for trap in self.triggers.listeners(self.opponent, ATTACKED):
+            if self.opponent.agent.activate_trap(self, self.opponent, trap, attackers):
+                # The trap hits every attacker, not just the first one
+                trap.trigger(self, self.opponent, *attackers)
 
 
     def play_turn(self):
-        """Play a complete turn for the current player."""
-        print(f"Starting {self.current_player.name}'s turn.")
-        self.untap_phase()
-        self.upkeep_phase()
-        self.draw_phase()
-        self.main_phase(1)
-        self.combat_phase()
-        self.main_phase(2)
-        self.end_phase()
-
-    def start_game(self):
-        """Start the game and manage the flow of turns."""
+        """
+        Play the rest of the current player's turn, from the current phase through the End phase.
+
+        A game paused at a phase boundary, such as a copy made for a search, resumes where it stopped.
+        """
+        phase_handlers = {
+            'Untap': self.untap_phase,
+            'Upkeep': self.upkeep_phase,
+            'Draw': self.draw_phase,
+            'Main1': lambda: self.main_phase(1),
+            'Combat': self.combat_phase,
+            'Main2': lambda: self.main_phase(2),
+            'End': self.end_phase,
+        }
+        if self.phase == 'Untap':
+            self.events.emit(EventKind.TURN_STARTED, self.current_player.name)
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start("turn")
+        while True:
+            phase = self.phase
+            if profiler is None:
+                phase_handlers[phase]()
+            else:
+                with profiler.measure(phase):
+                    phase_handlers[phase]()
+            if phase == 'End':
+                break
+        if profiler is not None:
+            profiler.stop()
+
+    def start_game(self, max_turns: Optional[int] = None) -> Optional[Player]:
+        """
+        Start the game and manage the flow of turns.
+
+        :param max_turns: Stop after this many turns, which headless simulations use to bound stalled games.
+        :return: The winning player, or None if the game was stopped before anyone won.
+        """
         while not self.check_win_condition():
+            if max_turns is not None and self.turn_counter > max_turns:
+                return None
             self.play_turn()
+        return self.winner
 
     def check_win_condition(self) -> bool:
         """Check if the game has been won."""
         if self.player1.hp <= 0 or self.player2.hp <= 0:
             winner = self.player1 if self.player2.hp <= 0 else self.player2
-            print(f"{winner.name} wins the game!")
+            self.winner = winner
+            self.events.emit(EventKind.GAME_WON, winner.name)
             return True
         return False
\ No newline at end of file
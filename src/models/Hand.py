@@ -1,43 +1,123 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 import random
 from Deck import Deck
-from Card import Card
+from Card import CardInstance
+from Rendering import zone_text
+from Events import EventKind, EventSink, NULL_SINK
 
 class Hand:
     def __init__(self):
-        self.cards: List[Card] = []
+        # The slots of the hand; removing a card moves the last card into its slot.
+        self.cards: List[CardInstance] = []
+        self._slots: Dict[CardInstance, int] = {}
+        # The copies of each card in the hand by card id, used as ordered sets.
+        self._by_id: Dict[str, Dict[CardInstance, None]] = {}
+        self._ids_by_name: Dict[str, str] = {}
+        self.events: EventSink = NULL_SINK
 
-    def draw_card(self, deck: Deck) -> Optional[Card]:
+    def add_card(self, card: CardInstance):
+        """Put a card into the hand, such as a drawn card or one whose play failed."""
+        self._slots[card] = len(self.cards)
+        self.cards.append(card)
+        copies = self._by_id.get(card.card_id)
+        if copies is None:
+            copies = self._by_id[card.card_id] = {}
+            self._ids_by_name[card.name] = card.card_id
+        copies[card] = None
+
+    def remove_card(self, card: CardInstance) -> bool:
+        """
+        Take a specific card out of the hand.
+
+        :return: True if the card was in the hand.
+        """
+        slot = self._slots.pop(card, None)
+        if slot is None:
+            return False
+        last = self.cards.pop()
+        if last is not card:
+            self.cards[slot] = last
+            self._slots[last] = slot
+        del self._by_id[card.card_id][card]
+        return True
+
+    def snapshot(self) -> tuple:
+        """
+        Capture the hand for restore().
+
+        :return: The cards in slot order and the cards in the order they were added,
+                 which decides the copy find_card returns.
+        """
+        return tuple(self.cards), tuple(self._slots)
+
+    def restore(self, state: tuple):
+        """Put the hand back into a state captured by snapshot()."""
+        cards, order = state
+        self.cards = list(cards)
+        slots = {card: slot for slot, card in enumerate(self.cards)}
+        # Keyed in the order the cards were added, like the indexes add_card builds
+        self._slots = {card: slots[card] for card in order}
+        self._by_id = {}
+        for card in order:
+            copies = self._by_id.get(card.card_id)
+            if copies is None:
+                copies = self._by_id[card.card_id] = {}
+                self._ids_by_name[card.name] = card.card_id
+            copies[card] = None
+
+    def clone(self, memo: Dict[CardInstance, CardInstance]) -> "Hand":
+        """
+        Copy the hand, replacing every card by its copy in memo.
+
+        :param memo: The copies of a game's cards, keyed by the original card.
+        """
+        hand = Hand()
+        hand.events = self.events
+        cards, order = self.snapshot()
+        hand.restore((tuple(memo[card] for card in cards), tuple(memo[card] for card in order)))
+        return hand
+
+    def _copies(self, card_name: str) -> Optional[Dict[CardInstance, None]]:
+        return self._by_id.get(self._ids_by_name.get(card_name, card_name))
+
+    def draw_card(self, deck: Deck) -> Optional[CardInstance]:
         """Draw a card from the top of the deck and add it to the hand."""
         
-        if deck.cards:
-            drawn_card = deck.cards.pop(0)
-            self.cards.append(drawn_card)
-            print(f"Drew {drawn_card} from the deck and added it to the hand.")
+        drawn_card = deck.draw()
+        if drawn_card:
+            self.add_card(drawn_card)
+            self.events.emit(EventKind.CARD_DRAWN, drawn_card)
             return drawn_card
         
-        print("Deck is empty.")
+        self.events.emit(EventKind.DRAW_FROM_EMPTY_DECK)
         return None
 
-    def place_card(self, card_name: str) -> Optional[Card]:
-        """Place a card down from the hand by name, removing it from the hand."""
-        for card in self.cards:
-            if card.name == card_name:
-                self.cards.remove(card)
-                print(f"Placed {card} from the hand.")
-                return card
+    def place_card(self, card_name: str) -> Optional[CardInstance]:
+        """Place a card down from the hand by name or card id, removing it from the hand."""
+        card = self.find_card(card_name)
+        if card:
+            self.remove_card(card)
+            self.events.emit(EventKind.CARD_PLACED, card)
+            return card
         
-        print(f"Card with name '{card_name}' not found in the hand.")
+        self.events.emit(EventKind.CARD_NOT_IN_HAND, card_name)
         return None
 
+    def find_card(self, card_name: str) -> Optional[CardInstance]:
+        """Find a card in the hand by name or card id without removing it."""
+        copies = self._copies(card_name)
+        if copies:
+            return next(reversed(copies))
+        return None
+
+    def count_of(self, card_name: str) -> int:
+        """Get the number of copies of a card, by name or card id, in the hand."""
+        copies = self._copies(card_name)
+        return len(copies) if copies else 0
+
     def view_hand(self):
         """View all cards in the hand."""
-        if self.cards:
-            print("Current hand:")
-            for card in self.cards:
-                print(f" - {card}")
-        else:
-            print("The hand is empty.")
+        print(zone_text("Current hand:", self.cards, "The hand is empty."))
 
     def count(self) -> int:
         """Get the number of cards in the hand."""
@@ -49,32 +129,24 @@ class Hand:
 
         :param deck: The deck from which to draw the initial hand.
         """
-        while len(self.cards) < 8 and deck.cards:
-            drawn_card = deck.cards.pop(0)
-            self.cards.append(drawn_card)
-            print(f"Drew {drawn_card} from the deck and added it to the hand.")
-        print("Initial hand drawn.")
+        for drawn_card in deck.draw_many(8 - len(self.cards)):
+            self.add_card(drawn_card)
+            self.events.emit(EventKind.CARD_DRAWN, drawn_card)
+        self.events.emit(EventKind.INITIAL_HAND_DRAWN)
 
     def display(self):
         """Display the current hand of the player."""
         self.view_hand()
 
     def discard_excess(self, max_hand_size: int, choose_discard: callable):
-        """Discard cards until the hand size is reduced to max_hand_size."""
+        """
+        Discard cards until the hand size is reduced to max_hand_size.
+
+        :param choose_discard: Called with no arguments for every card that has to go; returns the card to discard.
+        """
         while len(self.cards) > max_hand_size:
-            card_to_discard = choose_discard
-            if card_to_discard in self.cards:
-                self.cards.remove(card_to_discard)
-                print(f"Discarded {card_to_discard.name} from the hand.")
+            card_to_discard = choose_discard()
+            if self.remove_card(card_to_discard):
+                self.events.emit(EventKind.CARD_DISCARDED, card_to_discard.name)
             else:
-                print("Error: chosen card is not in the hand.")
-
-    def choose_discard(self) -> Card:
-        """Let the player choose a card to discard."""
-        print("Choose a card to discard:")
-        self.view_hand()
-        choice = int(input("Enter the number of the card to discard: ")) - 1
-        while choice < 0 or choice >= len(self.cards):
-            print("Invalid selection. Please try again.")
-            choice = int(input("Enter the number of the card to discard: ")) - 1
-        return self.cards[choice]
\ No newline at end of file
+                self.events.emit(EventKind.INVALID_DISCARD)
@@ -0,0 +1,64 @@
+from collections.abc import Mapping
+from typing import Dict
+
+# Mana is stored as a fixed-width vector packed into one integer: one 16-bit
+# lane per mana type, Common in the lowest lane. The top bit of every lane is
+# a guard bit that stays clear in stored values, so comparing or subtracting
+# two whole vectors is a single integer operation with no borrow between lanes.
+MANA_TYPES = ("Common", "Biology", "Chemistry", "Physics", "Robotics")
+RESOURCE_TYPES = MANA_TYPES[1:]
+MANA_INDEX = {mana_type: index for index, mana_type in enumerate(MANA_TYPES)}
+
+LANE_BITS = 16
+LANE_MASK = (1 << LANE_BITS) - 1
+MAX_LANE_VALUE = (1 << (LANE_BITS - 1)) - 1
+GUARD_BITS = sum(1 << (LANE_BITS * index + LANE_BITS - 1) for index in range(len(MANA_TYPES)))
+EMPTY = 0
+
+def compile_cost(cost: Mapping) -> int:
+    """
+    Compile a cost dictionary such as {"Common": 2, "Physics": 1} into a mana vector.
+
+    :param cost: The cost, keyed by mana type.
+    :return: The packed mana vector.
+    """
+    vector = 0
+    for mana_type, amount in cost.items():
+        if mana_type not in MANA_INDEX:
+            raise ValueError(f"Unknown mana type '{mana_type}'.")
+        if not 0 <= amount <= MAX_LANE_VALUE:
+            raise ValueError(f"Mana amount {amount} for '{mana_type}' is out of range.")
+        vector += amount << (LANE_BITS * MANA_INDEX[mana_type])
+    return vector
+
+def unit(mana_type: str, amount: int = 1) -> int:
+    """The vector holding amount of a single mana type."""
+    return amount << (LANE_BITS * MANA_INDEX[mana_type])
+
+def get_lane(vector: int, mana_type: str) -> int:
+    """Read the amount of one mana type from a vector."""
+    return (vector >> (LANE_BITS * MANA_INDEX[mana_type])) & LANE_MASK
+
+def set_lane(vector: int, mana_type: str, amount: int) -> int:
+    """Return a copy of the vector with one mana type set to amount."""
+    shift = LANE_BITS * MANA_INDEX[mana_type]
+    amount = max(0, min(amount, MAX_LANE_VALUE))
+    return (vector & ~(LANE_MASK << shift)) | (amount << shift)
+
+def can_afford(pool: int, cost: int) -> bool:
+    """
+    Check whether a pool covers a cost in every lane at once.
+
+    Setting the guard bits before subtracting gives every lane a borrow of its
+    own; a lane's guard bit survives the subtraction only if that lane of the
+    pool is at least that lane of the cost.
+    """
+    return ((pool | GUARD_BITS) - cost) & GUARD_BITS == GUARD_BITS
+
+def to_dict(vector: int, mana_types=MANA_TYPES) -> Dict[str, int]:
+    """Unpack a vector into a dictionary keyed by mana type."""
+    return {mana_type: (vector >> (LANE_BITS * MANA_INDEX[mana_type])) & LANE_MASK for mana_type in mana_types}
+
+def format_mana(vector: int) -> str:
+    """Render the non-zero lanes of a vector, e.g. "{'Common': 2, 'Physics': 1}"."""
+    return str({mana_type: amount for mana_type, amount in to_dict(vector).items() if amount})
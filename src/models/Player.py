@@ -1,130 +1,332 @@
 from Hand import Hand
 from Deck import Deck
-from typing import List, Dict
+from collections.abc import Mapping
+from typing import List, Dict, NamedTuple, Optional
 from Card import *
+from Agent import PlayerAgent, ConsoleAgent
+from Effects import equipment_effect, opponent_of
+from Events import EventKind, EventSink, NULL_SINK
+from Triggers import TriggerRegistry, UPKEEP
+from Mana import EMPTY, GUARD_BITS, LANE_BITS, LANE_MASK, RESOURCE_TYPES, can_afford, compile_cost, get_lane, set_lane, to_dict, unit
+
+class PlayerSnapshot(NamedTuple):
+    """The mutable state of a player, captured by Player.snapshot()."""
+    hp: int
+    land_played: bool
+    mana: int
+    max_mana: int
+    pool: int
+    damage_reduction: int
+    deck: tuple
+    hand: tuple
+    battlefield: tuple
+    graveyard: tuple
+    card_plays: tuple = ()  # (card id, plays) pairs
 
 class Player:
-    def __init__(self, name: str, discord_id: int, deck: Deck):
+    def __init__(self, name: str, discord_id: int, deck: Deck, agent: Optional[PlayerAgent] = None):
         self.name = name
         self.discord_id = discord_id
         self.deck = deck
+        self.agent = agent or ConsoleAgent()
+        self.events: EventSink = NULL_SINK
+        self.triggers = TriggerRegistry()
         self.hand = Hand()
-        self.battlefield: List[Card] = []
+        self.battlefield: List[CardInstance] = []
         self.hp = 40
         self.land_played = False
         self.mana = 1
         self.max_mana = 10
-        self.current_mana = self.mana
+        # Common mana and the resource pool, packed into one vector (see Mana.py)
+        self.pool = set_lane(EMPTY, "Common", self.mana)
         self.graveyard = []
-        self.resource_pool = {"Biology": 0, "Chemistry": 0, "Physics": 0, "Robotics": 0}
         self.damage_reduction = 0
-        self.traps: List[Trap] = []  # List to hold the player's traps
-        
+        # Per-type indexes of the battlefield, used as ordered sets and kept up to date by
+        # enter_battlefield and leave_battlefield so each phase only visits the cards it needs.
+        self.creatures: Dict[CardInstance, None] = {}
+        self.resources: Dict[str, Dict[CardInstance, None]] = {}
+        self.resource_counts: Dict[str, int] = {}  # Total amount provided by the resources of each type
+        self.traps: Dict[CardInstance, None] = {}
+        self.equipment: Dict[CardInstance, None] = {}
+        # How many times each card has been played this game, by card id, counted as it happens
+        self.card_plays: Dict[str, int] = {}
+
+    def bind_events(self, events: EventSink):
+        """
+        Send the events of this player, their hand and their deck to a game's sink.
+
+        :param events: The sink of the game this player is in.
+        """
+        self.events = events
+        self.hand.events = events
+        self.deck.events = events
+
+    def bind_triggers(self, triggers: TriggerRegistry):
+        """
+        Register this player's cards with a game's trigger registry.
+
+        :param triggers: The registry of the game this player is in.
+        """
+        self.triggers = triggers
+        for card in self.battlefield:
+            self.register_triggers(card)
+
+    def register_triggers(self, card: CardInstance):
+        """Start listening for the events a card on the battlefield reacts to."""
+        if card.card_type == "Trap" and not card.triggered:
+            self.triggers.register(self, card.trigger_condition, card)
+        if card.definition.has_upkeep:
+            self.triggers.register(self, UPKEEP, card)
+
+    def unregister_triggers(self, card: CardInstance):
+        """Stop listening for the events a card reacts to."""
+        if card.card_type == "Trap":
+            self.triggers.unregister(self, card.trigger_condition, card)
+        if card.definition.has_upkeep:
+            self.triggers.unregister(self, UPKEEP, card)
+
+    def enter_battlefield(self, card: CardInstance):
+        """
+        Put a card onto the battlefield, into the indexes for its type and into the trigger registry.
+
+        :param card: The card entering the battlefield.
+        """
+        self.battlefield.append(card)
+        self._index(card)
+        self.register_triggers(card)
+
+    def _index(self, card: CardInstance):
+        card_type = card.card_type
+        if card_type == "Creature":
+            self.creatures[card] = None
+        elif card_type == "Resource":
+            self.resources.setdefault(card.resource_type, {})[card] = None
+            self.resource_counts[card.resource_type] = self.resource_counts.get(card.resource_type, 0) + card.amount
+        elif card_type == "Trap":
+            self.traps[card] = None
+        elif card_type == "Equipment":
+            self.equipment[card] = None
+
+    def _reindex(self):
+        """Rebuild the per-type indexes from the battlefield."""
+        self.creatures, self.resources, self.resource_counts, self.traps, self.equipment = {}, {}, {}, {}, {}
+        for card in self.battlefield:
+            self._index(card)
+
+    def leave_battlefield(self, card: CardInstance):
+        """
+        Take a card off the battlefield, out of the indexes for its type and out of the trigger registry.
+
+        :param card: The card leaving the battlefield.
+        """
+        self.battlefield.remove(card)
+        card_type = card.card_type
+        if card_type == "Creature":
+            del self.creatures[card]
+        elif card_type == "Resource":
+            del self.resources[card.resource_type][card]
+            self.resource_counts[card.resource_type] -= card.amount
+        elif card_type == "Trap":
+            del self.traps[card]
+        elif card_type == "Equipment":
+            del self.equipment[card]
+        self.unregister_triggers(card)
+
+    def snapshot(self) -> PlayerSnapshot:
+        """
+        Capture the player's state and the contents of their zones.
+
+        The cards themselves are not copied; their state is captured by the game (see Gamestate.snapshot).
+        """
+        return PlayerSnapshot(self.hp, self.land_played, self.mana, self.max_mana, self.pool, self.damage_reduction,
+                              self.deck.snapshot(), self.hand.snapshot(), tuple(self.battlefield), tuple(self.graveyard),
+                              tuple(self.card_plays.items()))
+
+    def restore(self, snapshot: PlayerSnapshot):
+        """
+        Put the player back into a state captured by snapshot() and rebuild the indexes.
+
+        The game re-registers the player's triggers afterwards.
+        """
+        self.hp, self.land_played, self.mana, self.max_mana, self.pool, self.damage_reduction = snapshot[:6]
+        self.deck.restore(snapshot.deck)
+        self.hand.restore(snapshot.hand)
+        self.battlefield = list(snapshot.battlefield)
+        self.graveyard = list(snapshot.graveyard)
+        self.card_plays = dict(snapshot.card_plays)
+        self._reindex()
+
+    def clone(self, memo: Dict[CardInstance, CardInstance]) -> "Player":
+        """
+        Copy the player and their zones, replacing every card by its copy in memo.
+
+        The copy shares the agent; the game it is cloned into binds its own events and triggers.
+
+        :param memo: The copies of a game's cards, keyed by the original card.
+        """
+        player = Player.__new__(Player)
+        player.__dict__.update(self.__dict__)
+        player.deck = self.deck.clone(memo)
+        player.hand = self.hand.clone(memo)
+        player.battlefield = [memo[card] for card in self.battlefield]
+        # Cards in the graveyard never change again, so the copy shares them
+        player.graveyard = list(self.graveyard)
+        player.card_plays = dict(self.card_plays)
+        player._reindex()
+        player.triggers = TriggerRegistry()
+        return player
+
+    def zone_cards(self):
+        """Iterate over the cards in the player's deck, hand and battlefield, the cards a game can still change."""
+        yield from self.deck.snapshot()
+        yield from self.hand.cards
+        yield from self.battlefield
+
+    def count_play(self, card: CardInstance):
+        card_id = card.card_id
+        self.card_plays[card_id] = self.card_plays.get(card_id, 0) + 1
+
     def reset_damage_reduction(self):
         self.damage_reduction = 0
     
     def take_damage(self, damage: int):
-        self.hp -= max(0, damage - self.damage_reduction)
-        print(f"{self.name} takes {max(0, damage - self.damage_reduction)} damage and is now at {self.hp} HP.")
+        taken = max(0, damage - self.damage_reduction)
+        self.hp -= taken
+        self.events.emit(EventKind.PLAYER_DAMAGED, self.name, taken, self.hp)
 
     def heal(self, amount: int):
         self.hp += amount
-        print(f"{self.name} heals {amount} and is now at {self.hp} HP.")
+        self.events.emit(EventKind.PLAYER_HEALED, self.name, amount, self.hp)
 
-    def play_card_to_battlefield(self, card_name: str):
+    def play_card_to_battlefield(self, card_name: str) -> Optional[CardInstance]:
+        """
+        Play a card from the hand onto the battlefield, paying its cost.
+
+        :param card_name: The name of the card to play.
+        :return: The card that was placed, or None if it could not be played.
+        """
         card = self.hand.place_card(card_name)
         if card:
             if card.card_type == "Resource" and self.land_played:
-                print(f"{self.name} cannot play another land this turn.")
-                self.hand.cards.append(card)  # Return card to hand
+                self.events.emit(EventKind.LAND_ALREADY_PLAYED, self.name)
+                self.hand.add_card(card)  # Return card to hand
             elif card.card_type == "Equipment" and card.attributes.get("Attach", True):
-                print(f"{self.name} cannot play {card_name} directly. It must be attached to a creature.")
-                self.hand.cards.append(card)  # Return card to hand
+                self.events.emit(EventKind.MUST_ATTACH, self.name, card_name)
+                self.hand.add_card(card)  # Return card to hand
             else:
-                if self.can_pay_cost(card.cost):
-                    self.pay_cost(card.cost)
+                if self.pay_cost(card.cost_vector):
                     if card.card_type == "Resource":
                         self.land_played = True
-                        for resource_type, amount in card.attributes.items():
-                            self.resource_pool[resource_type] += amount
-                    self.battlefield.append(card)
-                    if card.card_type == "Trap":
-                        self.traps.append(card)  # Add the trap to the player's traps list
-                    print(f"{self.name} placed {card} onto the battlefield.")
+                        self.pool += unit(card.resource_type, card.amount)
+                    self.enter_battlefield(card)
+                    self.count_play(card)
+                    self.events.emit(EventKind.CARD_ENTERED_BATTLEFIELD, self.name, card)
+                    return card
                 else:
-                    print(f"{self.name} cannot pay the cost for {card_name}.")
-                    self.hand.cards.append(card)  # Return card to hand
+                    self.events.emit(EventKind.COST_UNPAID, self.name, card_name)
+                    self.hand.add_card(card)  # Return card to hand
+        return None
+
+    def attach_equipment(self, equipment_name: str, target_name: str) -> bool:
+        """
+        Attach an equipment card from the hand to a creature on the battlefield.
 
-    def attach_equipment(self, equipment_name: str, target_creature: Card):
+        :param equipment_name: The name of the equipment in the hand.
+        :param target_name: The name of the creature on the battlefield.
+        :return: True if the equipment was attached.
+        """
         equipment = self.hand.place_card(equipment_name)
-        if equipment and isinstance(equipment, Equipment):
-            if equipment.cost <= self.current_mana:
-                self.current_mana -= equipment.cost
-                target_creature.attributes['attack'] += equipment.effects.get('attack', 0)
-                target_creature.attributes['defense'] += equipment.effects.get('defense', 0)
-                print(f"{equipment.name} attached to {target_creature.name}, giving it {equipment.effects}.")
-            else:
-                print(f"Not enough mana to attach {equipment.name}.")
-                self.hand.cards.append(equipment)  # Return the card to hand
+        if not equipment or equipment.card_type != "Equipment":
+            self.events.emit(EventKind.EQUIPMENT_NOT_IN_HAND, self.name, equipment_name)
+            if equipment:
+                self.hand.add_card(equipment)  # Return the card to hand
+            return False
+
+        target_creature = next((card for card in self.creatures if card.name == target_name), None)
+        if not target_creature:
+            self.events.emit(EventKind.TARGET_NOT_ON_BATTLEFIELD, target_name)
+            self.hand.add_card(equipment)  # Return the card to hand
+            return False
+
+        if not self.pay_cost(equipment.cost_vector):
+            self.events.emit(EventKind.COST_UNPAID, self.name, equipment.name)
+            self.hand.add_card(equipment)  # Return the card to hand
+            return False
+
+        equipment.attach_to(target_creature, self.events)
+        self.enter_battlefield(equipment)
+        self.count_play(equipment)
+        return True
 
     def use_equipment_on_self(self, equipment_name: str):
         equipment = self.hand.place_card(equipment_name)
-        if equipment and isinstance(equipment, Equipment):
-            if equipment.cost <= self.current_mana:
-                self.current_mana -= equipment.cost
-                self.apply_effects(equipment.effects)
+        if equipment and equipment.card_type == "Equipment":
+            if self.pay_cost(equipment.cost_vector):
+                self.count_play(equipment)
+                equipment.definition.effect.run(self, None, self)
                 if equipment.single_use:
                     self.graveyard.append(equipment)
-                    print(f"{equipment.name} used on {self.name}, applying effects {equipment.effects}. Moved to graveyard.")
+                    self.events.emit(EventKind.EQUIPMENT_USED, equipment.name, self.name, equipment.effects)
             else:
-                print(f"Not enough mana to use {equipment.name}.")
-                self.hand.cards.append(equipment)  # Return the card to hand
+                self.events.emit(EventKind.COST_UNPAID, self.name, equipment.name)
+                self.hand.add_card(equipment)  # Return the card to hand
                 
     def check_creatures(self):
         """
         Check if any creatures have 0 or less HP and move them to the graveyard.
         """
-        to_remove = [creature for creature in self.battlefield if isinstance(creature, Creature) and creature.hp <= 0]
+        to_remove = [creature for creature in self.creatures if creature.hp <= 0]
         for creature in to_remove:
-            self.battlefield.remove(creature)
+            for equipment in creature.attachments:
+                equipment.handle_revival(self)
+            if creature.hp > 0:
+                continue
+            self.leave_battlefield(creature)
             self.graveyard.append(creature)
-            print(f"{creature.name} has 0 or less HP and is moved to the graveyard.")
+            self.events.emit(EventKind.CREATURE_DESTROYED, creature.name)
+            # Remove attached equipment and move to graveyard
+            for equipment in creature.attachments:
+                equipment.detach()
+                self.leave_battlefield(equipment)
+                self.graveyard.append(equipment)
+                self.events.emit(EventKind.EQUIPMENT_TO_GRAVEYARD, equipment.name, creature.name)
 
     def apply_effects(self, effects: dict):
-        if 'heal' in effects:
-            self.hp += effects['heal']
-            print(f"{self.name} heals for {effects['heal']} HP.")
+        """Apply equipment effects such as {"heal": 5} to this player; cards apply their own compiled effect instead."""
+        equipment_effect(self.name, effects).run(self, None, self)
 
-    def activate_technology(self, technology_name: str, game_state):
+    def activate_technology(self, technology_name: str, game_state) -> bool:
+        """
+        Activate a technology card from the hand, paying its cost.
+
+        :param technology_name: The name of the technology in the hand.
+        :param game_state: The game the technology is activated in.
+        :return: True if the technology was activated.
+        """
         technology = self.hand.place_card(technology_name)
-        if technology and isinstance(technology, Technologies):
-            if technology.cost['mana'] <= self.current_mana:
-                self.current_mana -= technology.cost['mana']
-                self.resolve_technology_effect(technology, game_state)
-                if technology.single_use:
-                    self.graveyard.append(technology)
-                    print(f"{technology.name} activated and moved to graveyard.")
-            else:
-                print(f"Not enough mana to activate {technology.name}.")
-                self.hand.cards.append(technology)  # Return the card to hand
+        if not technology or technology.card_type != "Technologies":
+            self.events.emit(EventKind.TECHNOLOGY_NOT_IN_HAND, self.name, technology_name)
+            if technology:
+                self.hand.add_card(technology)  # Return the card to hand
+            return False
+
+        if not self.pay_cost(technology.cost_vector):
+            self.events.emit(EventKind.COST_UNPAID, self.name, technology.name)
+            self.hand.add_card(technology)  # Return the card to hand
+            return False
+
+        self.count_play(technology)
+        self.resolve_technology_effect(technology, game_state)
+        if technology.single_use:
+            self.graveyard.append(technology)
+            self.events.emit(EventKind.TECHNOLOGY_SPENT, technology.name)
+        return True
 
     def resolve_technology_effect(self, technology, game_state):
-        if technology.spell_effect == "enemy player takes 5 damage":
-            game_state.opponent.take_damage(5)
-        elif technology.spell_effect == "Owner takes -2 damage from all sources":
-            self.damage_reduction = 2
-            print(f"{self.name} now takes -2 damage from all sources.")
+        technology.definition.effect.run(self, opponent_of(game_state, self), None)
 
     def check_dead_creatures(self):
-        for card in self.battlefield[:]:
-            if card.card_type == "Creature" and card.attributes.get('hp', 0) <= 0:
-                print(f"{card.name} has died.")
-                self.battlefield.remove(card)
-                self.graveyard.append(card)
-                # Remove attached equipment and move to graveyard
-                for equip in card.attributes.get('equipped', []):
-                    print(f"{equip.name} attached to {card.name} has been moved to the graveyard.")
-                    self.graveyard.append(equip)
+        self.check_creatures()
     
     def reset_land_played(self):
         self.land_played = False
@@ -133,56 +335,98 @@ class Player:
         if self.mana < self.max_mana:
             self.mana += 1
         self.current_mana = self.mana
-        print(f"{self.name} now has {self.mana} max mana and {self.current_mana} current mana.")
+        self.events.emit(EventKind.MANA_INCREASED, self.name, self.mana, self.current_mana)
+
+    @property
+    def current_mana(self) -> int:
+        """The Common mana left this turn, kept in the Common lane of the pool."""
+        return self.pool & LANE_MASK
 
-    def use_mana(self, cost: dict) -> bool:
-        if not isinstance(cost, dict):
-            print("Invalid cost format. Cost must be a dictionary.")
+    @current_mana.setter
+    def current_mana(self, value: int):
+        self.pool = set_lane(self.pool, "Common", value)
+
+    @property
+    def resource_pool(self) -> Dict[str, int]:
+        """A copy of the resource lanes of the pool, keyed by resource type."""
+        return to_dict(self.pool, RESOURCE_TYPES)
+
+    def _cost_vector(self, cost) -> Optional[int]:
+        """Accept a compiled mana vector or a cost dictionary and return the vector."""
+        if isinstance(cost, int):
+            return cost
+        if isinstance(cost, Mapping):
+            return compile_cost(cost)
+        self.events.emit(EventKind.INVALID_COST)
+        return None
+
+    def use_mana(self, cost) -> bool:
+        """Spend the Common part of a cost."""
+        vector = self._cost_vector(cost)
+        if vector is None:
             return False
 
-        common_cost = cost.get("Common", 0)
-        if self.current_mana >= common_cost:
-            self.current_mana -= common_cost
-            print(f"{self.name} used {common_cost} common mana, {self.current_mana} remaining.")
+        common_cost = vector & LANE_MASK
+        if self.pool & LANE_MASK >= common_cost:
+            self.pool -= common_cost
+            self.events.emit(EventKind.COMMON_MANA_USED, self.name, common_cost, self.pool & LANE_MASK)
             return True
-        print(f"{self.name} does not have enough common mana. {self.current_mana} available, {common_cost} needed.")
+        self.events.emit(EventKind.COMMON_MANA_SHORT, self.name, self.pool & LANE_MASK, common_cost)
         return False
 
-    def use_resource_mana(self, cost: dict) -> bool:
-        if not isinstance(cost, dict):
-            print("Invalid cost format. Cost must be a dictionary.")
+    def use_resource_mana(self, cost) -> bool:
+        """Spend the resource part of a cost."""
+        vector = self._cost_vector(cost)
+        if vector is None:
             return False
 
-        for resource_type, amount in cost.items():
-            if resource_type != "Common" and self.resource_pool.get(resource_type, 0) < amount:
-                print(f"{self.name} does not have enough {resource_type} mana. {self.resource_pool.get(resource_type, 0)} available, {amount} needed.")
-                return False
-        for resource_type, amount in cost.items():
-            if resource_type != "Common":
-                self.resource_pool[resource_type] -= amount
-        print(f"{self.name} used resource mana: {cost}. Remaining pool: {self.resource_pool}.")
+        vector &= ~LANE_MASK
+        if not can_afford(self.pool, vector):
+            for resource_type in RESOURCE_TYPES:
+                available, needed = get_lane(self.pool, resource_type), get_lane(vector, resource_type)
+                if available < needed:
+                    self.events.emit(EventKind.RESOURCE_MANA_SHORT, self.name, resource_type, available, needed)
+                    return False
+        self.pool -= vector
+        self.events.emit(EventKind.RESOURCE_MANA_USED, self.name, vector)
         return True
 
-    def can_pay_cost(self, cost: dict) -> bool:
-        if not isinstance(cost, dict):
-            print("Invalid cost format. Cost must be a dictionary.")
-            return False
+    def can_pay_cost(self, cost) -> bool:
+        """
+        Check whether the pool covers a cost.
 
-        common_cost = cost.get("Common", 0)
-        if self.current_mana < common_cost:
+        :param cost: A mana vector such as card.cost_vector, or a cost dictionary.
+        """
+        vector = cost if isinstance(cost, int) else self._cost_vector(cost)
+        return vector is not None and can_afford(self.pool, vector)
+
+    def pay_cost(self, cost) -> bool:
+        """
+        Pay a cost from the pool with a single vector subtraction.
+
+        :param cost: A mana vector such as card.cost_vector, or a cost dictionary.
+        :return: True if the cost was paid.
+        """
+        vector = cost if isinstance(cost, int) else self._cost_vector(cost)
+        if vector is None or not can_afford(self.pool, vector):
             return False
-        for resource_type, amount in cost.items():
-            if resource_type != "Common" and self.resource_pool.get(resource_type, 0) < amount:
-                return False
+
+        self.pool -= vector
+        if vector & LANE_MASK:
+            self.events.emit(EventKind.COMMON_MANA_USED, self.name, vector & LANE_MASK, self.pool & LANE_MASK)
+        if vector >> LANE_BITS:
+            self.events.emit(EventKind.RESOURCE_MANA_USED, self.name, vector & ~LANE_MASK)
         return True
 
-    def pay_cost(self, cost: dict):
-        if not isinstance(cost, dict):
-            print("Invalid cost format. Cost must be a dictionary.")
-            return False
+    def playable_cards(self) -> List[CardInstance]:
+        """
+        Get the cards in the hand whose cost the pool covers.
 
-        self.use_mana({"Common": cost.get("Common", 0)})
-        self.use_resource_mana({k: v for k, v in cost.items() if k != "Common"})
+        Every card is checked with the same guarded pool, so this is one vector
+        compare per card and no per-mana-type loop.
+        """
+        guarded = self.pool | GUARD_BITS
+        return [card for card in self.hand.cards if (guarded - card.cost_vector) & GUARD_BITS == GUARD_BITS]
 
     def untap_resource(self, resource_type: str):
         """
@@ -190,18 +434,17 @@ class Player:
 
         :param resource_type: The type of resource to untap.
         """
-        if resource_type in self.resource_pool:
-            # Count the number of cards on the battlefield that have the resource_type attribute
-            num_cards_with_attribute = sum(1 for card in self.battlefield if resource_type in card.attributes)
+        if resource_type in RESOURCE_TYPES:
+            available = self.resource_counts.get(resource_type, 0)
             
-            # Update resource pool only if the count is different
-            if self.resource_pool[resource_type] != num_cards_with_attribute:
-                self.resource_pool[resource_type] = num_cards_with_attribute
-                print(f"{self.name} untapped {resource_type}. Remaining pool: {self.resource_pool}.")
+            # Update resource pool only if the amount is different
+            if get_lane(self.pool, resource_type) != available:
+                self.pool = set_lane(self.pool, resource_type, available)
+                self.events.emit(EventKind.RESOURCE_UNTAPPED, self.name, resource_type, available)
             else:
-                print(f"{self.name} already has {resource_type} untapped. No change needed.")
+                self.events.emit(EventKind.RESOURCE_ALREADY_UNTAPPED, self.name, resource_type)
         else:
-            print(f"{self.name} does not have {resource_type} to untap.")
+            self.events.emit(EventKind.RESOURCE_UNKNOWN, self.name, resource_type)
 
 
     def get_resource_pool(self) -> Dict[str, int]:
@@ -239,7 +482,7 @@ class Player:
         self.play_card_to_battlefield(card_name)
 
 
-    def get_battlefield(self) -> List[Card]:
+    def get_battlefield(self) -> List[CardInstance]:
         """
         Get the current cards on the battlefield.
         
@@ -0,0 +1,157 @@
+import functools
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, TextIO, Tuple
+
+# The model methods a profiler times in addition to the phases of play_turn
+GAME_METHODS = ("trigger_upkeep", "check_traps_on_card_placed", "check_traps_on_attack", "resolve_action", "declare_attackers")
+PLAYER_METHODS = ("check_creatures", "play_card_to_battlefield", "attach_equipment", "activate_technology")
+
+class Profiler:
+    """
+    Opt-in instrumentation for games: wall time, CPU time, call counts and
+    allocation deltas per phase of Gamestate.play_turn and per model method.
+
+    A game without a profiler only checks that Gamestate.profiler is None
+    once per phase; the model methods are wrapped on the instances of the
+    games a profiler is attached to, so nothing else pays for it. One profiler
+    can be attached to many games to profile a batch.
+
+    A profiler that records allocations started tracemalloc unless it was
+    already tracing, and stops it again when closed; use it as a context
+    manager or call close() once done with it.
+    """
+
+    def __init__(self, allocations: bool = False):
+        """
+        :param allocations: Also record the change in traced memory of every call, starting tracemalloc if needed.
+        """
+        self.allocations = allocations
+        # Totals by call path: [calls, wall, cpu, allocated, wall spent in nested calls]
+        self.stats: Dict[Tuple[str, ...], List[float]] = {}
+        self._path: List[str] = []
+        self._frames: List[List[float]] = []
+        # Only tracing started here is stopped by close, so an outer tracemalloc user keeps its trace
+        self._started_tracing = allocations and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def close(self):
+        """Stop tracemalloc if this profiler started it; the recorded stats stay readable."""
+        if self._started_tracing:
+            self._started_tracing = False
+            tracemalloc.stop()
+
+    def __enter__(self) -> "Profiler":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def attach(self, game):
+        """Start profiling a game and the methods of its players."""
+        game.profiler = self
+        for name in GAME_METHODS:
+            setattr(game, name, self.wrap(name, getattr(game, name)))
+        for player in (game.player1, game.player2):
+            for name in PLAYER_METHODS:
+                setattr(player, name, self.wrap(name, getattr(player, name)))
+
+    @staticmethod
+    def detach(game):
+        """Stop profiling a game, removing the wrapped methods."""
+        game.profiler = None
+        for name in GAME_METHODS:
+            game.__dict__.pop(name, None)
+        for player in (game.player1, game.player2):
+            for name in PLAYER_METHODS:
+                player.__dict__.pop(name, None)
+
+    def wrap(self, name: str, method):
+        """Wrap a bound method so every call is recorded under name."""
+        @functools.wraps(method)
+        def profiled(*args, **kwargs):
+            self.start(name)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.stop()
+        return profiled
+
+    def start(self, name: str):
+        self._path.append(name)
+        allocated = tracemalloc.get_traced_memory()[0] if self.allocations else 0
+        self._frames.append([time.perf_counter(), time.process_time(), allocated, 0.0])
+
+    def stop(self):
+        wall_start, cpu_start, allocated_start, nested = self._frames.pop()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        allocated = tracemalloc.get_traced_memory()[0] - allocated_start if self.allocations else 0
+
+        path = tuple(self._path)
+        self._path.pop()
+        totals = self.stats.get(path)
+        if totals is None:
+            totals = self.stats[path] = [0, 0.0, 0.0, 0, 0.0]
+        totals[0] += 1
+        totals[1] += wall
+        totals[2] += cpu
+        totals[3] += allocated
+        totals[4] += nested
+        if self._frames:
+            self._frames[-1][3] += wall
+
+    @contextmanager
+    def measure(self, name: str):
+        """Record the code in a with block under name."""
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def reset(self):
+        self.stats.clear()
+
+    def report(self) -> List[dict]:
+        """
+        Totals by phase or method name, over every path it was called from, slowest first.
+
+        Times are in seconds and allocations in bytes; self_wall excludes nested recorded calls.
+        """
+        by_name: Dict[str, dict] = {}
+        for path, (calls, wall, cpu, allocated, nested) in self.stats.items():
+            name = path[-1]
+            entry = by_name.setdefault(name, {"name": name, "calls": 0, "wall": 0.0, "self_wall": 0.0, "cpu": 0.0, "allocated": 0})
+            entry["calls"] += calls
+            entry["self_wall"] += wall - nested
+            entry["allocated"] += allocated
+            # A name nested inside itself would otherwise be counted twice
+            if name not in path[:-1]:
+                entry["wall"] += wall
+                entry["cpu"] += cpu
+        return sorted(by_name.values(), key=lambda entry: entry["wall"], reverse=True)
+
+    def summary(self) -> str:
+        lines = [f"{'name':<28}{'calls':>10}{'wall ms':>12}{'self ms':>12}{'cpu ms':>12}{'alloc KiB':>12}"]
+        for entry in self.report():
+            lines.append(f"{entry['name']:<28}{entry['calls']:>10}{entry['wall'] * 1000:>12.2f}{entry['self_wall'] * 1000:>12.2f}"
+                         f"{entry['cpu'] * 1000:>12.2f}{entry['allocated'] / 1024:>12.1f}")
+        return "\n".join(lines)
+
+    def write_collapsed(self, stream: TextIO):
+        """
+        Write the profile in the collapsed stack format read by flamegraph.pl,
+        speedscope and similar tools: one "turn;Main1;resolve_action <microseconds>" line per call path, by self time.
+        """
+        for path, (calls, wall, cpu, allocated, nested) in sorted(self.stats.items()):
+            microseconds = int(round((wall - nested) * 1e6))
+            if microseconds > 0:
+                stream.write(f"{';'.join(path)} {microseconds}\n")
+
+    def dump(self, path: str):
+        """Write the collapsed profile to a file."""
+        with open(path, "w") as stream:
+            self.write_collapsed(stream)
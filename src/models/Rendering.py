@@ -0,0 +1,113 @@
+import weakref
+from collections import OrderedDict
+from typing import Iterable, List, Mapping, NamedTuple
+from Card import CardDefinition, CardInstance, registry
+
+# The most instance states whose lines are kept; states repeat (hp values, tapped, the same equipment), so this is plenty
+DEFAULT_STATE_CACHE = 4096
+
+class CardFragment(NamedTuple):
+    """The rendering of a card definition, the same for every copy of the card."""
+    name: str
+    line: str  # One line for lists: name, type, cost and what the card does
+    text: str  # The full text of the card, str(definition)
+
+# Rendered once per definition; definitions that are no longer registered or in a game are dropped
+_fragments: "weakref.WeakKeyDictionary[CardDefinition, CardFragment]" = weakref.WeakKeyDictionary()
+_states: "OrderedDict[tuple, str]" = OrderedDict()
+
+def format_cost(cost: Mapping[str, int]) -> str:
+    amounts = [f"{amount} {mana_type}" for mana_type, amount in cost.items() if amount]
+    return ", ".join(amounts) if amounts else "free"
+
+def _summary(definition: CardDefinition) -> str:
+    card_type = definition.card_type
+    if card_type == "Creature":
+        return f"{definition.attributes.get('attack', 0)} attack, {definition.hp} HP"
+    if card_type == "Resource":
+        return f"+{definition.amount} {definition.resource_type}"
+    if card_type == "Trap":
+        return f"springs when {definition.trigger_condition.lower()}"
+    if card_type == "Equipment":
+        return ", ".join(f"{key}: {value}" for key, value in definition.effects.items())
+    if card_type == "Technologies":
+        return ", ".join(f"{key}: {value}" for key, value in definition.spell_effect.items())
+    return ", ".join(f"{key}: {value}" for key, value in definition.attributes.items())
+
+def fragment(definition: CardDefinition) -> CardFragment:
+    """The rendering of a card definition, made the first time it is asked for."""
+    cached = _fragments.get(definition)
+    if cached is None:
+        summary = _summary(definition)
+        line = f"**{definition.name}** · {definition.card_type} · {format_cost(definition.cost)}" + (f" · {summary}" if summary else "")
+        cached = _fragments[definition] = CardFragment(definition.name, line, str(definition))
+    return cached
+
+def card_line(card) -> str:
+    """
+    One line describing a card definition or a copy of one in a game.
+
+    A copy in the state the card starts in is described by its definition's
+    cached line; hp, being tapped and attachments are added after it, and the
+    result is cached by that state, so a board that did not change renders
+    without formatting anything.
+    """
+    if not isinstance(card, CardInstance):
+        return fragment(card).line
+    definition = card.definition
+    if card.hp == definition.hp and not card.tapped and not card.attachments:
+        return fragment(definition).line
+    key = (definition, card.hp, card.tapped, tuple(equipment.definition for equipment in card.attachments))
+    line = _states.get(key)
+    if line is not None:
+        _states.move_to_end(key)
+        return line
+    parts = [fragment(definition).line]
+    if card.hp != definition.hp:
+        parts.append(f"{card.hp}/{definition.hp} HP")
+    if card.tapped:
+        parts.append("tapped")
+    if card.attachments:
+        parts.append("equipped with " + ", ".join(equipment.name for equipment in card.attachments))
+    line = _states[key] = " · ".join(parts)
+    if len(_states) > DEFAULT_STATE_CACHE:
+        _states.popitem(last=False)
+    return line
+
+def zone_text(title: str, cards: Iterable, empty: str) -> str:
+    """The full text of every card of a zone under a title, as the console views print it."""
+    lines = [f" - {card}" for card in cards]
+    return "\n".join([title] + lines) if lines else empty
+
+def card_lines(cards: Iterable, numbered: bool = True) -> List[str]:
+    return [f"{number}. {card_line(card)}" if numbered else card_line(card) for number, card in enumerate(cards, 1)]
+
+def battlefield_lines(player, hide_traps: bool = False) -> List[str]:
+    """
+    A player's battlefield: creatures numbered as attacks choose them, with
+    their equipment, then resources by name and traps.
+
+    :param hide_traps: Show only how many traps are set, as the opponent sees them.
+    """
+    lines = card_lines(player.creatures)
+    resources = {}
+    for copies in player.resources.values():
+        for card in copies:
+            resources[card.name] = resources.get(card.name, 0) + 1
+    if resources:
+        lines.append("Resources: " + ", ".join(name if count == 1 else f"{name} ×{count}" for name, count in resources.items()))
+    traps = [card for card in player.traps if not card.triggered]
+    if traps and hide_traps:
+        lines.append(f"{len(traps)} face-down trap{'s' if len(traps) != 1 else ''}")
+    elif traps:
+        lines.extend(card_line(card) for card in traps)
+    return lines
+
+def collection_lines(counts: Mapping[str, int]) -> List[str]:
+    """A collection by card id, sorted by card name; cards that are not registered are listed by their id."""
+    entries = []
+    for card_id, count in counts.items():
+        definition = registry.get(card_id)
+        entries.append((definition.name if definition else card_id, count, card_line(definition) if definition else card_id))
+    entries.sort()
+    return [f"{count}× {line}" for _, count, line in entries]
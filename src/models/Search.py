@@ -0,0 +1,285 @@
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from Agent import GreedyAgent, PlayerAgent, RandomAgent
+
+class SearchStats(NamedTuple):
+    """How much work the last decision of an MCTSAgent took."""
+    rollouts: int
+    elapsed: float
+
+    @property
+    def rollouts_per_second(self) -> float:
+        return self.rollouts / self.elapsed if self.elapsed else 0.0
+
+class _Node:
+    """A node of the search tree: the statistics of one decision of the searching player."""
+    __slots__ = ("visits", "value", "children")
+
+    def __init__(self):
+        self.visits = 0
+        self.value = 0.0
+        self.children: Dict[tuple, "_Node"] = {}
+
+class _TreeAgent(PlayerAgent):
+    """
+    The agent a rollout installs for the searching player.
+
+    While the rollout is inside the tree it picks decisions by UCB1, adds one
+    new node the first time it reaches an untried decision, and from then on
+    plays like the rollout policy. The tree is open-loop: nodes are keyed by
+    the decisions taken, not by the states reached, since drawing makes the
+    same decisions lead to different states.
+    """
+
+    def __init__(self, root: _Node, policy: RandomAgent, rng: random.Random, exploration: float):
+        self.node: Optional[_Node] = root
+        self.path: List[_Node] = [root]
+        self.policy = policy
+        self.rng = rng
+        self.exploration = exploration
+
+    def select(self, keys: List[tuple]) -> Optional[tuple]:
+        """
+        Pick one of the decisions available at the current node and descend into it.
+
+        :return: The decision, or None once the rollout has left the tree.
+        """
+        node = self.node
+        if node is None:
+            return None
+        untried = [key for key in keys if key not in node.children]
+        if untried:
+            key = self.rng.choice(untried)
+            child = node.children[key] = _Node()
+            self.node = None
+        else:
+            log_visits = math.log(node.visits or 1)
+            key = max(keys, key=lambda key: _ucb(node.children[key], log_visits, self.exploration))
+            child = self.node = node.children[key]
+        self.path.append(child)
+        return key
+
+    def choose_action(self, game_state, player) -> tuple:
+        key = self.select(self.policy.legal_actions(game_state, player))
+        return key if key is not None else self.policy.choose_action(game_state, player)
+
+    def select_attackers(self, game_state, player, valid_attackers: List) -> List:
+        key = self.select(attack_plans(valid_attackers))
+        if key is None:
+            return self.policy.select_attackers(game_state, player, valid_attackers)
+        return [valid_attackers[index] for index in key]
+
+    def activate_trap(self, game_state, player, trap, target) -> bool:
+        return should_activate_trap(trap, target)
+
+    def choose_discard(self, game_state, player):
+        return self.policy.choose_discard(game_state, player)
+
+def _ucb(node: _Node, log_parent_visits: float, exploration: float) -> float:
+    return node.value / node.visits + exploration * math.sqrt(log_parent_visits / node.visits)
+
+def attack_plans(valid_attackers: List) -> List[Tuple[int, ...]]:
+    """
+    The attacks a search considers, as tuples of indexes into valid_attackers.
+
+    Trying every subset grows too fast, so a search chooses between attacking
+    with everything, holding everything back, and holding back one creature.
+    """
+    everyone = tuple(range(len(valid_attackers)))
+    plans = [everyone, ()]
+    if len(everyone) > 1:
+        plans.extend(everyone[:index] + everyone[index + 1:] for index in everyone)
+    return plans
+
+def should_activate_trap(trap, target) -> bool:
+    """
+    Decide a trap prompt without searching: fire a damage trap only when it
+    destroys at least one target or hits several attackers, and fire any other
+    trap straight away.
+    """
+    if trap.effect_name != "deal_damage":
+        return True
+    targets = target if isinstance(target, list) else [target]
+    damage = trap.attributes.get("damage", 0)
+    return len(targets) > 1 or any(0 < card.hp <= damage for card in targets)
+
+def _determinize(game, searcher, rng: random.Random):
+    """
+    Replace what the searching player cannot know by a random guess: the order
+    of both decks and the cards in the opponent's hand.
+    """
+    for player in (game.player1, game.player2):
+        if player is searcher:
+            player.deck.shuffle(rng)
+            continue
+        hidden = list(player.hand.cards) + list(player.deck.snapshot())
+        rng.shuffle(hidden)
+        size = len(player.hand.cards)
+        player.hand.restore((tuple(hidden[:size]), tuple(hidden[:size])))
+        player.deck.restore(tuple(hidden[size:]))
+
+def _evaluate(game, searcher) -> float:
+    """Score a finished rollout for the searching player: 1 for a win, 0 for a loss, otherwise by the HP lead."""
+    opponent = game.player2 if searcher is game.player1 else game.player1
+    if opponent.hp <= 0 < searcher.hp:
+        return 1.0
+    if searcher.hp <= 0:
+        return 0.0
+    return min(1.0, max(0.0, 0.5 + (searcher.hp - opponent.hp) / 80))
+
+def _resume_main(game, key: tuple):
+    if not game.resolve_action(key):
+        game.perform_actions()
+    game.next_phase()
+
+def _resume_combat(game, key: tuple):
+    attackers = [list(game.current_player.creatures)[index] for index in key]
+    if attackers:
+        game.declare_attackers(attackers)
+    game.next_phase()
+
+RESUME: Dict[str, Callable] = {
+    "main": _resume_main,
+    "combat": _resume_combat,
+}
+
+def search(game, searcher_is_player1: bool, decision: str, keys: List[tuple], rollouts: int, deadline: float,
+           rollout_turns: int, exploration: float, seed: int) -> Dict[tuple, Tuple[int, float]]:
+    """
+    Run MCTS from a game paused at one of the searching player's decisions.
+
+    The game must be a clone whose agents are all rollout policies; every
+    rollout clones it again, so it is never modified.
+
+    :param decision: The kind of decision, a key of RESUME.
+    :param keys: The decisions available at the root.
+    :param rollouts: The most rollouts to run.
+    :param deadline: The time.monotonic() value at which to stop.
+    :param rollout_turns: How many turns a rollout plays before it is scored.
+    :return: The visits and total value of every root decision.
+    """
+    rng = random.Random(seed)
+    root = _Node()
+    resume = RESUME[decision]
+
+    for _ in range(rollouts):
+        if time.monotonic() >= deadline:
+            break
+        rollout = game.clone()
+        player = rollout.player1 if searcher_is_player1 else rollout.player2
+        _determinize(rollout, player, rng)
+        agent = player.agent = _TreeAgent(root, player.agent, rng, exploration)
+
+        resume(rollout, agent.select(keys))
+        rollout.play_turn()
+        rollout.start_game(max_turns=rollout.turn_counter + rollout_turns)
+
+        value = _evaluate(rollout, player)
+        for node in agent.path:
+            node.visits += 1
+            node.value += value
+
+    return {key: (child.visits, child.value) for key, child in root.children.items()}
+
+def _search_worker(args: tuple) -> Dict[tuple, Tuple[int, float]]:
+    return search(*args)
+
+class MCTSAgent(GreedyAgent):
+    """
+    A computer opponent that decides its main phase actions and its attacks by
+    Monte Carlo Tree Search.
+
+    Every decision searches until either budget runs out: time_budget seconds
+    or rollouts playouts. With more than one worker, the rollouts are split
+    across a process pool, each process searches its own tree from the same
+    position, and their root statistics are added up (root parallelization).
+    Traps are decided by should_activate_trap and discards by the greedy rule.
+    """
+
+    def __init__(self, time_budget: float = 0.25, rollouts: int = 1000, workers: Optional[int] = None,
+                 rollout_turns: int = 10, exploration: float = 1.4, rollout_policy: Optional[RandomAgent] = None,
+                 rng: Optional[random.Random] = None):
+        """
+        :param time_budget: The most seconds one decision may take.
+        :param rollouts: The most rollouts one decision may run, across all workers.
+        :param workers: The number of processes to run rollouts in; defaults to one per core, and 1 searches in this process.
+        :param rollout_turns: How many turns a rollout plays before it is scored by the HP lead.
+        :param exploration: The UCB1 exploration constant.
+        :param rollout_policy: The agent both players follow outside the tree; defaults to a GreedyAgent.
+        """
+        super().__init__(rng)
+        self.time_budget = time_budget
+        self.rollouts = rollouts
+        self.workers = workers or os.cpu_count() or 1
+        self.rollout_turns = rollout_turns
+        self.exploration = exploration
+        self.rollout_policy = rollout_policy or GreedyAgent(random.Random(self.rng.random()))
+        self.last_search: Optional[SearchStats] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        return state
+
+    def close(self):
+        """Shut down the process pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def choose_action(self, game_state, player) -> tuple:
+        actions = self.legal_actions(game_state, player)
+        if len(actions) == 1:
+            return actions[0]
+        return self.decide(game_state, player, "main", actions)
+
+    def select_attackers(self, game_state, player, valid_attackers: List) -> List:
+        if not valid_attackers:
+            return []
+        plan = self.decide(game_state, player, "combat", attack_plans(valid_attackers))
+        return [valid_attackers[index] for index in plan]
+
+    def activate_trap(self, game_state, player, trap, target) -> bool:
+        return should_activate_trap(trap, target)
+
+    def decide(self, game_state, player, decision: str, keys: List[tuple]) -> tuple:
+        """
+        Search a decision and return the root decision that was visited most.
+
+        :param decision: The kind of decision, a key of RESUME.
+        :param keys: The decisions available.
+        """
+        started = time.monotonic()
+        deadline = started + self.time_budget
+        game = game_state.clone()
+        game.player1.agent = game.player2.agent = self.rollout_policy
+        searcher_is_player1 = player is game_state.player1
+        seeds = [self.rng.getrandbits(32) for _ in range(self.workers)]
+
+        if self.workers == 1:
+            results = [search(game, searcher_is_player1, decision, keys, self.rollouts, deadline,
+                              self.rollout_turns, self.exploration, seeds[0])]
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers)
+            share = -(-self.rollouts // self.workers)
+            jobs = [(game, searcher_is_player1, decision, keys, share, deadline, self.rollout_turns, self.exploration, seed)
+                    for seed in seeds]
+            results = list(self._executor.map(_search_worker, jobs))
+
+        totals: Dict[tuple, List[float]] = {}
+        for result in results:
+            for key, (visits, value) in result.items():
+                total = totals.setdefault(key, [0, 0.0])
+                total[0] += visits
+                total[1] += value
+
+        self.last_search = SearchStats(sum(int(total[0]) for total in totals.values()), time.monotonic() - started)
+        if not totals:
+            return keys[0]
+        return max(totals, key=lambda key: (totals[key][0], totals[key][1]))
@@ -0,0 +1,258 @@
+import array
+import random
+import struct
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+from Agent import PlayerAgent
+from Card import CardInstance, registry
+from Deck import Deck
+from Events import EventSink, NULL_SINK
+from Gamestate import Gamestate, GameSnapshot, PHASES
+from Player import Player, PlayerSnapshot
+
+MAGIC = b"DCGS"
+VERSION = 1
+
+# Flags of a card instance
+_TAPPED, _TRIGGERED, _ATTACHED = 1, 2, 4
+# Flags of a game
+_PLAYER1_FIRST, _PLAYER1_WON, _PLAYER2_WON, _HAS_RNG = 1, 2, 4, 8
+_RNG_WORDS = 625
+_PHASE_INDEX = {phase: index for index, phase in enumerate(PHASES)}
+
+class SerializationError(ValueError):
+    """Raised when data cannot be decoded into a game."""
+
+class _Writer:
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def uint(self, value: int):
+        """Write a non-negative integer as a LEB128 varint: seven bits per byte, small numbers in one byte."""
+        buffer = self.buffer
+        while value > 0x7F:
+            buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+        buffer.append(value)
+
+    def int(self, value: int):
+        # Zigzag, so small negative numbers stay small too
+        self.uint(value * 2 if value >= 0 else -value * 2 - 1)
+
+    def string(self, value: str):
+        encoded = value.encode("utf-8")
+        self.uint(len(encoded))
+        self.buffer += encoded
+
+class _Reader:
+    def __init__(self, data: bytes, offset: int = 0):
+        self.data = memoryview(data)
+        self.offset = offset
+
+    def uint(self) -> int:
+        data, offset = self.data, self.offset
+        value = shift = 0
+        try:
+            while True:
+                byte = data[offset]
+                offset += 1
+                value |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+        except IndexError:
+            raise SerializationError("The data ends in the middle of a number.") from None
+        self.offset = offset
+        return value
+
+    def int(self) -> int:
+        value = self.uint()
+        return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+    def bytes(self, length: int) -> bytes:
+        end = self.offset + length
+        if end > len(self.data):
+            raise SerializationError("The data ends in the middle of a field.")
+        value = bytes(self.data[self.offset:end])
+        self.offset = end
+        return value
+
+    def string(self) -> str:
+        return self.bytes(self.uint()).decode("utf-8")
+
+def _zones(player: Player) -> Tuple[tuple, tuple, tuple, tuple]:
+    return player.deck.snapshot(), tuple(player.hand.cards), tuple(player.battlefield), tuple(player.graveyard)
+
+def encode_game(game: Gamestate, rng: bool = True) -> bytes:
+    """
+    Encode a game into a compact, versioned binary form for decode_game.
+
+    Every card definition is written once, by card id, into a table at the
+    start; each card instance is then its index in that table and the few
+    fields of its state, and every zone is a list of instances. Numbers are
+    varints, so a game in progress takes well under a kilobyte, plus 2.5KB for
+    the state of the random generator when rng is True. Agents, the event
+    sink and the undo history are not encoded.
+
+    :param rng: Also encode the state of the game's random generator, so the restored game continues the same way.
+    """
+    players = (game.player1, game.player2)
+    zones = [_zones(player) for player in players]
+    instances: Dict[CardInstance, int] = {}
+    for player_zones in zones:
+        for zone in player_zones:
+            for card in zone:
+                instances[card] = len(instances)
+    definitions: Dict[str, int] = {}
+    for card in instances:
+        definitions.setdefault(card.card_id, len(definitions))
+    for player in players:
+        for card_id in player.card_plays:
+            definitions.setdefault(card_id, len(definitions))
+
+    writer = _Writer()
+    writer.buffer += MAGIC
+    writer.uint(VERSION)
+    writer.uint(len(definitions))
+    for card_id in definitions:
+        writer.string(card_id)
+
+    flags = (_PLAYER1_FIRST if game.current_player is game.player1 else 0) | (_HAS_RNG if rng else 0)
+    if game.winner is not None:
+        flags |= _PLAYER1_WON if game.winner is game.player1 else _PLAYER2_WON
+    writer.uint(flags)
+    writer.uint(_PHASE_INDEX[game.phase])
+    writer.uint(game.turn_counter)
+    if rng:
+        version, internal, gauss = game.rng.getstate()
+        state = array.array("I", internal)
+        if sys.byteorder != "little":
+            state.byteswap()
+        writer.uint(version)
+        writer.buffer += state.tobytes()
+        writer.uint(gauss is not None)
+        if gauss is not None:
+            writer.buffer += struct.pack("<d", gauss)
+
+    writer.uint(len(instances))
+    for card in instances:
+        card_flags = (_TAPPED if card.tapped else 0) | (_TRIGGERED if card.triggered else 0) | (_ATTACHED if card.attached_to is not None else 0)
+        writer.uint(definitions[card.card_id])
+        writer.uint(card_flags)
+        writer.int(card.hp)
+        writer.int(card.damage)
+        writer.uint(len(card.attachments))
+        for equipment in card.attachments:
+            writer.uint(instances[equipment])
+        if card.attached_to is not None:
+            writer.uint(instances[card.attached_to])
+
+    for player, player_zones in zip(players, zones):
+        writer.string(player.name)
+        writer.int(player.discord_id)
+        writer.int(player.hp)
+        writer.uint(player.land_played)
+        writer.int(player.mana)
+        writer.int(player.max_mana)
+        writer.uint(player.pool)
+        writer.int(player.damage_reduction)
+        for zone in player_zones:
+            writer.uint(len(zone))
+        # The order the hand's cards were added in, as slots
+        slots = player.hand.snapshot()[1]
+        hand_slots = {card: slot for slot, card in enumerate(player_zones[1])}
+        for card in slots:
+            writer.uint(hand_slots[card])
+        writer.uint(len(player.card_plays))
+        for card_id, plays in player.card_plays.items():
+            writer.uint(definitions[card_id])
+            writer.uint(plays)
+    return bytes(writer.buffer)
+
+def decode_game(data: bytes, agents: Sequence[Optional[PlayerAgent]] = (None, None), events: Optional[EventSink] = None) -> Gamestate:
+    """
+    Rebuild a game encoded by encode_game.
+
+    The card definitions must be registered (the catalog loaded) before decoding.
+
+    :param agents: The agents of player 1 and player 2; None leaves a ConsoleAgent.
+    :param events: The sink of the restored game; by default it drops every event.
+    :raises SerializationError: If the data is not an encoded game or uses an unknown card.
+    """
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise SerializationError("The data is not an encoded game.")
+    reader = _Reader(data, len(MAGIC))
+    version = reader.uint()
+    if version != VERSION:
+        raise SerializationError(f"Cannot decode version {version} of the game encoding.")
+
+    definitions = []
+    for _ in range(reader.uint()):
+        card_id = reader.string()
+        definition = registry.get(card_id)
+        if definition is None:
+            raise SerializationError(f"Unknown card '{card_id}'.")
+        definitions.append(definition)
+
+    flags = reader.uint()
+    phase = PHASES[reader.uint()]
+    turn_counter = reader.uint()
+    rng_state = None
+    if flags & _HAS_RNG:
+        rng_version = reader.uint()
+        state = array.array("I")
+        # The Mersenne Twister state is 624 words and a position
+        state.frombytes(reader.bytes(_RNG_WORDS * state.itemsize))
+        if sys.byteorder != "little":
+            state.byteswap()
+        gauss = struct.unpack("<d", reader.bytes(8))[0] if reader.uint() else None
+        rng_state = (rng_version, tuple(state), gauss)
+
+    cards: List[CardInstance] = []
+    links = []
+    for _ in range(reader.uint()):
+        card = definitions[reader.uint()].create_instance()
+        card_flags = reader.uint()
+        card.tapped = bool(card_flags & _TAPPED)
+        card.triggered = bool(card_flags & _TRIGGERED)
+        card.hp = reader.int()
+        card.damage = reader.int()
+        attachments = tuple(reader.uint() for _ in range(reader.uint()))
+        attached_to = reader.uint() if card_flags & _ATTACHED else None
+        links.append((attachments, attached_to))
+        cards.append(card)
+    try:
+        for card, (attachments, attached_to) in zip(cards, links):
+            card.attachments = tuple(cards[index] for index in attachments)
+            card.attached_to = cards[attached_to] if attached_to is not None else None
+    except IndexError:
+        raise SerializationError("A card is attached to a card that is not in the game.") from None
+
+    players, snapshots, position = [], [], 0
+    for agent in agents:
+        name, discord_id = reader.string(), reader.int()
+        hp, land_played, mana, max_mana = reader.int(), bool(reader.uint()), reader.int(), reader.int()
+        pool, damage_reduction = reader.uint(), reader.int()
+        zones = []
+        for _ in range(4):
+            size = reader.uint()
+            zones.append(tuple(cards[position:position + size]))
+            position += size
+        deck, hand, battlefield, graveyard = zones
+        order = tuple(hand[reader.uint()] for _ in hand)
+        card_plays = tuple((definitions[reader.uint()].card_id, reader.uint()) for _ in range(reader.uint()))
+        players.append(Player(name, discord_id, Deck(), agent=agent))
+        snapshots.append(PlayerSnapshot(hp, land_played, mana, max_mana, pool, damage_reduction, deck, (hand, order),
+                                        battlefield, graveyard, card_plays))
+    if position != len(cards):
+        raise SerializationError("The zones do not hold every card.")
+
+    game = Gamestate(players[0], players[1], events=NULL_SINK)
+    winner = players[0] if flags & _PLAYER1_WON else players[1] if flags & _PLAYER2_WON else None
+    card_states = tuple((card, card.snapshot()) for card in cards)
+    game.restore(GameSnapshot(phase, turn_counter, bool(flags & _PLAYER1_FIRST), winner,
+                              rng_state or random.Random().getstate(), snapshots[0], snapshots[1], card_states))
+    game.events = events or NULL_SINK
+    for player in players:
+        player.bind_events(game.events)
+    return game
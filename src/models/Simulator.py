@@ -0,0 +1,487 @@
+import random
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from Card import CardDefinition
+from Effects import technology_effect
+from Mana import MANA_INDEX, MANA_TYPES
+from Triggers import ATTACKED, OPPONENT_CARD_PLACED
+
+# Card type codes of the card table
+RESOURCE, CREATURE, TRAP, EQUIPMENT, TECHNOLOGY = range(5)
+TYPE_CODES = {"Resource": RESOURCE, "Creature": CREATURE, "Trap": TRAP, "Equipment": EQUIPMENT, "Technologies": TECHNOLOGY}
+
+MAX_HAND_SIZE = 7
+INITIAL_HAND_SIZE = 8
+STARTING_HP = 40
+STARTING_MANA = 1
+MAX_MANA = 10
+
+class CardTable:
+    """
+    The card definitions of a simulation compiled into arrays indexed by card
+    number, so a rule is one array lookup for every game at once.
+    """
+
+    def __init__(self, definitions: Iterable[CardDefinition]):
+        """
+        :param definitions: Every card that appears in the simulated decks.
+        :raises ValueError: If a card uses a rule the simulator does not implement.
+        """
+        self.definitions: List[CardDefinition] = list(dict.fromkeys(definitions))
+        self.index: Dict[str, int] = {definition.card_id: number for number, definition in enumerate(self.definitions)}
+        size = len(self.definitions)
+
+        self.card_type = np.zeros(size, np.int8)
+        self.cost = np.zeros((size, len(MANA_TYPES)), np.int32)
+        self.cost_sum = np.zeros(size, np.int32)  # What the scripted policy ranks cards by
+        self.hp = np.zeros(size, np.int32)
+        self.attack = np.zeros(size, np.int32)
+        self.resource_lane = np.zeros(size, np.int8)
+        self.resource_amount = np.zeros(size, np.int32)
+        self.placed_trap_damage = np.zeros(size, np.int32)
+        self.attacked_trap_damage = np.zeros(size, np.int32)
+        self.is_placed_trap = np.zeros(size, bool)
+        self.is_attacked_trap = np.zeros(size, bool)
+        self.damage_increase = np.zeros(size, np.int32)
+        self.revival = np.zeros(size, np.int32)
+        self.damage_enemy = np.zeros(size, np.int32)
+        self.reduce_damage = np.zeros(size, np.int32)
+
+        for number, definition in enumerate(self.definitions):
+            if definition.has_upkeep:
+                raise ValueError(f"{definition.name} has an upkeep, which the simulator does not implement.")
+            card_type = TYPE_CODES[definition.card_type]
+            self.card_type[number] = card_type
+            for mana_type, amount in definition.cost.items():
+                self.cost[number, MANA_INDEX[mana_type]] = amount
+            self.cost_sum[number] = sum(definition.cost.values())
+
+            if card_type == CREATURE:
+                self.hp[number] = definition.hp
+                self.attack[number] = definition.attributes.get("attack", 0)
+            elif card_type == RESOURCE:
+                self.resource_lane[number] = MANA_INDEX[definition.resource_type]
+                self.resource_amount[number] = definition.amount
+            elif card_type == TRAP:
+                if definition.effect_name != "deal_damage" or definition.trigger_condition not in (OPPONENT_CARD_PLACED, ATTACKED):
+                    raise ValueError(f"{definition.name} has a trap effect the simulator does not implement.")
+                damage = definition.attributes.get("damage", 0)
+                if definition.trigger_condition == OPPONENT_CARD_PLACED:
+                    self.is_placed_trap[number] = True
+                    self.placed_trap_damage[number] = damage
+                else:
+                    self.is_attacked_trap[number] = True
+                    self.attacked_trap_damage[number] = damage
+            elif card_type == EQUIPMENT:
+                self.damage_increase[number] = definition.effects.get("damage_increase", 0)
+                self.revival[number] = 1 if definition.effects.get("revival") else 0
+            elif card_type == TECHNOLOGY:
+                if definition.effect != technology_effect(definition.name, definition.spell_effect):
+                    raise ValueError(f"{definition.name} has an effect the simulator does not implement.")
+                self.damage_enemy[number] = definition.spell_effect.get("damage_enemy", 0)
+                self.reduce_damage[number] = definition.spell_effect.get("reduce_damage", 0)
+
+    def __len__(self) -> int:
+        return len(self.definitions)
+
+    def encode(self, card_ids: Sequence[str]) -> np.ndarray:
+        """Turn a list of card ids into an array of card numbers."""
+        return np.array([self.index[card_id] for card_id in card_ids], np.int16)
+
+class SimulationResult(NamedTuple):
+    """The outcome of a batch of simulated games."""
+    table: CardTable
+    winners: np.ndarray  # 0 or 1 for the winning player, -1 for games stopped at max_turns
+    turns: np.ndarray  # The turn counter when each game ended
+    first_player: np.ndarray
+    played: np.ndarray  # [game, player, card] number of times each card was played
+    drawn: np.ndarray  # [game, player, card] number of times each card was drawn
+
+    def win_rates(self) -> Dict[str, float]:
+        """The share of games won by each seat, by the player who went first, and stopped without a winner."""
+        games = len(self.winners) or 1
+        return {
+            "player1": float(np.count_nonzero(self.winners == 0)) / games,
+            "player2": float(np.count_nonzero(self.winners == 1)) / games,
+            "first_player": float(np.count_nonzero(self.winners == self.first_player)) / games,
+            "unfinished": float(np.count_nonzero(self.winners < 0)) / games,
+        }
+
+    def card_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-card statistics, keyed by card id: how often each card was drawn
+        and played, and the win rate of the players who played it at least once.
+        """
+        games = np.arange(len(self.winners))
+        played_any = self.played > 0
+        won = np.zeros(played_any.shape[:2], bool)
+        finished = self.winners >= 0
+        won[games[finished], self.winners[finished]] = True
+        played_games = played_any.sum(axis=(0, 1))
+        played_wins = (played_any & won[:, :, None]).sum(axis=(0, 1))
+
+        stats = {}
+        for number, definition in enumerate(self.table.definitions):
+            stats[definition.card_id] = {
+                "drawn": int(self.drawn[:, :, number].sum()),
+                "played": int(self.played[:, :, number].sum()),
+                "games_played": int(played_games[number]),
+                "win_rate_when_played": float(played_wins[number] / played_games[number]) if played_games[number] else 0.0,
+            }
+        return stats
+
+class BatchSimulator:
+    """
+    Plays many games at once, in lockstep, on struct-of-arrays NumPy state.
+
+    Every game of a batch is at the same turn, and every phase of the
+    Gamestate turn cycle is applied to all of them with array operations
+    instead of a Python loop per game. Both players follow the rules of
+    GreedyAgent, the scripted policy of the object engine, including its tie
+    breaks and the hand order they depend on, so a batch reproduces the games
+    the object engine plays from the same decks and first players (see
+    compare_with_engine).
+    """
+
+    def __init__(self, definitions: Iterable[CardDefinition], max_turns: int = 200):
+        """
+        :param definitions: Every card that appears in the simulated decks.
+        :param max_turns: Games still running after this many turns are stopped without a winner.
+        """
+        self.table = CardTable(definitions)
+        self.max_turns = max_turns
+
+    def shuffled_decks(self, deck1: Sequence[str], deck2: Sequence[str], games: int, seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Build a batch of games between two deck lists, each shuffled independently.
+
+        :param deck1: The card ids of the first player's deck.
+        :param deck2: The card ids of the second player's deck.
+        :return: The decks as a [game, player, position] array, top card first, and the first player of every game.
+        """
+        rng = np.random.default_rng(seed)
+        size = max(len(deck1), len(deck2))
+        decks = np.full((games, 2, size), -1, np.int16)
+        for player, deck in enumerate((deck1, deck2)):
+            encoded = self.table.encode(deck)
+            decks[:, player, :len(encoded)] = rng.permuted(np.broadcast_to(encoded, (games, len(encoded))), axis=1)
+        return decks, rng.integers(0, 2, games).astype(np.int8)
+
+    def run(self, decks: np.ndarray, first_player: np.ndarray) -> SimulationResult:
+        """
+        Play a batch of games to the end.
+
+        :param decks: A [game, player, position] array of card numbers, top card first, padded with -1.
+        :param first_player: The player (0 or 1) who takes the first turn of every game.
+        :return: The winners and per-card counters of every game.
+        """
+        state = _BatchState(self.table, np.asarray(decks, np.int16), np.asarray(first_player, np.int8))
+        turn = 1
+        while True:
+            state.check_win_condition(turn)
+            if not state.live.any() or turn > self.max_turns:
+                break
+            state.untap_phase()
+            state.draw_phase(turn)
+            state.main_phase()
+            state.combat_phase()
+            state.main_phase()
+            state.cleanup_step()
+            state.switch_player(turn)
+            turn += 1
+        state.turns[state.live] = turn
+        return SimulationResult(self.table, state.winners, state.turns, state.first_player, state.played, state.drawn)
+
+class _BatchState:
+    """The state of a batch of games, one array per field with the game as the first axis."""
+
+    def __init__(self, table: CardTable, decks: np.ndarray, first_player: np.ndarray):
+        games, _, deck_size = decks.shape
+        creature_slots = max(1, int(np.count_nonzero((decks >= 0) & (table.card_type[np.maximum(decks, 0)] == CREATURE), axis=2).max(initial=0)))
+        hand_slots = INITIAL_HAND_SIZE + 2
+        self.table = table
+        self.games = np.arange(games)
+
+        self.decks = decks
+        self.deck_length = np.count_nonzero(decks >= 0, axis=2)
+        self.deck_position = np.zeros((games, 2), np.int32)
+
+        self.hand = np.full((games, 2, hand_slots), -1, np.int16)
+        self.hand_stamp = np.zeros((games, 2, hand_slots), np.int32)  # The order cards were added, which decides the copy played
+        self.hand_size = np.zeros((games, 2), np.int32)
+        self.next_stamp = np.zeros((games, 2), np.int32)
+
+        self.hp = np.full((games, 2), STARTING_HP, np.int32)
+        self.mana = np.full((games, 2), STARTING_MANA, np.int32)
+        self.pool = np.zeros((games, 2, len(MANA_TYPES)), np.int32)
+        self.pool[:, :, 0] = STARTING_MANA
+        self.resource_counts = np.zeros((games, 2, len(MANA_TYPES)), np.int32)
+        self.resource_seen = np.zeros((games, 2, len(MANA_TYPES)), bool)
+        self.land_played = np.zeros((games, 2), bool)
+        self.damage_reduction = np.zeros((games, 2), np.int32)
+        self.armed_traps = np.zeros((games, 2, len(table)), np.int32)
+
+        # Creatures in the order they entered the battlefield; slots are never reused
+        self.creature_card = np.zeros((games, 2, creature_slots), np.int16)
+        self.creature_hp = np.zeros((games, 2, creature_slots), np.int32)
+        self.creature_bonus = np.zeros((games, 2, creature_slots), np.int32)
+        self.creature_revivals = np.zeros((games, 2, creature_slots), np.int32)
+        self.creature_alive = np.zeros((games, 2, creature_slots), bool)
+        self.creature_count = np.zeros((games, 2), np.int32)
+
+        self.first_player = first_player
+        self.current = first_player.astype(np.int64)
+        self.live = np.ones(games, bool)
+        self.winners = np.full(games, -1, np.int8)
+        self.turns = np.zeros(games, np.int32)
+        self.played = np.zeros((games, 2, len(table)), np.int32)
+        self.drawn = np.zeros((games, 2, len(table)), np.int32)
+
+    def check_win_condition(self, turn: int):
+        """End the games in which a player is at 0 HP; player 1 wins if both are."""
+        over = self.live & (self.hp <= 0).any(axis=1)
+        self.winners[over] = np.where(self.hp[over, 1] <= 0, 0, 1)
+        self.turns[over] = turn
+        self.live &= ~over
+
+    def untap_phase(self):
+        rows = np.nonzero(self.live)[0]
+        players = self.current[rows]
+        seen = self.resource_seen[rows, players]
+        self.pool[rows, players] = np.where(seen, self.resource_counts[rows, players], self.pool[rows, players])
+
+    def draw_card(self, rows: np.ndarray):
+        """Move the top card of the current player's deck into their hand, in every game of rows."""
+        players = self.current[rows]
+        position = self.deck_position[rows, players]
+        rows, players, position = (array[position < self.deck_length[rows, players]] for array in (rows, players, position))
+        card = self.decks[rows, players, position]
+        self.deck_position[rows, players] += 1
+        slot = self.hand_size[rows, players]
+        self.hand[rows, players, slot] = card
+        self.hand_stamp[rows, players, slot] = self.next_stamp[rows, players]
+        self.next_stamp[rows, players] += 1
+        self.hand_size[rows, players] += 1
+        self.drawn[rows, players, card] += 1
+
+    def draw_phase(self, turn: int):
+        rows = np.nonzero(self.live)[0]
+        if turn in (1, 2):
+            for _ in range(INITIAL_HAND_SIZE):
+                rows = rows[self.hand_size[rows, self.current[rows]] < INITIAL_HAND_SIZE]
+                self.draw_card(rows)
+        else:
+            self.draw_card(rows)
+
+    def remove_from_hand(self, rows: np.ndarray, players: np.ndarray, slot: np.ndarray):
+        """Take the card in slot out of the hand, moving the last card into its place like Hand.remove_card."""
+        last = self.hand_size[rows, players] - 1
+        self.hand[rows, players, slot] = self.hand[rows, players, last]
+        self.hand_stamp[rows, players, slot] = self.hand_stamp[rows, players, last]
+        self.hand[rows, players, last] = -1
+        self.hand_size[rows, players] = last
+
+    def main_phase(self):
+        """Play the one action GreedyAgent picks, then the state-based checks that follow it."""
+        table = self.table
+        rows = np.nonzero(self.live)[0]
+        players = self.current[rows]
+        opponents = 1 - players
+
+        hand = self.hand[rows, players]
+        held = hand >= 0
+        cards = np.maximum(hand, 0)
+        card_type = table.card_type[cards]
+        affordable = held & (self.pool[rows, players][:, None, :] >= table.cost[cards]).all(axis=2)
+
+        # A land comes first, and the first playable one in hand order is chosen
+        lands = affordable & (card_type == RESOURCE) & ~self.land_played[rows, players][:, None]
+        has_land = lands.any(axis=1)
+        # Otherwise the most expensive card, with ties going to the earliest in hand order
+        has_creature = self.creature_alive[rows, players].any(axis=1)
+        others = affordable & (card_type != RESOURCE) & ((card_type != EQUIPMENT) | has_creature[:, None])
+        score = np.where(others, table.cost_sum[cards], -1)
+        best = score.argmax(axis=1)
+        slot = np.where(has_land, lands.argmax(axis=1), best)
+        acting = has_land | (score.max(axis=1, initial=-1) >= 0)
+        rows, players, opponents, hand, slot = rows[acting], players[acting], opponents[acting], hand[acting], slot[acting]
+        card = hand[np.arange(len(rows)), slot]
+
+        # Hand.place_card plays the most recently added copy of the chosen card
+        stamps = np.where(hand == card[:, None], self.hand_stamp[rows, players], -1)
+        self.remove_from_hand(rows, players, stamps.argmax(axis=1))
+        self.pool[rows, players] -= table.cost[card]
+        self.played[rows, players, card] += 1
+
+        card_type = table.card_type[card]
+        self.play_resources(*(array[card_type == RESOURCE] for array in (rows, players, card)))
+        self.play_creatures(*(array[card_type == CREATURE] for array in (rows, players, opponents, card)))
+        is_trap = card_type == TRAP
+        self.armed_traps[rows[is_trap], players[is_trap], card[is_trap]] += 1
+        self.attach_equipment(*(array[card_type == EQUIPMENT] for array in (rows, players, card)))
+        is_technology = card_type == TECHNOLOGY
+        self.hp[rows[is_technology], opponents[is_technology]] -= table.damage_enemy[card[is_technology]]
+        self.damage_reduction[rows[is_technology], players[is_technology]] += table.reduce_damage[card[is_technology]]
+
+        self.check_creatures()
+
+    def play_resources(self, rows: np.ndarray, players: np.ndarray, card: np.ndarray):
+        lane, amount = self.table.resource_lane[card], self.table.resource_amount[card]
+        self.land_played[rows, players] = True
+        self.pool[rows, players, lane] += amount
+        self.resource_counts[rows, players, lane] += amount
+        self.resource_seen[rows, players, lane] = True
+
+    def play_creatures(self, rows: np.ndarray, players: np.ndarray, opponents: np.ndarray, card: np.ndarray):
+        slot = self.creature_count[rows, players]
+        self.creature_card[rows, players, slot] = card
+        self.creature_bonus[rows, players, slot] = 0
+        self.creature_revivals[rows, players, slot] = 0
+        self.creature_alive[rows, players, slot] = True
+        self.creature_count[rows, players] += 1
+
+        # GreedyAgent fires every armed trap of the opponent that waits for a creature
+        armed = self.armed_traps[rows, opponents] * self.table.is_placed_trap
+        damage = armed @ self.table.placed_trap_damage
+        self.creature_hp[rows, players, slot] = np.maximum(0, self.table.hp[card] - damage)
+        self.armed_traps[rows, opponents] -= armed
+
+    def attach_equipment(self, rows: np.ndarray, players: np.ndarray, card: np.ndarray):
+        # Attached to the creature that has been on the battlefield longest
+        slot = self.creature_alive[rows, players].argmax(axis=1)
+        self.creature_bonus[rows, players, slot] += self.table.damage_increase[card]
+        self.creature_revivals[rows, players, slot] += self.table.revival[card]
+
+    def check_creatures(self):
+        """Destroy creatures at 0 HP, unless an attached revival equipment brings them back at 1 HP."""
+        dying = self.live[:, None, None] & self.creature_alive & (self.creature_hp <= 0)
+        revived = dying & (self.creature_revivals > 0)
+        self.creature_hp[revived] = 1
+        self.creature_revivals[revived] -= 1
+        self.creature_alive &= ~(dying & ~revived)
+
+    def combat_phase(self):
+        """Attack with every creature, then let the defender's attack traps hit every attacker."""
+        table = self.table
+        rows = np.nonzero(self.live)[0]
+        players = self.current[rows]
+        opponents = 1 - players
+        attackers = self.creature_alive[rows, players]
+        attacking = attackers.any(axis=1)
+        rows, players, opponents, attackers = rows[attacking], players[attacking], opponents[attacking], attackers[attacking]
+
+        attack = (table.attack[self.creature_card[rows, players]] + self.creature_bonus[rows, players]) * attackers
+        self.hp[rows, opponents] -= np.maximum(0, attack.sum(axis=1) - self.damage_reduction[rows, opponents])
+
+        armed = self.armed_traps[rows, opponents] * table.is_attacked_trap
+        damage = armed @ table.attacked_trap_damage
+        hp = self.creature_hp[rows, players]
+        self.creature_hp[rows, players] = np.where(attackers, np.maximum(0, hp - damage[:, None]), hp)
+        self.armed_traps[rows, opponents] -= armed
+
+    def cleanup_step(self):
+        """Discard the most expensive card, earliest in hand order first, until the hand is down to the maximum."""
+        rows = np.nonzero(self.live)[0]
+        while True:
+            players = self.current[rows]
+            rows = rows[self.hand_size[rows, players] > MAX_HAND_SIZE]
+            if not len(rows):
+                break
+            players = self.current[rows]
+            hand = self.hand[rows, players]
+            score = np.where(hand >= 0, self.table.cost_sum[np.maximum(hand, 0)], -1)
+            self.remove_from_hand(rows, players, score.argmax(axis=1))
+
+    def switch_player(self, turn: int):
+        rows = np.nonzero(self.live)[0]
+        self.current[rows] = 1 - self.current[rows]
+        self.land_played[rows, self.current[rows]] = False
+        if turn % 2 == 0:
+            self.mana[rows] = np.minimum(self.mana[rows] + 1, MAX_MANA)
+            self.pool[rows, :, 0] = self.mana[rows]
+
+def play_engine_game(deck1, deck2, seed: int, max_turns: int = 200) -> Tuple[List[str], List[str], int, int, int]:
+    """
+    Play one GreedyAgent game on the object engine, the reference the simulator is checked against.
+
+    :return: Both decks as card ids, top card first, after the game's shuffle; the first player; the winner (-1 for none); and the final turn.
+    """
+    from Agent import GreedyAgent
+    from Gamestate import Gamestate
+    from Player import Player
+
+    player1 = Player("Player 1", 1, deck1, agent=GreedyAgent(random.Random(seed)))
+    player2 = Player("Player 2", 2, deck2, agent=GreedyAgent(random.Random(seed + 1)))
+    game = Gamestate(player1, player2, headless=True, seed=seed)
+    deck1.shuffle(game.rng)
+    deck2.shuffle(game.rng)
+    orders = [card.card_id for card in deck1.cards], [card.card_id for card in deck2.cards]
+    first = 0 if game.current_player is player1 else 1
+    winner = game.start_game(max_turns)
+    return orders[0], orders[1], first, -1 if winner is None else (0 if winner is player1 else 1), game.turn_counter
+
+def compare_with_engine(make_decks: Callable[[], tuple], seeds: Iterable[int], max_turns: int = 200) -> List[int]:
+    """
+    Play a corpus of games on both engines and list the seeds whose outcomes differ.
+
+    :param make_decks: Builds a fresh pair of Decks for every game.
+    :param seeds: The seeds of the corpus.
+    :return: The seeds where the winner or the final turn differs.
+    """
+    seeds = list(seeds)
+    games = [play_engine_game(*make_decks(), seed, max_turns) for seed in seeds]
+    definitions = [card.definition for deck in make_decks() for card in deck.cards]
+    simulator = BatchSimulator(definitions, max_turns)
+
+    size = max(len(order) for game in games for order in game[:2])
+    decks = np.full((len(games), 2, size), -1, np.int16)
+    for number, game in enumerate(games):
+        for player in range(2):
+            decks[number, player, :len(game[player])] = simulator.table.encode(game[player])
+    result = simulator.run(decks, np.array([game[2] for game in games], np.int8))
+
+    return [seed for seed, game, winner, turns in zip(seeds, games, result.winners, result.turns)
+            if (game[3], game[4]) != (winner, turns)]
+
+# Example usage:
+if __name__ == "__main__":
+    import time
+    from Card import Creature, Equipment, Resource, Technologies, Trap
+    from Deck import Deck
+    from Events import NULL_SINK
+
+    pool = [
+        Creature(name="Fire Elemental", attributes={"attack": 6, "defense": 4}, cost={"Common": 3}, hp=5),
+        Creature(name="Holy Angel", attributes={"attack": 2, "defense": 1}, cost={"Common": 1}, hp=5),
+        Technologies(name="Laser Beam", attributes={"single_use": True}, cost={"Common": 2, "Physics": 2}, spell_effect={"damage_enemy": 3}),
+        Technologies(name="Blue Shield Emitter", attributes={"single_use": True}, cost={"Common": 3}, spell_effect={"reduce_damage": 2}),
+        Trap(name="Anti-Personnel Mines", attributes={"damage": 2}, cost={"Common": 3}, trigger_condition="Attacked", effect_name="deal_damage"),
+        Trap(name="Focused Artillery", attributes={"damage": 6}, cost={"Common": 2, "Physics": 1}, trigger_condition="Opponent Card Placed", effect_name="deal_damage"),
+        Equipment(name="Laser Handgun", attributes={"Attach": True}, cost={"Common": 2}, effects={"damage_increase": 3}),
+        Equipment(name="Cyno-Revival Chambers", attributes={"Attach": True}, cost={"Common": 3}, effects={"revival": True}),
+        Resource(name="Physics Lab", resource_type="Physics", amount=1, cost={"Common": 0}),
+        Resource(name="Chemistry Lab", resource_type="Chemistry", amount=1, cost={"Common": 0}),
+    ]
+
+    def make_decks():
+        decks = Deck(), Deck()
+        for deck in decks:
+            deck.events = NULL_SINK
+            for _ in range(5):
+                for definition in pool:
+                    deck.add_card(definition)
+        return decks
+
+    # Check the simulator against the object engine on a shared corpus
+    print(f"Mismatched seeds: {compare_with_engine(make_decks, range(200))}")
+
+    # Then simulate a large batch
+    simulator = BatchSimulator(pool)
+    deck_list = [definition.card_id for definition in pool] * 5
+    decks, first_player = simulator.shuffled_decks(deck_list, deck_list, 100000, seed=1)
+    started = time.perf_counter()
+    result = simulator.run(decks, first_player)
+    print(f"Simulated {len(result.winners)} games in {time.perf_counter() - started:.2f}s")
+    print(result.win_rates())
+    for card_id, stats in result.card_stats().items():
+        print(card_id, stats)
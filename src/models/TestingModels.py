@@ -2,10 +2,7 @@ from Player import *
 from Deck import *
 from Card import *
 from Gamestate import *
-
-# Create example players with decks
-deck1 = Deck()
-deck2 = Deck()
+from Events import CONSOLE
 
 # Add example cards to the decks
 fire_elemental = Creature(name="Fire Elemental", attributes={"attack": 6, "defense": 4, "alive": True, "race": "Elemental"}, cost={"Common": 3}, hp=5)
@@ -48,40 +45,38 @@ chemistry_lab=Resource(name="Chemistry Lab",  resource_type="Chemistry",amount=1
 
 
 # Try making 2 cards of every type. For now make each deck a random collection of these 10 cards. Then pint the decks.
-
-for x in range(5):
-    deck1.add_card(holy_elemental)
-    deck1.add_card(fire_elemental)
-    deck1.add_card(laser_beam)
-    deck1.add_card(blue_shield_emitter)
-    deck1.add_card(anti_personnel_mines)
-    deck1.add_card(focused_artillery)
-    deck1.add_card(laser_handgun)
-    deck1.add_card(cyno_revival_chambers)
-    deck1.add_card(physics_lab)
-    deck1.add_card(chemistry_lab)
-
-    deck2.add_card(holy_elemental)
-    deck2.add_card(fire_elemental)
-    deck2.add_card(laser_beam)
-    deck2.add_card(blue_shield_emitter)
-    deck2.add_card(anti_personnel_mines)
-    deck2.add_card(focused_artillery)
-    deck2.add_card(laser_handgun)
-    deck2.add_card(cyno_revival_chambers)
-    deck2.add_card(physics_lab)
-    deck2.add_card(chemistry_lab)
-
-deck1.shuffle()  
-deck2.shuffle()  
-
-# Create players
-player1 = Player(name="Alice", discord_id=12345, deck=deck1)
-player2 = Player(name="Bob", discord_id=67890, deck=deck2)
-
-
-# Initialize the game state
-game_state = Gamestate(player1, player2)
-
-# Start the game
-game_state.start_game()
\ No newline at end of file
+card_pool = [holy_elemental, fire_elemental, laser_beam, blue_shield_emitter, anti_personnel_mines,
+             focused_artillery, laser_handgun, cyno_revival_chambers, physics_lab, chemistry_lab]
+
+def build_decks():
+    """
+    Build the two example decks, five copies of every card in the pool each, unshuffled.
+
+    :return: The decks of the first and the second player.
+    """
+    deck1 = Deck()
+    deck2 = Deck()
+    for x in range(5):
+        for card in card_pool:
+            deck1.add_card(card)
+            deck2.add_card(card)
+    return deck1, deck2
+
+if __name__ == "__main__":
+    # Create example players with decks
+    deck1, deck2 = build_decks()
+    # Decks report to nothing until a game binds its sink; this example prints from the start
+    deck1.events = deck2.events = CONSOLE
+    deck1.shuffle()  
+    deck2.shuffle()  
+
+    # Create players
+    player1 = Player(name="Alice", discord_id=12345, deck=deck1)
+    player2 = Player(name="Bob", discord_id=67890, deck=deck2)
+
+
+    # Initialize the game state
+    game_state = Gamestate(player1, player2)
+
+    # Start the game
+    game_state.start_game()
@@ -0,0 +1,55 @@
+from typing import Dict, List, Tuple
+
+# Trigger types. The trap ones match Trap.trigger_condition.
+OPPONENT_CARD_PLACED = "Opponent Card Placed"
+ATTACKED = "Attacked"
+UPKEEP = "Upkeep"
+
+class TriggerRegistry:
+    """
+    The cards of a game that are waiting for an event, keyed by (player, trigger type).
+
+    Cards register when they enter the battlefield and unregister when they
+    leave or are used up, so firing an event only visits the cards listening
+    for it instead of scanning a whole battlefield.
+    """
+
+    def __init__(self):
+        # Dicts used as ordered sets, so listeners fire in the order they entered play
+        self._listeners: Dict[Tuple[object, str], Dict[object, None]] = {}
+
+    def register(self, player, trigger: str, card):
+        """
+        Start listening for an event on behalf of a card.
+
+        :param player: The player who controls the card.
+        :param trigger: The trigger type, e.g. ATTACKED.
+        :param card: The listening card.
+        """
+        key = (player, trigger)
+        listeners = self._listeners.get(key)
+        if listeners is None:
+            listeners = self._listeners[key] = {}
+        listeners[card] = None
+
+    def unregister(self, player, trigger: str, card):
+        """Stop a card listening for an event; does nothing if it was not listening."""
+        listeners = self._listeners.get((player, trigger))
+        if listeners:
+            listeners.pop(card, None)
+
+    def listeners(self, player, trigger: str) -> List:
+        """
+        Get the cards of a player listening for an event.
+
+        :return: A copy of the listeners, so they may unregister while the event is handled.
+        """
+        listeners = self._listeners.get((player, trigger))
+        return list(listeners) if listeners else []
+
+    def has_listeners(self, player, trigger: str) -> bool:
+        return bool(self._listeners.get((player, trigger)))
+
+    def clear(self):
+        """Drop every listener, before the players of a restored game register again."""
+        self._listeners.clear()
@@ -1,29 +1,63 @@
-# A dictionary to store user stats. In a real application, use a database.
-user_stats = {}
-
-from Card import Card
+from typing import Dict, Optional, Set
+from Card import CardDefinition, get_definition, registry
 
 class User:
-    def __init__(self, discord_id, victories=0, losses=0, most_played_card=None):
+    def __init__(self, discord_id, victories=0, losses=0, most_played_card=None, card_plays: Optional[Dict[str, int]] = None):
+        """
+        :param most_played_card: The definition of the user's most played card, used when card_plays is not given.
+        :param card_plays: How many times the user has played each card, by card id.
+        """
         self.discord_id = discord_id
         self.victories = victories
         self.losses = losses
-        self.most_played_card = most_played_card
+        self.card_plays: Dict[str, int] = dict(card_plays or {})
+        if self.card_plays:
+            self.most_played_card_id = max(self.card_plays, key=self.card_plays.get)
+        else:
+            self.most_played_card_id = most_played_card.card_id if most_played_card else None
+        # What changed since the stats were last saved (see StatsService)
+        self.results_changed = False
+        self.changed_cards: Set[str] = set()
+
+    @property
+    def most_played_card(self) -> Optional[CardDefinition]:
+        return registry.get(self.most_played_card_id) if self.most_played_card_id else None
+
+    def record_result(self, won: bool):
+        if won:
+            self.victories += 1
+        else:
+            self.losses += 1
+        self.results_changed = True
+
+    def record_play(self, card_id: str, plays: int = 1):
+        """Add plays of a card, keeping the most played card up to date without looking at the other counters."""
+        count = self.card_plays[card_id] = self.card_plays.get(card_id, 0) + plays
+        if self.most_played_card_id is None or count > self.card_plays.get(self.most_played_card_id, 0):
+            self.most_played_card_id = card_id
+        self.changed_cards.add(card_id)
+
+    @property
+    def changed(self) -> bool:
+        return self.results_changed or bool(self.changed_cards)
 
     def to_dict(self):
         return {
             "discord_id": self.discord_id,
             "victories": self.victories,
             "losses": self.losses,
-            "most_played_card": self.most_played_card.to_dict() if self.most_played_card else None
+            # Definitions are stored by card id and looked up in the registry again by from_dict
+            "most_played_card": self.most_played_card_id,
+            "card_plays": dict(self.card_plays),
         }
 
     @classmethod
     def from_dict(cls, data):
-        most_played_card = Card.from_dict(data["most_played_card"]) if data["most_played_card"] else None
+        most_played_card = get_definition(data["most_played_card"]) if data["most_played_card"] else None
         return cls(
             discord_id=data["discord_id"],
             victories=data["victories"],
             losses=data["losses"],
-            most_played_card=most_played_card
+            most_played_card=most_played_card,
+            card_plays=data.get("card_plays")
         )
@@ -0,0 +1,308 @@
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+DEFAULT_CACHE_SIZE = 100000
+DEFAULT_MAX_BATCH = 512
+
+class InsufficientFunds(Exception):
+    """Raised when a debit would take a balance below zero."""
+
+    def __init__(self, user_id: int, balance: int, amount: int):
+        super().__init__(f"User {user_id} has {balance} and cannot pay {amount}.")
+        self.user_id = user_id
+        self.balance = balance
+        self.amount = amount
+
+class LedgerEntry(NamedTuple):
+    """
+    One row of the currency ledger.
+
+    :param balance: The user's balance after the entry.
+    :param duplicate: Whether the idempotency key had been used already, so this is the entry
+                      recorded then and nothing was written.
+    """
+    entry_id: int
+    user_id: int
+    amount: int
+    balance: int
+    reason: str
+    idempotency_key: Optional[str] = None
+    duplicate: bool = False
+
+_ENTRY_COLUMNS = "entry_id, user_id, amount, balance, reason, idempotency_key"
+
+class _Pending(NamedTuple):
+    """Entries that must be committed together, and the future their writer resolves."""
+    entries: Sequence[Tuple[int, int, int, str, Optional[str]]]
+    future: asyncio.Future
+
+class CurrencyService:
+    """
+    An append-only currency ledger.
+
+    Every entry stores the balance after it, so a user's balance is the
+    newest entry's, read from one index lookup and then kept in an LRU cache;
+    the history is never summed. Changes to one user's balance are serialized
+    by a lock of that user only, and the entries of all users are written by
+    one writer task that commits everything queued since its last commit in
+    a single transaction (group commit). An entry with an idempotency key
+    is written at most once, so retried commands are never charged twice.
+
+    Usage:
+        currency = CurrencyService(database)
+        await currency.start()
+        await currency.credit(user_id, 500, "purchase", idempotency_key=order_id)
+        await currency.debit(user_id, 100, "pack:standard")
+        await currency.close()
+    """
+
+    def __init__(self, database, cache_size: int = DEFAULT_CACHE_SIZE, max_batch: int = DEFAULT_MAX_BATCH):
+        """
+        :param database: A Database with the initial schema.
+        :param cache_size: The most balances kept in memory.
+        :param max_batch: The most queued requests one commit takes.
+        """
+        self.database = database
+        self.cache_size = cache_size
+        self.max_batch = max_batch
+        self._balances: "OrderedDict[int, int]" = OrderedDict()
+        # A lock lives while some request holds or waits for it, so idle users cost nothing
+        self._locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.commits = 0
+
+    async def start(self):
+        if self._writer is None:
+            self._queue = asyncio.Queue()
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def close(self):
+        """Commit everything queued and stop the writer."""
+        if self._writer is not None:
+            self._queue.put_nowait(None)
+            await self._writer
+            self._writer = None
+            self._queue = None
+
+    async def __aenter__(self) -> "CurrencyService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _lock(self, user_id: int) -> asyncio.Lock:
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        return lock
+
+    def _remember(self, user_id: int, balance: int):
+        self._balances[user_id] = balance
+        self._balances.move_to_end(user_id)
+        if len(self._balances) > self.cache_size:
+            self._balances.popitem(last=False)
+
+    async def _stored_balance(self, user_id: int) -> int:
+        balance = self._balances.get(user_id)
+        if balance is not None:
+            self._balances.move_to_end(user_id)
+            return balance
+        balance = await self.database.fetchval(
+            "SELECT balance FROM currency_ledger WHERE user_id = ? ORDER BY entry_id DESC LIMIT 1", (user_id,), 0)
+        self._remember(user_id, balance)
+        return balance
+
+    async def balance(self, user_id: int) -> int:
+        """A user's current balance, including every change that has been confirmed."""
+        async with self._lock(user_id):
+            return await self._stored_balance(user_id)
+
+    async def _find(self, idempotency_key: Optional[str]) -> Optional[LedgerEntry]:
+        if idempotency_key is None:
+            return None
+        row = await self.database.fetchone(f"SELECT {_ENTRY_COLUMNS} FROM currency_ledger WHERE idempotency_key = ?", (idempotency_key,))
+        return LedgerEntry(*row, duplicate=True) if row else None
+
+    async def _commit(self, entries: Sequence[Tuple[int, int, int, str, Optional[str]]]) -> List[LedgerEntry]:
+        if self._writer is None:
+            raise RuntimeError("The currency service has not been started.")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_Pending(entries, future))
+        return await self._settle(future, [user_id for user_id, *_ in entries])
+
+    async def _settle(self, future: asyncio.Future, user_ids: Sequence[int]):
+        """
+        Await a write of the given users' balances that goes on if the caller is cancelled.
+
+        A cancelled caller forgets the balances the write changes and keeps the
+        users' locks until it is done, so the next change reads what it wrote.
+        """
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            for user_id in user_ids:
+                self._balances.pop(user_id, None)
+            while not future.done():
+                try:
+                    await asyncio.wait([future])
+                except asyncio.CancelledError:
+                    pass
+            if not future.cancelled():
+                future.exception()  # Retrieved, so a failed write nobody awaits is not logged
+            raise
+
+    async def change(self, user_id: int, amount: int, reason: str, idempotency_key: Optional[str] = None) -> LedgerEntry:
+        """
+        Add a signed amount to a user's balance.
+
+        :param reason: What the change was for, such as "purchase" or "pack:standard".
+        :param idempotency_key: A key unique to the request, such as the Discord interaction id;
+                                a request with a key already in the ledger returns the entry recorded for it.
+        :raises InsufficientFunds: If the balance would fall below zero.
+        """
+        async with self._lock(user_id):
+            existing = await self._find(idempotency_key)
+            if existing is not None:
+                return existing
+            balance = await self._stored_balance(user_id)
+            if balance + amount < 0:
+                raise InsufficientFunds(user_id, balance, -amount)
+            entry, = await self._commit([(user_id, amount, balance + amount, reason, idempotency_key)])
+            if not entry.duplicate:
+                self._remember(user_id, entry.balance)
+            return entry
+
+    async def credit(self, user_id: int, amount: int, reason: str, idempotency_key: Optional[str] = None) -> LedgerEntry:
+        if amount <= 0:
+            raise ValueError("A credit must be positive.")
+        return await self.change(user_id, amount, reason, idempotency_key)
+
+    async def debit(self, user_id: int, amount: int, reason: str, idempotency_key: Optional[str] = None) -> LedgerEntry:
+        if amount <= 0:
+            raise ValueError("A debit must be positive.")
+        return await self.change(user_id, -amount, reason, idempotency_key)
+
+    async def spend(self, user_id: int, amount: int, reason: str, work: Callable[[object], Awaitable[Any]],
+                    idempotency_key: Optional[str] = None) -> Tuple[LedgerEntry, Any]:
+        """
+        Debit a user and do the work paid for in the same transaction, so neither is stored without the other.
+
+        The entry is written by the caller rather than the writer task, as the
+        work's statements must share its transaction.
+
+        :param work: Called with the connection of the transaction, e.g. lambda connection: packs.open_packs(..., connection=connection).
+        :return: The entry, and what work returned, or None if the idempotency key had been used already.
+        :raises InsufficientFunds: If the balance is below the amount.
+        """
+        if amount <= 0:
+            raise ValueError("A debit must be positive.")
+        async with self._lock(user_id):
+            existing = await self._find(idempotency_key)
+            if existing is not None:
+                return existing, None
+            balance = await self._stored_balance(user_id)
+            if balance < amount:
+                raise InsufficientFunds(user_id, balance, amount)
+            spent = asyncio.ensure_future(self._spend(user_id, -amount, balance - amount, reason, work, idempotency_key))
+            entry, result = await self._settle(spent, [user_id])
+            if not entry.duplicate:
+                self._remember(user_id, entry.balance)
+            return entry, result
+
+    async def _spend(self, user_id: int, amount: int, balance: int, reason: str, work, idempotency_key: Optional[str]):
+        async with self.database.transaction() as connection:
+            entry = await connection.run(lambda sqlite: _write_entry(sqlite, time.time(), user_id, amount, balance, reason, idempotency_key))
+            return entry, None if entry.duplicate else await work(connection)
+
+    async def transfer(self, sender_id: int, receiver_id: int, amount: int, reason: str,
+                       idempotency_key: Optional[str] = None) -> Tuple[LedgerEntry, LedgerEntry]:
+        """
+        Move an amount between two users, committing both entries together.
+
+        The idempotency key is stored on the sender's entry, with ":received" appended on the receiver's.
+
+        :return: The sender's and the receiver's entries.
+        """
+        if amount <= 0:
+            raise ValueError("A transfer must be positive.")
+        if sender_id == receiver_id:
+            raise ValueError("A user cannot transfer to themselves.")
+        first, second = sorted((sender_id, receiver_id))
+        # Both locks are always taken in the same order, so two opposite transfers cannot deadlock
+        async with self._lock(first), self._lock(second):
+            existing = await self._find(idempotency_key)
+            if existing is not None:
+                return existing, await self._find(f"{idempotency_key}:received")
+            sender_balance = await self._stored_balance(sender_id)
+            if sender_balance < amount:
+                raise InsufficientFunds(sender_id, sender_balance, amount)
+            receiver_balance = await self._stored_balance(receiver_id)
+            sent, received = await self._commit([
+                (sender_id, -amount, sender_balance - amount, reason, idempotency_key),
+                (receiver_id, amount, receiver_balance + amount, reason, f"{idempotency_key}:received" if idempotency_key else None),
+            ])
+            if not sent.duplicate:
+                self._remember(sender_id, sent.balance)
+                self._remember(receiver_id, received.balance)
+            return sent, received
+
+    async def history(self, user_id: int, limit: int = 20) -> List[LedgerEntry]:
+        """A user's newest ledger entries, newest first."""
+        rows = await self.database.fetchall(
+            f"SELECT {_ENTRY_COLUMNS} FROM currency_ledger WHERE user_id = ? ORDER BY entry_id DESC LIMIT ?", (user_id, limit))
+        return [LedgerEntry(*row) for row in rows]
+
+    async def _write_loop(self):
+        stopping = False
+        while not stopping:
+            batch = [await self._queue.get()]
+            # Everything that arrived during the last commit goes into this one
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if None in batch:
+                batch.remove(None)
+                stopping = True
+            if not batch:
+                continue
+            try:
+                results = await self.database.run(lambda sqlite: _write_batch(sqlite, batch))
+            except Exception as error:
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(error)
+                continue
+            self.commits += 1
+            for pending, entries in zip(batch, results):
+                if not pending.future.done():
+                    pending.future.set_result(entries)
+
+def _write_batch(sqlite, batch: Sequence[_Pending]) -> List[List[LedgerEntry]]:
+    """Write the entries of several requests in one transaction, in the writer's connection thread."""
+    now = time.time()
+    results = []
+    sqlite.execute("BEGIN IMMEDIATE")
+    try:
+        for pending in batch:
+            results.append([_write_entry(sqlite, now, *entry) for entry in pending.entries])
+        sqlite.execute("COMMIT")
+    except BaseException:
+        sqlite.execute("ROLLBACK")
+        raise
+    return results
+
+def _write_entry(sqlite, now: float, user_id: int, amount: int, balance: int, reason: str, key: Optional[str]) -> LedgerEntry:
+    """Write one entry inside an open transaction, or return the entry already holding its idempotency key."""
+    sqlite.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,))
+    cursor = sqlite.execute(
+        "INSERT INTO currency_ledger (user_id, amount, balance, reason, idempotency_key, created_at) VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (idempotency_key) DO NOTHING", (user_id, amount, balance, reason, key, now))
+    if cursor.rowcount:
+        return LedgerEntry(cursor.lastrowid, user_id, amount, balance, reason, key)
+    # Another user's request took the key first
+    row = sqlite.execute(f"SELECT {_ENTRY_COLUMNS} FROM currency_ledger WHERE idempotency_key = ?", (key,)).fetchone()
+    return LedgerEntry(*row, duplicate=True)
@@ -0,0 +1,492 @@
+import asyncio
+import itertools
+import random
+import weakref
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from Agent import GreedyAgent, PlayerAgent
+from Deck import Deck
+from Events import EventKind, MemorySink, render
+from Gamestate import Gamestate
+from Player import Player
+from Serialization import decode_game, encode_game
+
+COMPUTER_ID = 0
+DEFAULT_MAX_TURNS = 200
+
+# The phases in which a human seat's move is awaited instead of being played automatically
+DECISION_PHASES = {"Main1": "main", "Combat": "combat", "Main2": "main"}
+
+class Reply(NamedTuple):
+    """The result of an action sent to a match, with the narration it produced."""
+    ok: bool
+    message: str
+    lines: List[str]
+
+class _Command(NamedTuple):
+    user_id: int
+    action: tuple
+    reply: asyncio.Future
+
+class Match:
+    """
+    One game, run as an actor: it owns its Gamestate and changes it only
+    from its own task, one message from its inbox at a time, so no game state
+    is ever shared between tasks or guarded by a lock.
+
+    Phases that need no decision from a human seat, and every turn of a
+    computer seat, are played straight through; the actor then sleeps on its
+    inbox until the seat whose move it is sends one, so an idle match takes
+    no CPU at all. Human seats decide main phase actions and attacks by
+    message; their traps and discards are decided by the seat's agent.
+
+    Actions are the tuples of PlayerAgent.choose_action, plus ("attack", indexes)
+    with indexes into the attacker's creatures, and ("concede",), which either seat may send at any time.
+    """
+
+    def __init__(self, match_id: int, game: Gamestate, humans: Tuple[int, ...], turn_timeout: Optional[float] = None,
+                 max_turns: int = DEFAULT_MAX_TURNS):
+        """
+        :param game: The game, with a MemorySink for its events.
+        :param humans: The discord ids of the seats that send their moves as messages.
+        :param turn_timeout: Seconds a human seat has for a move before its agent makes it; None waits forever.
+        :param max_turns: The turn after which the game ends without a winner.
+        """
+        self.match_id = match_id
+        self.game = game
+        self.humans = frozenset(humans)
+        self.turn_timeout = turn_timeout
+        self.max_turns = max_turns
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.finished = False
+        self.actions = 0
+        self.last_active = asyncio.get_running_loop().time()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def players(self) -> Tuple[Player, Player]:
+        return self.game.player1, self.game.player2
+
+    def seat(self, user_id: int) -> Optional[Player]:
+        for player in self.players:
+            if player.discord_id == user_id and user_id in self.humans:
+                return player
+        return None
+
+    @property
+    def waiting(self) -> Optional[Tuple[int, str]]:
+        """The discord id of the seat whose move the match waits for and the kind of decision, or None."""
+        if self.finished:
+            return None
+        decision = DECISION_PHASES.get(self.game.phase)
+        return (self.game.current_player.discord_id, decision) if decision else None
+
+    def narration(self) -> List[str]:
+        return [render(event) for event in self.game.events.drain()]
+
+    def start(self, on_finish: Optional[Callable[["Match"], Awaitable]] = None) -> List[str]:
+        """
+        Play up to the first human decision and start the actor.
+
+        :param on_finish: Awaited with the match once it is over.
+        :return: The narration of the opening.
+        """
+        self.advance()
+        self._task = asyncio.create_task(self._run(on_finish), name=f"match-{self.match_id}")
+        return self.narration()
+
+    @property
+    def idle(self) -> bool:
+        """Whether the match is waiting for a move with nothing in its inbox, so it can be hibernated."""
+        return not self.finished and self.inbox.empty() and self.waiting is not None
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def send(self, user_id: int, action: tuple) -> Reply:
+        """Queue a seat's action and wait for the actor to apply it."""
+        if self.finished:
+            return Reply(False, "This match is over.", [])
+        future = asyncio.get_running_loop().create_future()
+        self.inbox.put_nowait(_Command(user_id, tuple(action), future))
+        return await future
+
+    async def _run(self, on_finish):
+        try:
+            while not self.finished:
+                try:
+                    command = await asyncio.wait_for(self.inbox.get(), self.turn_timeout) if self.turn_timeout else await self.inbox.get()
+                except asyncio.TimeoutError:
+                    self.play_for_current_player()
+                    continue
+                try:
+                    reply = self.handle(command.user_id, command.action)
+                except Exception as error:
+                    # A failing action is the sender's error; the match carries on
+                    if not command.reply.done():
+                        command.reply.set_exception(error)
+                    continue
+                if not command.reply.done():
+                    command.reply.set_result(reply)
+        finally:
+            # Whoever is still waiting on a stopped match gets an answer
+            while not self.inbox.empty():
+                command = self.inbox.get_nowait()
+                if not command.reply.done():
+                    command.reply.set_result(Reply(False, "This match is over.", []))
+        if on_finish is not None:
+            await on_finish(self)
+
+    def handle(self, user_id: int, action: tuple) -> Reply:
+        """Apply one action of a seat; only ever called by the actor."""
+        self.last_active = asyncio.get_running_loop().time()
+        player = self.seat(user_id)
+        if player is None:
+            return Reply(False, "You are not playing in this match.", [])
+        if self.finished:
+            return Reply(False, "This match is over.", [])
+        kind = action[0] if action else None
+
+        if kind == "concede":
+            player.hp = 0
+            self.finish()
+            return Reply(True, f"{player.name} conceded.", self.narration())
+
+        waiting = self.waiting
+        if waiting is None or waiting[0] != user_id:
+            return Reply(False, "It is not your move.", [])
+
+        game = self.game
+        if waiting[1] == "combat":
+            if kind != "attack":
+                return Reply(False, "Declare your attackers first.", [])
+            creatures = list(player.creatures)
+            indexes = sorted(set(action[1])) if len(action) > 1 else []
+            if any(not isinstance(index, int) or not 0 <= index < len(creatures) for index in indexes):
+                return Reply(False, "Choose attackers by their number on your battlefield.", [])
+            attackers = [creatures[index] for index in indexes]
+            if attackers:
+                game.declare_attackers(attackers)
+            game.next_phase()
+        else:
+            if kind == "attack":
+                return Reply(False, "You can only attack in the Combat phase.", [])
+            if not game.resolve_action(action):
+                return Reply(False, "That action is not possible.", self.narration())
+            game.next_phase()
+
+        self.actions += 1
+        self.advance()
+        return Reply(True, "", self.narration())
+
+    def play_for_current_player(self):
+        """Let a seat's agent make the move the match is waiting for, when a human seat ran out of time."""
+        game = self.game
+        if game.phase == "Combat":
+            game.combat_phase()
+        else:
+            game.main_phase(1 if game.phase == "Main1" else 2)
+        self.advance()
+
+    def advance(self):
+        """Play phases until a human seat has to decide, or the game is over."""
+        game = self.game
+        while not self.finished:
+            if game.check_win_condition() or game.turn_counter > self.max_turns:
+                self.finish()
+                return
+            phase = game.phase
+            human = game.current_player.discord_id in self.humans
+            if phase == "Untap":
+                game.events.emit(EventKind.TURN_STARTED, game.current_player.name)
+                game.untap_phase()
+            elif phase == "Upkeep":
+                game.upkeep_phase()
+            elif phase == "Draw":
+                game.draw_phase()
+            elif phase == "End":
+                game.end_phase()
+            elif not human:
+                if phase == "Combat":
+                    game.combat_phase()
+                else:
+                    game.main_phase(1 if phase == "Main1" else 2)
+            else:
+                if phase == "Combat":
+                    game.events.emit(EventKind.COMBAT_STARTED)
+                else:
+                    game.events.emit(EventKind.MAIN_PHASE_STARTED, 1 if phase == "Main1" else 2)
+                    game.events.emit(EventKind.ACTIONS_OPEN, game.current_player.name)
+                return
+
+    def finish(self):
+        if not self.finished:
+            self.finished = True
+            if self.game.winner is None:
+                self.game.check_win_condition()
+
+    @property
+    def winner(self) -> Optional[Player]:
+        return self.game.winner
+
+class GameService:
+    """
+    Hosts any number of concurrent matches in one asyncio process and routes
+    players' actions to them by match id or by player.
+
+    Usage:
+        games = GameService(deck_factory)
+        match, opening = games.create_match(challenger_id, opponent_id)
+        reply = await games.act(challenger_id, ("play", "Physics Lab"))
+        await games.close()
+    """
+
+    def __init__(self, deck_factory: Callable[[int], Deck], database=None, on_finish: Optional[Callable[[Match], Awaitable]] = None,
+                 turn_timeout: Optional[float] = None, max_turns: int = DEFAULT_MAX_TURNS,
+                 computer_agent: Callable[[random.Random], PlayerAgent] = GreedyAgent):
+        """
+        :param deck_factory: Builds the deck a player brings, called with their discord id (COMPUTER_ID for the computer).
+        :param database: A Database to record match results in, or None.
+        :param on_finish: Also awaited with every finished match, e.g. to update user stats.
+        :param turn_timeout: Seconds a human has for a move before it is played for them.
+        :param computer_agent: Builds the agent of a computer opponent from a random generator.
+        """
+        self.deck_factory = deck_factory
+        self.database = database
+        self.on_finish = on_finish
+        self.turn_timeout = turn_timeout
+        self.max_turns = max_turns
+        self.computer_agent = computer_agent
+        self.matches: Dict[int, Match] = {}
+        self._by_user: Dict[int, int] = {}
+        self._ids = itertools.count(1)
+        # Encoded matches not yet written to the database, or all of them without one
+        self._hibernated: Dict[int, bytes] = {}
+        self._stored = set()
+        # Hibernating and waking one match never overlap
+        self._transitions: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def match_of(self, user_id: int) -> Optional[Match]:
+        match_id = self._by_user.get(user_id)
+        return self.matches.get(match_id) if match_id is not None else None
+
+    def create_match(self, user_id: int, opponent_id: Optional[int] = None, seed: Optional[int] = None,
+                     names: Optional[Dict[int, str]] = None) -> Tuple[Match, List[str]]:
+        """
+        Start a match between two users, or against the computer when opponent_id is None.
+
+        :param names: Display names by discord id; users default to their Discord mention.
+        :return: The match and the narration of its opening.
+        :raises ValueError: If either user is already playing.
+        """
+        for seat_id in (user_id, opponent_id):
+            if seat_id is not None and seat_id in self._by_user:
+                raise ValueError(f"User {seat_id} is already in a match.")
+        if user_id == opponent_id:
+            raise ValueError("A user cannot challenge themselves.")
+
+        names = names or {}
+        rng = random.Random(seed)
+        players = []
+        for seat_id in (user_id, opponent_id if opponent_id is not None else COMPUTER_ID):
+            human = seat_id != COMPUTER_ID
+            name = names.get(seat_id) or (f"<@{seat_id}>" if human else "Computer")
+            # A human seat's agent only decides traps and discards
+            players.append(Player(name, seat_id, self.deck_factory(seat_id), agent=self.computer_agent(random.Random(rng.random()))))
+        game = Gamestate(players[0], players[1], seed=rng.getrandbits(32), events=MemorySink())
+        for player in players:
+            player.deck.shuffle(game.rng)
+
+        humans = tuple(player.discord_id for player in players if player.discord_id != COMPUTER_ID)
+        match = Match(next(self._ids), game, humans, self.turn_timeout, self.max_turns)
+        self.matches[match.match_id] = match
+        for seat_id in humans:
+            self._by_user[seat_id] = match.match_id
+        return match, match.start(self._finished)
+
+    async def submit(self, match_id: int, user_id: int, action: tuple) -> Reply:
+        """Route an action to a match by its id, waking it if it is hibernated."""
+        match = self.matches.get(match_id) or await self.wake(match_id)
+        if match is None:
+            return Reply(False, "There is no such match.", [])
+        return await match.send(user_id, action)
+
+    async def act(self, user_id: int, action: tuple) -> Reply:
+        """Route an action to the match the user is playing."""
+        match_id = self._by_user.get(user_id)
+        if match_id is None:
+            return Reply(False, "You are not in a match.", [])
+        return await self.submit(match_id, user_id, action)
+
+    def _transition(self, match_id: int) -> asyncio.Lock:
+        lock = self._transitions.get(match_id)
+        if lock is None:
+            lock = self._transitions[match_id] = asyncio.Lock()
+        return lock
+
+    async def hibernate(self, match_id: int) -> bool:
+        """
+        Encode an idle match and drop it from memory, storing it in the database when there is one.
+
+        Players' users stay routed to the match, which wakes again on its next action.
+
+        :return: False if the match is not in memory or not idle.
+        """
+        async with self._transition(match_id):
+            match = self.matches.get(match_id)
+            if match is None or not match.idle:
+                return False
+            del self.matches[match_id]
+            await match.stop()
+            state = self._hibernated[match_id] = encode_game(match.game)
+            if self.database is not None:
+                player1, player2 = match.players
+                await self.database.execute(
+                    "INSERT OR REPLACE INTO hibernated_matches (match_id, player1_id, player2_id, state) VALUES (?, ?, ?, ?)",
+                    (match_id, player1.discord_id, player2.discord_id, state))
+                self._stored.add(match_id)
+                del self._hibernated[match_id]
+            return True
+
+    async def hibernate_idle(self, idle_seconds: float) -> int:
+        """
+        Hibernate every match that has waited for a move for longer than idle_seconds.
+
+        :return: The number of matches hibernated.
+        """
+        cutoff = asyncio.get_running_loop().time() - idle_seconds
+        idle = [match_id for match_id, match in self.matches.items() if match.idle and match.last_active < cutoff]
+        return sum([await self.hibernate(match_id) for match_id in idle])
+
+    async def wake(self, match_id: int) -> Optional[Match]:
+        """
+        Restore a hibernated match and start its actor again.
+
+        :return: The match, or None if there is no such match.
+        """
+        async with self._transition(match_id):
+            match = self.matches.get(match_id)
+            if match is not None:
+                return match
+            state = self._hibernated.pop(match_id, None)
+            if state is None and match_id in self._stored:
+                state = await self.database.fetchval("SELECT state FROM hibernated_matches WHERE match_id = ?", (match_id,))
+            if state is None:
+                return None
+            rng = random.Random(match_id)
+            agents = [self.computer_agent(random.Random(rng.random())) for _ in range(2)]
+            game = decode_game(state, agents, MemorySink())
+            humans = tuple(player.discord_id for player in (game.player1, game.player2) if player.discord_id != COMPUTER_ID)
+            match = Match(match_id, game, humans, self.turn_timeout, self.max_turns)
+            self.matches[match_id] = match
+            match.start(self._finished)
+            if match_id in self._stored:
+                self._stored.discard(match_id)
+                await self.database.execute("DELETE FROM hibernated_matches WHERE match_id = ?", (match_id,))
+            return match
+
+    async def load_hibernated(self) -> int:
+        """
+        Route the players of the matches hibernated in the database to them, such as after a restart.
+
+        :return: The number of hibernated matches.
+        """
+        rows = await self.database.fetchall("SELECT match_id, player1_id, player2_id FROM hibernated_matches")
+        for match_id, player1_id, player2_id in rows:
+            self._stored.add(match_id)
+            for seat_id in (player1_id, player2_id):
+                if seat_id != COMPUTER_ID:
+                    self._by_user[seat_id] = match_id
+        if rows:
+            self._ids = itertools.count(max(row[0] for row in rows) + 1)
+        return len(rows)
+
+    async def _finished(self, match: Match):
+        self.matches.pop(match.match_id, None)
+        for seat_id in match.humans:
+            if self._by_user.get(seat_id) == match.match_id:
+                del self._by_user[seat_id]
+        if self.database is not None:
+            await self.record(match)
+        if self.on_finish is not None:
+            await self.on_finish(match)
+
+    async def record(self, match: Match):
+        """Store the result of a finished match; a draw stores the two seats in order, with outcome 'draw'."""
+        winner = match.winner
+        if winner is None:
+            seats, outcome = (match.game.player1, match.game.player2), "draw"
+        else:
+            seats, outcome = (winner, match.game.player2 if winner is match.game.player1 else match.game.player1), "win"
+        # The computer's seat is stored as NULL, as it has no user
+        ids = [player.discord_id if player.discord_id != COMPUTER_ID else None for player in seats]
+        async with self.database.transaction() as connection:
+            for seat_id in ids:
+                if seat_id is not None:
+                    await connection.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (seat_id,))
+            await connection.execute("INSERT INTO match_results (winner_id, loser_id, turns, outcome) VALUES (?, ?, ?, ?)",
+                                     (*ids, match.game.turn_counter, outcome))
+
+    async def close(self, hibernate: bool = False):
+        """
+        Stop every match without recording a result.
+
+        :param hibernate: Hibernate the idle matches first, so load_hibernated can bring them back after a restart.
+        """
+        if hibernate and self.database is not None:
+            for match_id in list(self.matches):
+                await self.hibernate(match_id)
+        matches = list(self.matches.values())
+        self.matches.clear()
+        self._by_user.clear()
+        await asyncio.gather(*(match.stop() for match in matches))
+
+async def load_benchmark(matches: int = 2000, seed: int = 0, deck_factory: Optional[Callable[[int], Deck]] = None) -> Dict[str, float]:
+    """
+    Measure how many matches one process hosts at once and how many actions per second it applies.
+
+    Every match seats two simulated humans whose moves are picked by a
+    GreedyAgent and sent like Discord interactions would be, one task per
+    match; all the matches start before any move is sent, so they all stay in
+    play together.
+
+    :param deck_factory: The decks to play with; by default the TestingModels decks.
+    :return: The number of matches, actions, seconds, actions per second and the largest number of matches in play at once.
+    """
+    import time
+    if deck_factory is None:
+        from TestingModels import build_decks
+        deck_factory = lambda user_id: build_decks()[user_id % 2]
+    service = GameService(deck_factory)
+    started_matches = [service.create_match(2 * number + 1, 2 * number + 2, seed=seed + number)[0] for number in range(matches)]
+    concurrent = len(service.matches)
+
+    async def drive(match: Match):
+        agents = {player.discord_id: GreedyAgent(random.Random(player.discord_id)) for player in match.players}
+        while not match.finished:
+            user_id, decision = match.waiting
+            player = match.seat(user_id)
+            if decision == "combat":
+                attackers = agents[user_id].select_attackers(match.game, player, list(player.creatures))
+                action = ("attack", list(range(len(attackers))))
+            else:
+                action = agents[user_id].choose_action(match.game, player)
+            await match.send(user_id, action)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(drive(match) for match in started_matches))
+    elapsed = time.perf_counter() - started
+    actions = sum(match.actions for match in started_matches)
+    await service.close()
+    return {"matches": matches, "concurrent": concurrent, "actions": actions, "seconds": elapsed, "actions_per_second": actions / elapsed}
+
+# Example usage:
+if __name__ == "__main__":
+    import sys
+    result = asyncio.run(load_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
+    print(f"{result['concurrent']} concurrent matches, {result['actions']} actions in {result['seconds']:.2f}s: "
+          f"{result['actions_per_second']:,.0f} actions/s")
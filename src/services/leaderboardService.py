@@ -0,0 +1,305 @@
+import random
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from services.gameService import COMPUTER_ID
+
+DEFAULT_RATING = 1000
+DEFAULT_K_FACTOR = 32
+DEFAULT_PAGE_SIZE = 10
+_MAX_LEVEL = 32
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.next: List["_Node"] = [None] * level
+        # How many positions each link skips over
+        self.width: List[int] = [0] * level
+
+class RankedSkipList:
+    """
+    A sorted collection of distinct, comparable keys that also finds a key's
+    position and the key at a position, all in O(log n) expected time.
+
+    Every link of the skip list records how many positions it skips, so
+    walking down from the top level adds up the position of the node it
+    reaches (Pugh's indexable skip list).
+    """
+
+    def __init__(self, keys: Iterable = (), seed: Optional[int] = None):
+        """
+        :param keys: Keys to start with, which must already be sorted and distinct.
+        :param seed: Seeds the levels given to the nodes.
+        """
+        self._rng = random.Random(seed)
+        self._tail = _Node(None, 0)
+        self._head = _Node(None, _MAX_LEVEL)
+        self._levels = 1
+        self._size = 0
+        self._build(keys)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self):
+        node = self._head.next[0]
+        while node is not self._tail:
+            yield node.key
+            node = node.next[0]
+
+    def _random_level(self) -> int:
+        # One more than the number of trailing one bits: level l with probability 2^-l
+        bits = self._rng.getrandbits(_MAX_LEVEL - 1)
+        return (bits ^ (bits + 1)).bit_length()
+
+    def _build(self, keys: Iterable):
+        """Link sorted keys in one pass, without searching for their places."""
+        head, tail = self._head, self._tail
+        last = [head] * _MAX_LEVEL
+        positions = [0] * _MAX_LEVEL
+        position = 0
+        for key in keys:
+            position += 1
+            level = self._random_level()
+            node = _Node(key, level)
+            for index in range(level):
+                last[index].next[index] = node
+                last[index].width[index] = position - positions[index]
+                last[index] = node
+                positions[index] = position
+            self._levels = max(self._levels, level)
+        for index in range(_MAX_LEVEL):
+            last[index].next[index] = tail
+            last[index].width[index] = position + 1 - positions[index]
+        self._size = position
+
+    def _path(self, key) -> Tuple[List[_Node], List[int]]:
+        """The last node before key on every level, and the position of each."""
+        chain = [self._head] * _MAX_LEVEL
+        positions = [0] * _MAX_LEVEL
+        node, tail, position = self._head, self._tail, 0
+        for level in range(self._levels - 1, -1, -1):
+            following = node.next[level]
+            while following is not tail and following.key < key:
+                position += node.width[level]
+                node = following
+                following = node.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, key):
+        """Add a key, which must not be in the list yet."""
+        chain, positions = self._path(key)
+        position = positions[0] + 1
+        level = self._random_level()
+        self._levels = max(self._levels, level)
+        node = _Node(key, level)
+        for index in range(level):
+            previous = chain[index]
+            node.next[index] = previous.next[index]
+            node.width[index] = positions[index] + previous.width[index] - position + 1
+            previous.next[index] = node
+            previous.width[index] = position - positions[index]
+        for index in range(level, _MAX_LEVEL):
+            chain[index].width[index] += 1
+        self._size += 1
+
+    def remove(self, key):
+        """
+        Remove a key.
+
+        :raises KeyError: If the key is not in the list.
+        """
+        chain, _ = self._path(key)
+        node = chain[0].next[0]
+        if node is self._tail or node.key != key:
+            raise KeyError(key)
+        level = len(node.next)
+        for index in range(level):
+            previous = chain[index]
+            previous.width[index] += node.width[index] - 1
+            previous.next[index] = node.next[index]
+        for index in range(level, _MAX_LEVEL):
+            chain[index].width[index] -= 1
+        self._size -= 1
+
+    def rank(self, key) -> int:
+        """The number of keys less than key, which is key's 0-based position if it is in the list."""
+        return self._path(key)[1][0]
+
+    def _node_at(self, index: int) -> _Node:
+        node, remaining = self._head, index + 1
+        for level in range(self._levels - 1, -1, -1):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("RankedSkipList index out of range")
+        return self._node_at(index).key
+
+    def slice(self, start: int, stop: int) -> list:
+        """The keys from position start up to, not including, stop: one search, then a walk along the bottom level."""
+        start, stop = max(start, 0), min(stop, self._size)
+        keys = []
+        if start >= stop:
+            return keys
+        node = self._node_at(start)
+        for _ in range(stop - start):
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+class Standing(NamedTuple):
+    rank: int
+    user_id: int
+    rating: int
+    victories: int
+
+def expected_score(rating: int, opponent_rating: int) -> float:
+    """The chance of a player beating an opponent under the Elo model."""
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+class LeaderboardService:
+    """
+    The ranking of every user who has finished a match, by rating, then
+    victories, then Discord id, kept in memory in a RankedSkipList.
+
+    A user's rank, a page of the ranking and the users around someone are
+    all O(log n) lookups, and a finished match moves its players with one
+    removal and one insertion each, so no command ever sorts or scans the
+    users table. The ranking is rebuilt from the users_leaderboard index,
+    already in order, when the service is loaded.
+
+    Ratings change by Elo after matches between two users; a match against
+    the computer only counts as a victory. Ratings are saved as matches end;
+    victories are saved by StatsService.
+
+    Usage:
+        leaderboard = await LeaderboardService.load(database)
+        async def on_finish(match):
+            await stats.record_match(match)
+            await leaderboard.record_match(match)
+        games = GameService(deck_factory, database, on_finish=on_finish)
+        standing = leaderboard.standing(discord_id)
+    """
+
+    def __init__(self, database, rows: Iterable[Tuple[int, int, int]] = (), k_factor: int = DEFAULT_K_FACTOR):
+        """
+        :param database: A Database with the users table.
+        :param rows: The user id, rating and victories of every ranked user, in ranking order.
+        :param k_factor: The most rating a single match can move.
+        """
+        self.database = database
+        self.k_factor = k_factor
+        self._entries: Dict[int, Tuple[int, int]] = {}
+        keys = []
+        for user_id, rating, victories in rows:
+            self._entries[user_id] = (rating, victories)
+            keys.append(self._key(user_id, rating, victories))
+        self._ranking = RankedSkipList(keys)
+
+    @classmethod
+    async def load(cls, database, k_factor: int = DEFAULT_K_FACTOR) -> "LeaderboardService":
+        """Build the ranking of the users who have finished a match, reading the users_leaderboard index in order."""
+        rows = await database.fetchall(
+            "SELECT user_id, rating, victories FROM users INDEXED BY users_leaderboard "
+            "WHERE games > 0 ORDER BY rating DESC, victories DESC, user_id")
+        return cls(database, [tuple(row) for row in rows], k_factor)
+
+    def __len__(self) -> int:
+        return len(self._ranking)
+
+    @staticmethod
+    def _key(user_id: int, rating: int, victories: int) -> tuple:
+        return -rating, -victories, user_id
+
+    def _standing(self, index: int, key: tuple) -> Standing:
+        rating, victories, user_id = key
+        return Standing(index + 1, user_id, -rating, -victories)
+
+    def rating(self, user_id: int) -> int:
+        entry = self._entries.get(user_id)
+        return entry[0] if entry is not None else DEFAULT_RATING
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """A user's 1-based rank, or None if they have not finished a match."""
+        entry = self._entries.get(user_id)
+        return self._ranking.rank(self._key(user_id, *entry)) + 1 if entry is not None else None
+
+    def standing(self, user_id: int) -> Optional[Standing]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        return Standing(self._ranking.rank(self._key(user_id, *entry)) + 1, user_id, *entry)
+
+    def top(self, count: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> List[Standing]:
+        """The count users ranked after the first offset."""
+        return [self._standing(index, key) for index, key in enumerate(self._ranking.slice(offset, offset + count), offset)]
+
+    def page(self, number: int, page_size: int = DEFAULT_PAGE_SIZE) -> List[Standing]:
+        """A 1-based page of the ranking."""
+        return self.top(page_size, (number - 1) * page_size)
+
+    def pages(self, page_size: int = DEFAULT_PAGE_SIZE) -> int:
+        return max(1, -(-len(self._ranking) // page_size))
+
+    def around(self, user_id: int, radius: int = 5) -> List[Standing]:
+        """A user's standing with up to radius users ranked above and below, or nothing if they are not ranked."""
+        rank = self.rank(user_id)
+        if rank is None:
+            return []
+        start = max(rank - 1 - radius, 0)
+        return self.top(rank - start + radius, start)
+
+    def _set(self, user_id: int, rating: int, victories: int):
+        entry = self._entries.get(user_id)
+        if entry == (rating, victories):
+            return
+        if entry is not None:
+            self._ranking.remove(self._key(user_id, *entry))
+        self._entries[user_id] = (rating, victories)
+        self._ranking.insert(self._key(user_id, rating, victories))
+
+    def record(self, winner_id: Optional[int], loser_id: Optional[int]):
+        """
+        Move the players of a finished match. Either id may be None for the
+        computer; a match with no winner is recorded with both ids None.
+        """
+        ratings = {user_id: self.rating(user_id) for user_id in (winner_id, loser_id) if user_id is not None}
+        if winner_id is not None and loser_id is not None:
+            change = round(self.k_factor * (1.0 - expected_score(ratings[winner_id], ratings[loser_id])))
+            ratings[winner_id] += change
+            ratings[loser_id] -= change
+        for user_id, rating in ratings.items():
+            entry = self._entries.get(user_id)
+            victories = entry[1] if entry is not None else 0
+            self._set(user_id, rating, victories + (user_id == winner_id))
+
+    async def record_match(self, match):
+        """Rank the human seats of a finished match and save their new ratings, for use in GameService's on_finish hook."""
+        humans = [player.discord_id for player in match.players if player.discord_id != COMPUTER_ID]
+        winner = match.winner
+        if winner is None:
+            # A draw changes no rating, but its players are ranked from then on
+            for user_id in humans:
+                if user_id not in self._entries:
+                    self._set(user_id, DEFAULT_RATING, 0)
+        else:
+            winner_id = winner.discord_id if winner.discord_id != COMPUTER_ID else None
+            loser_ids = [user_id for user_id in humans if user_id != winner.discord_id]
+            self.record(winner_id, loser_ids[0] if loser_ids else None)
+        if not humans:
+            return
+        async with self.database.transaction() as connection:
+            # Read once the write lock is held, so the last transaction always saves the latest ratings;
+            # counting the game ranks the user for load() too, draws included
+            await connection.executemany(
+                "INSERT INTO users (user_id, rating, games) VALUES (?, ?, 1) "
+                "ON CONFLICT (user_id) DO UPDATE SET rating = excluded.rating, games = games + 1",
+                [(user_id, self.rating(user_id)) for user_id in humans])
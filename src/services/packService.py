@@ -0,0 +1,175 @@
+import json
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+
+DEFAULT_PACKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "boosterPacks.json")
+
+class AliasTable:
+    """
+    Walker's alias method, built with Vose's algorithm: after an O(n) setup,
+    every draw from a discrete distribution over n outcomes takes one uniform
+    index, one uniform float and one comparison, however large n is.
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        """
+        :param weights: The relative weight of each outcome; they need not sum to 1.
+        """
+        weights = np.asarray(weights, np.float64)
+        if weights.ndim != 1 or not len(weights) or (weights < 0).any() or not weights.sum():
+            raise ValueError("An alias table needs at least one outcome and positive weights.")
+        size = len(weights)
+        scaled = weights * size / weights.sum()
+        self.probability = np.ones(size)
+        self.alias = np.arange(size)
+
+        small = [index for index in range(size) if scaled[index] < 1.0]
+        large = [index for index in range(size) if scaled[index] >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            # The large outcome gives away what fills the small one's column
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # What is left is 1 up to rounding error
+        for index in small + large:
+            self.probability[index] = 1.0
+
+    def __len__(self) -> int:
+        return len(self.probability)
+
+    def sample(self, rng: np.random.Generator, shape) -> np.ndarray:
+        """Draw outcome indexes, all at once, in an array of the given shape."""
+        columns = rng.integers(0, len(self.probability), shape)
+        return np.where(rng.random(shape) < self.probability[columns], columns, self.alias[columns])
+
+class Slot(NamedTuple):
+    """Cards of a pack drawn from one distribution: count cards from the card ids of outcomes."""
+    count: int
+    card_ids: np.ndarray
+    table: AliasTable
+
+class PackType(NamedTuple):
+    key: str
+    name: str
+    price: int
+    slots: Tuple[Slot, ...]
+
+    @property
+    def size(self) -> int:
+        return sum(slot.count for slot in self.slots)
+
+def load_pack_specs(path: str = DEFAULT_PACKS) -> Dict[str, dict]:
+    with open(path) as file:
+        return json.load(file)
+
+def build_pack_types(specs: Mapping[str, dict], catalog: Iterable[Tuple[str, str]]) -> Dict[str, PackType]:
+    """
+    Compile pack specifications into alias tables over a card catalog.
+
+    A slot gives each rarity a weight, shared evenly by the cards of that
+    rarity, so the odds of a rarity stay the same however many cards it has.
+    Rarities without cards are left out; a slot none of whose rarities have
+    cards draws from the whole catalog.
+
+    :param specs: Pack types by key, in the format of boosterPacks.json.
+    :param catalog: (card id, rarity) pairs.
+    """
+    by_rarity: Dict[str, List[str]] = defaultdict(list)
+    every_card = []
+    for card_id, rarity in catalog:
+        by_rarity[rarity].append(card_id)
+        every_card.append(card_id)
+    if not every_card:
+        raise ValueError("Packs cannot be built from an empty catalog.")
+
+    pack_types = {}
+    for key, spec in specs.items():
+        slots = []
+        for slot in spec["slots"]:
+            card_ids, weights = [], []
+            for rarity, weight in slot["rarities"].items():
+                cards = by_rarity.get(rarity)
+                if not cards:
+                    continue
+                card_ids.extend(cards)
+                weights.extend([weight / len(cards)] * len(cards))
+            if not card_ids:
+                card_ids, weights = every_card, [1.0] * len(every_card)
+            slots.append(Slot(slot["count"], np.array(card_ids, dtype=object), AliasTable(weights)))
+        pack_types[key] = PackType(key, spec.get("name", key), spec.get("price", 0), tuple(slots))
+    return pack_types
+
+class PackService:
+    """
+    Generates booster packs and adds their cards to users' collections.
+
+    Every slot of every pack type has a precomputed alias table, so a card
+    is drawn in constant time regardless of catalog size, and opening many
+    packs draws each slot's cards for all of them in one vectorized pass.
+    """
+
+    def __init__(self, database, pack_types: Mapping[str, PackType], seed: Optional[int] = None,
+                 card_names: Optional[Mapping[str, str]] = None):
+        """
+        :param database: A Database with the initial schema and the card catalog.
+        :param pack_types: The compiled pack types by key, from build_pack_types.
+        :param seed: Seed for the random generator, for reproducible packs.
+        :param card_names: The display name of each card id.
+        """
+        self.database = database
+        self.pack_types = dict(pack_types)
+        self.card_names = dict(card_names or {})
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    async def load(cls, database, path: str = DEFAULT_PACKS, seed: Optional[int] = None) -> "PackService":
+        """Build the pack types of a specification file over the catalog stored in the database."""
+        catalog = await database.fetchall("SELECT card_id, rarity, name FROM card_definitions")
+        pack_types = build_pack_types(load_pack_specs(path), ((row["card_id"], row["rarity"]) for row in catalog))
+        return cls(database, pack_types, seed, {row["card_id"]: row["name"] for row in catalog})
+
+    def card_name(self, card_id: str) -> str:
+        return self.card_names.get(card_id, card_id)
+
+    def pack_type(self, key: str) -> PackType:
+        pack_type = self.pack_types.get(key)
+        if pack_type is None:
+            raise KeyError(f"Unknown pack type '{key}'.")
+        return pack_type
+
+    def generate(self, key: str, count: int = 1) -> np.ndarray:
+        """
+        Draw the cards of count packs without storing them.
+
+        :return: A [pack, card] array of card ids, slots in order.
+        """
+        pack_type = self.pack_type(key)
+        return np.concatenate([slot.card_ids[slot.table.sample(self.rng, (count, slot.count))] for slot in pack_type.slots], axis=1)
+
+    async def open_packs(self, user_id: int, key: str, count: int = 1, connection=None) -> List[List[str]]:
+        """
+        Open count packs for a user and add every card to their collection in one transaction.
+
+        :param connection: A connection already in a transaction to write in,
+                           so the cards can be stored together with the payment for them.
+        :return: The card ids of each pack.
+        """
+        if count < 1:
+            raise ValueError("At least one pack must be opened.")
+        packs = self.generate(key, count)
+        rows = ((user_id, card_id, key) for card_id in packs.flat)
+        if connection is None:
+            async with self.database.transaction() as connection:
+                await self._store(connection, user_id, rows)
+        else:
+            await self._store(connection, user_id, rows)
+        return packs.tolist()
+
+    @staticmethod
+    async def _store(connection, user_id: int, rows):
+        await connection.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,))
+        await connection.executemany("INSERT INTO owned_cards (user_id, card_id, source) VALUES (?, ?, ?)", rows)
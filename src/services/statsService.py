@@ -0,0 +1,179 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Optional
+from User import User
+from services.gameService import COMPUTER_ID
+
+DEFAULT_CAPACITY = 10000
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+class StatsService:
+    """
+    Users' victories, losses and card play counters, served from an LRU
+    cache in memory and saved to the database behind the callers' backs.
+
+    Recording a match only changes the cached Users; a background task saves
+    every changed user in one transaction every flush_interval seconds, and
+    close() saves whatever is left. A changed user pushed out of the cache is
+    kept aside until it has been saved, so nothing is lost to eviction.
+
+    Usage:
+        stats = StatsService(database)
+        await stats.start()
+        games = GameService(deck_factory, database, on_finish=stats.record_match)
+        user = await stats.get(discord_id)
+        await stats.close()
+    """
+
+    def __init__(self, database, capacity: int = DEFAULT_CAPACITY, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        """
+        :param database: A Database with the user_card_plays table.
+        :param capacity: The most users kept in the cache.
+        :param flush_interval: Seconds between saves of the changed users.
+        """
+        self.database = database
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self._cache: "OrderedDict[int, User]" = OrderedDict()
+        # Changed users evicted from the cache before being saved
+        self._evicted: Dict[int, User] = {}
+        self._loading: Dict[int, asyncio.Future] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.flushes = 0
+
+    async def start(self):
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Stop the periodic saves and save every changed user."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    async def __aenter__(self) -> "StatsService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                # The users stay changed and are saved by the next flush
+                pass
+
+    def _put(self, user: User):
+        cache = self._cache
+        cache[user.discord_id] = user
+        cache.move_to_end(user.discord_id)
+        while len(cache) > self.capacity:
+            _, evicted = cache.popitem(last=False)
+            if evicted.changed:
+                self._evicted[evicted.discord_id] = evicted
+
+    def cached(self, user_id: int) -> Optional[User]:
+        """A user's stats if they are in memory, without touching the database."""
+        user = self._cache.get(user_id)
+        if user is not None:
+            self._cache.move_to_end(user_id)
+            return user
+        user = self._evicted.pop(user_id, None)
+        if user is not None:
+            self._put(user)
+        return user
+
+    async def get(self, user_id: int) -> User:
+        """A user's stats, loaded from the database on a cache miss; a user with no record starts at zero."""
+        user = self.cached(user_id)
+        if user is not None:
+            return user
+        # Concurrent misses for one user share a single load
+        loading = self._loading.get(user_id)
+        if loading is not None:
+            return await loading
+        loading = self._loading[user_id] = asyncio.get_running_loop().create_future()
+        try:
+            user = await self._load(user_id)
+            self._put(user)
+            loading.set_result(user)
+        except BaseException as error:
+            loading.set_exception(error)
+            # Nobody else may be waiting; the exception must not be reported as unretrieved
+            loading.exception()
+            raise
+        finally:
+            del self._loading[user_id]
+        return user
+
+    async def _load(self, user_id: int) -> User:
+        async with self.database.acquire() as connection:
+            row = await connection.fetchone("SELECT victories, losses FROM users WHERE user_id = ?", (user_id,))
+            plays = await connection.fetchall("SELECT card_id, plays FROM user_card_plays WHERE user_id = ?", (user_id,))
+        victories, losses = row if row is not None else (0, 0)
+        return User(user_id, victories, losses, card_plays={card_id: count for card_id, count in plays})
+
+    async def record_match(self, match):
+        """
+        Record the result and the card plays of every human seat of a finished match,
+        for use as GameService's on_finish hook. A match without a winner counts for neither side.
+        """
+        winner = match.winner
+        for player in match.players:
+            if player.discord_id == COMPUTER_ID:
+                continue
+            user = await self.get(player.discord_id)
+            if winner is not None:
+                user.record_result(player is winner)
+            for card_id, plays in player.card_plays.items():
+                user.record_play(card_id, plays)
+
+    async def flush(self) -> int:
+        """
+        Save every changed user in one transaction.
+
+        :return: The number of users saved.
+        """
+        async with self._flush_lock:
+            users = [user for user in self._cache.values() if user.changed] + list(self._evicted.values())
+            if not users:
+                return 0
+            # Taken before the write, so changes made while it runs are saved by the next flush
+            results = [(user.discord_id, user.victories, user.losses) for user in users if user.results_changed]
+            plays = [(user.discord_id, card_id, user.card_plays[card_id]) for user in users for card_id in user.changed_cards]
+            changed = [(user, user.results_changed, set(user.changed_cards)) for user in users]
+            for user in users:
+                user.results_changed = False
+                user.changed_cards.clear()
+            # Evicted users stay where get() finds them until the write has committed
+            evicted = dict(self._evicted)
+            try:
+                async with self.database.transaction() as connection:
+                    await connection.executemany("INSERT OR IGNORE INTO users (user_id) VALUES (?)", [(user.discord_id,) for user in users])
+                    await connection.executemany(
+                        "UPDATE users SET victories = ?, losses = ? WHERE user_id = ?",
+                        [(victories, losses, user_id) for user_id, victories, losses in results])
+                    await connection.executemany(
+                        "INSERT INTO user_card_plays (user_id, card_id, plays) VALUES (?, ?, ?) "
+                        "ON CONFLICT (user_id, card_id) DO UPDATE SET plays = excluded.plays", plays)
+            except BaseException:
+                for user, results_changed, cards in changed:
+                    user.results_changed |= results_changed
+                    user.changed_cards |= cards
+                raise
+            for user_id, user in evicted.items():
+                # Unless it was read back into the cache or changed again while the write ran
+                if self._evicted.get(user_id) is user and not user.changed:
+                    del self._evicted[user_id]
+            self.flushes += 1
+            return len(users)
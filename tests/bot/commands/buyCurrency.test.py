@@ -0,0 +1,39 @@
+import asyncio
+from bot.commands.buyCurrency import buy_currency
+from database.connection import Database
+from database.migrate import migrate
+from services.currencyService import CurrencyService
+
+def run(test):
+    async def main():
+        async with Database() as database:
+            await migrate(database)
+            async with CurrencyService(database) as currency:
+                await test(database, currency)
+    asyncio.run(main())
+
+def test_repeated_purchase_is_credited_once():
+    async def test(database, currency):
+        reply = await buy_currency(currency, 1, "medium", "pay_1")
+        assert reply.startswith("You bought a Chest of coins")
+        assert await currency.balance(1) == 1200
+        reply = await buy_currency(currency, 1, "medium", "pay_1")
+        assert reply.startswith("That purchase was already credited.")
+        assert await currency.balance(1) == 1200
+        # Another payment for the same bundle is credited
+        await buy_currency(currency, 1, "medium", "pay_2")
+        assert await currency.balance(1) == 2400
+    run(test)
+
+def test_concurrent_deliveries_of_a_purchase_credit_once():
+    async def test(database, currency):
+        replies = await asyncio.gather(*(buy_currency(currency, 1, "large", "pay_1") for _ in range(5)))
+        assert sum(reply.startswith("You bought") for reply in replies) == 1
+        assert await currency.balance(1) == 3000
+    run(test)
+
+def test_unknown_bundle_credits_nothing():
+    async def test(database, currency):
+        assert await buy_currency(currency, 1, "huge", "pay_1") == "There is no 'huge' bundle. Available bundles: small, medium, large."
+        assert await currency.balance(1) == 0
+    run(test)
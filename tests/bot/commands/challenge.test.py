@@ -0,0 +1,97 @@
+import asyncio
+from bot.commands.challenge import challenge
+from database.connection import Database
+from database.migrate import migrate
+from services.gameService import GameService
+from TestingModels import build_decks
+
+def run(test, database=False):
+    async def main():
+        if not database:
+            service = GameService(lambda user_id: build_decks()[user_id % 2])
+            await test(service)
+            await service.close()
+            return
+        async with Database() as opened:
+            await migrate(opened)
+            service = GameService(lambda user_id: build_decks()[user_id % 2], opened)
+            await test(service)
+            await service.close()
+    asyncio.run(main())
+
+def hands(match):
+    return [[card.name for card in player.hand.cards] for player in match.players]
+
+def test_challenge_starts_a_match_and_prompts_the_first_seat():
+    async def test(service):
+        reply = await challenge(service, 1, 2)
+        # Who goes first is drawn at random
+        first = service.match_of(1).waiting[0]
+        assert reply.startswith(f"Match 1 started. <@{first}>, it is your move.\n<@{first}> will go first.")
+        assert await challenge(service, 2, 3) == "User 2 is already in a match."
+        assert await challenge(service, 3, 3) == "A user cannot challenge themselves."
+    run(test)
+
+def test_moves_out_of_turn_are_refused():
+    async def test(service):
+        match, _ = service.create_match(1, 2, seed=3)
+        assert match.waiting == (1, "main")
+        assert await service.act(2, ("skip",)) == (False, "It is not your move.", [])
+        assert (await match.send(3, ("skip",))).message == "You are not playing in this match."
+        assert (await service.act(1, ("attack", [0]))).message == "You can only attack in the Combat phase."
+        assert match.waiting == (1, "main") and match.actions == 0
+    run(test)
+
+def test_attackers_must_be_on_the_battlefield():
+    async def test(service):
+        match, _ = service.create_match(1, 2, seed=3)
+        assert (await service.act(1, ("skip",))).ok
+        assert match.waiting == (1, "combat")
+        assert (await service.act(1, ("play", "Physics Lab"))).message == "Declare your attackers first."
+        creatures = len(match.seat(1).creatures)
+        for indexes in ([creatures], [-1], ["1"]):
+            assert (await service.act(1, ("attack", indexes))).message == "Choose attackers by their number on your battlefield."
+        assert match.waiting == (1, "combat")
+        assert (await service.act(1, ("attack", []))).ok
+        assert match.waiting == (1, "main") and match.game.phase == "Main2"
+    run(test)
+
+def test_either_seat_may_concede_at_any_time():
+    async def test(service):
+        finished = asyncio.Event()
+        service.on_finish = lambda match: asyncio.sleep(0, finished.set())
+        match, _ = service.create_match(1, 2, seed=3)
+        reply = await service.act(2, ("concede",))
+        assert reply == (True, "<@2> conceded.", ["<@1> wins the game!"])
+        assert match.finished and match.winner is match.seat(1)
+        await asyncio.wait_for(finished.wait(), 1)
+        assert service.match_of(1) is None and service.match_of(2) is None
+        assert (await match.send(1, ("skip",))).message == "This match is over."
+    run(test)
+
+def test_hibernated_match_wakes_where_it_stopped():
+    async def test(service):
+        match, _ = service.create_match(1, 2, seed=3)
+        await service.act(1, ("skip",))
+        before = (match.game.phase, match.game.turn_counter, hands(match))
+        assert await service.hibernate(match.match_id)
+        assert service.matches == {} and not await service.hibernate(match.match_id)
+        # The next move wakes the match
+        assert (await service.act(1, ("attack", []))).ok
+        woken = service.match_of(1)
+        assert woken is not match
+        assert (before[0], before[1], hands(woken)) == ("Combat", match.game.turn_counter, before[2])
+        assert woken.game.phase == "Main2"
+    run(test)
+
+def test_hibernated_match_is_stored_until_it_wakes():
+    async def test(service):
+        match, _ = service.create_match(1, 2, seed=3)
+        before = hands(match)
+        assert await service.hibernate(match.match_id)
+        stored = "SELECT COUNT(*) FROM hibernated_matches"
+        assert await service.database.fetchval(stored) == 1
+        woken = await service.wake(match.match_id)
+        assert hands(woken) == before and woken.waiting == (1, "main")
+        assert await service.database.fetchval(stored) == 0
+    run(test, database=True)
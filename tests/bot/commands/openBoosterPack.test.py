@@ -0,0 +1,60 @@
+import asyncio
+import sqlite3
+import pytest
+from bot.commands.openBoosterPack import open_booster_pack
+from database.connection import Database
+from database.migrate import migrate
+from services.currencyService import CurrencyService
+from services.packService import PackService, build_pack_types, load_pack_specs
+
+CARDS = [("c1", "Goblin", "common"), ("c2", "Knight", "common"), ("u1", "Mage", "uncommon"), ("r1", "Dragon", "rare")]
+
+def run(test):
+    async def main():
+        async with Database() as database:
+            await migrate(database)
+            await database.executemany(
+                "INSERT INTO card_definitions (card_id, name, card_type, rarity, cost, attributes, details) VALUES (?, ?, 'Creature', ?, '{}', '{}', '{}')",
+                CARDS)
+            packs = await PackService.load(database, seed=7)
+            async with CurrencyService(database) as currency:
+                await currency.credit(1, 250, "purchase")
+                await test(database, packs, currency)
+    asyncio.run(main())
+
+async def owned(database, user_id=1) -> int:
+    return await database.fetchval("SELECT COUNT(*) FROM owned_cards WHERE user_id = ?", (user_id,))
+
+def test_paid_pack_is_charged_once():
+    async def test(database, packs, currency):
+        reply = await open_booster_pack(packs, 1, "standard", currency_service=currency, interaction_id=42)
+        assert reply.startswith("You opened 1 Standard Pack:")
+        assert await currency.balance(1) == 150
+        assert await owned(database) == 8
+        assert await open_booster_pack(packs, 1, "standard", currency_service=currency, interaction_id=42) == "Those packs were already opened."
+        assert await currency.balance(1) == 150
+        assert await owned(database) == 8
+    run(test)
+
+def test_unaffordable_packs_are_not_opened():
+    async def test(database, packs, currency):
+        reply = await open_booster_pack(packs, 1, "standard", count=3, currency_service=currency)
+        assert "cost" in reply
+        assert await currency.balance(1) == 250
+        assert await owned(database) == 0
+    run(test)
+
+def test_failed_open_stores_neither_payment_nor_cards():
+    async def test(database, packs, currency):
+        # Cards missing from the catalog break the owned_cards foreign key half-way through the transaction
+        broken = PackService(database, build_pack_types(load_pack_specs(), [("missing", "common")]))
+        with pytest.raises(sqlite3.IntegrityError):
+            await open_booster_pack(broken, 1, "standard", currency_service=currency, interaction_id=43)
+        assert await currency.balance(1) == 250
+        assert await owned(database) == 0
+        # The retry is charged and opened rather than told the packs were opened
+        reply = await open_booster_pack(packs, 1, "standard", currency_service=currency, interaction_id=43)
+        assert reply.startswith("You opened")
+        assert await currency.balance(1) == 150
+        assert await owned(database) == 8
+    run(test)
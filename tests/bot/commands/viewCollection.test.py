@@ -0,0 +1,59 @@
+import asyncio
+from bot.commands.viewCollection import view_collection
+from bot.utils.cardUtils import EMBED_DESCRIPTION_LIMIT
+from database.connection import Database
+from database.migrate import migrate
+from Rendering import card_line
+from TestingModels import fire_elemental, holy_elemental
+
+def run(test):
+    async def main():
+        async with Database() as database:
+            await migrate(database)
+            await database.executemany(
+                "INSERT INTO card_definitions (card_id, name, card_type, rarity, cost, attributes, details) VALUES (?, ?, 'Creature', 'common', '{}', '{}', '{}')",
+                [(fire_elemental.card_id, fire_elemental.name), (holy_elemental.card_id, holy_elemental.name), ("retired", "Retired")])
+            await database.executemany("INSERT INTO users (user_id) VALUES (?)", [(1,), (2,)])
+            await test(database)
+    asyncio.run(main())
+
+async def own(database, user_id, card_id, copies):
+    await database.executemany("INSERT INTO owned_cards (user_id, card_id) VALUES (?, ?)", [(user_id, card_id)] * copies)
+
+def test_collection_counts_copies_by_card():
+    async def test(database):
+        await own(database, 1, fire_elemental.card_id, 3)
+        await own(database, 1, holy_elemental.card_id, 1)
+        await own(database, 1, "retired", 2)
+        await own(database, 2, fire_elemental.card_id, 5)
+        reply = await view_collection(database, 1)
+        # Sorted by name; a card no longer registered is listed by its id
+        assert reply.splitlines() == [
+            "**<@1>'s collection**",
+            f"3× {card_line(fire_elemental)}",
+            f"1× {card_line(holy_elemental)}",
+            "2× retired",
+            "Page 1 of 1 · 6 cards",
+        ]
+    run(test)
+
+def test_empty_collection_and_pages_out_of_range():
+    async def test(database):
+        assert await view_collection(database, 1) == "**<@1>'s collection**\nNo cards yet.\nPage 1 of 1 · 0 cards"
+        await own(database, 1, fire_elemental.card_id, 1)
+        assert (await view_collection(database, 1, page=0)).splitlines()[1] == f"1× {card_line(fire_elemental)}"
+        assert "No cards yet." in await view_collection(database, 1, page=5)
+    run(test)
+
+def test_large_collection_is_paged():
+    async def test(database):
+        card_ids = [f"card_{number:03}" for number in range(300)]
+        await database.executemany(
+            "INSERT INTO card_definitions (card_id, name, card_type, rarity, cost, attributes, details) VALUES (?, ?, 'Creature', 'common', '{}', '{}', '{}')",
+            [(card_id, card_id) for card_id in card_ids])
+        await database.executemany("INSERT INTO owned_cards (user_id, card_id) VALUES (1, ?)", [(card_id,) for card_id in card_ids])
+        lines = (await view_collection(database, 1, page=2)).splitlines()
+        assert lines[-1] == "Page 2 of 15 · 300 cards"
+        assert lines[1] == "1× card_020" and len(lines) == 22
+        assert len("\n".join(lines[1:-1])) <= EMBED_DESCRIPTION_LIMIT
+    run(test)
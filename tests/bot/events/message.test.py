@@ -0,0 +1,185 @@
+import asyncio
+import pytest
+from bot.events.message import LocalGateway, MessageBatcher, RateLimited, TokenBucket
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def sent(gateway, channel_id=1):
+    return [message["content"] for message in gateway.messages.get(channel_id, {}).values()]
+
+def test_bucket_bursts_then_refills_at_its_rate():
+    clock = Clock()
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=clock)
+    assert [bucket.take() for _ in range(4)] == [True, True, True, False]
+    assert bucket.delay() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.take() and not bucket.take()
+    # An idle bucket refills no further than its capacity
+    clock.now += 60
+    assert [bucket.take() for _ in range(4)] == [True, True, True, False]
+
+def test_bucket_pause_waits_as_long_as_a_429_asks():
+    clock = Clock()
+    bucket = TokenBucket(rate=1.0, capacity=5, clock=clock)
+    bucket.pause(2.5)
+    assert not bucket.take()
+    assert bucket.delay() == pytest.approx(2.5)
+    clock.now += 2.5
+    assert bucket.take() and not bucket.take()
+
+def test_narration_is_coalesced_until_flushed():
+    async def main():
+        gateway = LocalGateway()
+        async with MessageBatcher(gateway, rate=100, burst=10, linger=10) as batcher:
+            batcher.post(1, ["Alice plays Goblin."])
+            batcher.post(1, ["Goblin attacks.", "Bob takes 3 damage."])
+            await asyncio.sleep(0.05)
+            assert gateway.calls == []
+            batcher.flush(1)
+            await batcher.wait_idle(1)
+            assert sent(gateway) == ["Alice plays Goblin.\nGoblin attacks.\nBob takes 3 damage."]
+            assert batcher.calls == 1 and batcher.lines == 3
+    asyncio.run(main())
+
+def test_narration_is_sent_after_lingering():
+    async def main():
+        gateway = LocalGateway()
+        async with MessageBatcher(gateway, linger=0.05) as batcher:
+            batcher.post(1, ["a"])
+            batcher.post(1, ["b"])
+            await asyncio.wait_for(batcher.wait_idle(1), 1)
+            assert sent(gateway) == ["a\nb"]
+    asyncio.run(main())
+
+def test_long_narration_is_split_at_the_message_length():
+    async def main():
+        gateway = LocalGateway()
+        lines = [str(number) * 600 for number in range(1, 6)] + ["x" * 2500]
+        async with MessageBatcher(gateway, rate=100, burst=10, linger=10) as batcher:
+            batcher.post(1, lines)
+            batcher.flush(1)
+            await batcher.wait_idle(1)
+        messages = sent(gateway)
+        assert all(len(message) <= 2000 for message in messages)
+        assert messages[:2] == ["\n".join(lines[:3]), "\n".join(lines[3:5])]
+        # A line longer than a message is cut short
+        assert messages[2] == "x" * 1999 + "…"
+    asyncio.run(main())
+
+def test_superseded_updates_are_dropped_and_later_versions_edit():
+    async def main():
+        gateway = LocalGateway()
+        async with MessageBatcher(gateway, rate=100, burst=10, linger=10) as batcher:
+            for version in range(1, 4):
+                batcher.update(1, "board", content=f"board v{version}")
+            batcher.flush(1)
+            await batcher.wait_idle(1)
+            assert sent(gateway) == ["board v3"]
+            assert batcher.superseded == 2
+            batcher.update(1, "board", content="board v4")
+            batcher.flush(1)
+            await batcher.wait_idle(1)
+            assert sent(gateway) == ["board v4"]
+            batcher.forget(1, "board")
+            batcher.update(1, "board", content="board v5")
+            batcher.flush(1)
+            await batcher.wait_idle(1)
+            assert sent(gateway) == ["board v4", "board v5"]
+            assert [call for _, call, _ in gateway.calls] == ["send", "edit", "send"]
+    asyncio.run(main())
+
+def test_backlog_overflow_reports_the_skipped_lines():
+    async def main():
+        gateway = LocalGateway()
+        async with MessageBatcher(gateway, rate=100, burst=10, linger=10, backlog=3) as batcher:
+            batcher.post(1, [f"line {number}" for number in range(1, 6)])
+            batcher.post(1, ["line 6"])
+            batcher.flush(1)
+            await batcher.wait_idle(1)
+        assert sent(gateway) == ["… 3 earlier lines skipped\nline 4\nline 5\nline 6"]
+    asyncio.run(main())
+
+def test_rate_limited_narration_is_retried_first_after_the_pause():
+    async def main():
+        # The batcher's bucket allows far more than the gateway, so its second call gets a 429
+        gateway = LocalGateway(limit=1, period=0.2)
+        async with MessageBatcher(gateway, rate=1000, burst=10, linger=0) as batcher:
+            batcher.post(1, ["a"])
+            await batcher.wait_idle(1)
+            batcher.post(1, ["b"])
+            await asyncio.sleep(0.05)
+            assert gateway.rate_limited == 1
+            # Posted while the channel waits out the 429, so it joins the line put back
+            batcher.post(1, ["c"])
+            await asyncio.wait_for(batcher.wait_idle(1), 1)
+            assert sent(gateway) == ["a", "b\nc"]
+            assert gateway.rate_limited == 1 and batcher.failures == 0
+            first, second = (called for called, _, _ in gateway.calls)
+            assert second - first >= 0.19
+    asyncio.run(main())
+
+def test_rate_limited_update_is_replaced_by_a_newer_version():
+    async def main():
+        gateway = LocalGateway(limit=1, period=0.2)
+        async with MessageBatcher(gateway, rate=1000, burst=10, linger=0) as batcher:
+            batcher.post(1, ["a"])
+            await batcher.wait_idle(1)
+            batcher.update(1, "board", content="board v1")
+            await asyncio.sleep(0.05)
+            assert gateway.rate_limited == 1
+            batcher.update(1, "board", content="board v2")
+            await asyncio.wait_for(batcher.wait_idle(1), 1)
+            assert sent(gateway) == ["a", "board v2"]
+    asyncio.run(main())
+
+def test_other_gateway_errors_lose_the_message_only():
+    class Failing(LocalGateway):
+        async def send(self, channel_id, content=None, embed=None):
+            if content == "boom":
+                raise ConnectionError(content)
+            return await super().send(channel_id, content, embed)
+
+    async def main():
+        gateway = Failing()
+        async with MessageBatcher(gateway, rate=100, burst=10, linger=10) as batcher:
+            batcher.update(1, "board", content="boom")
+            batcher.flush(1)
+            await batcher.wait_idle(1)
+            batcher.post(1, ["after"])
+            batcher.flush(1)
+            await batcher.wait_idle(1)
+            assert batcher.failures == 1
+        assert sent(gateway) == ["after"]
+    asyncio.run(main())
+
+def test_close_drains_every_channel():
+    async def main():
+        gateway = LocalGateway()
+        batcher = MessageBatcher(gateway, rate=100, burst=10, linger=10)
+        for channel_id in (1, 2, 3):
+            batcher.post(channel_id, [f"hello {channel_id}"])
+            batcher.update(channel_id, "board", content=f"board {channel_id}")
+        await asyncio.wait_for(batcher.close(), 5)
+        for channel_id in (1, 2, 3):
+            assert sent(gateway, channel_id) == [f"hello {channel_id}", f"board {channel_id}"]
+        assert batcher.channels == {}
+        with pytest.raises(RuntimeError):
+            batcher.post(1, ["too late"])
+    asyncio.run(main())
+
+def test_local_gateway_enforces_its_window():
+    async def main():
+        gateway = LocalGateway(limit=2, period=10)
+        await gateway.send(1, "a")
+        await gateway.send(1, "b")
+        with pytest.raises(RateLimited) as limited:
+            await gateway.send(1, "c")
+        assert 9 < limited.value.retry_after <= 10
+        # Channels have windows of their own
+        await gateway.send(2, "d")
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+from bot.utils.cardUtils import EMBED_DESCRIPTION_LIMIT, EMBED_FIELD_VALUE_LIMIT, board_embed, collection_embed, fit_lines, hand_embed
+from Agent import GreedyAgent
+from Gamestate import Gamestate
+from Player import Player
+from Rendering import card_line
+from TestingModels import build_decks, fire_elemental, holy_elemental, laser_handgun, physics_lab
+
+def test_cached_line_follows_the_card_state():
+    card = fire_elemental.create_instance()
+    fresh = card_line(card)
+    assert fresh == card_line(fire_elemental)
+
+    card.hp -= 2
+    hurt = card_line(card)
+    assert hurt == f"{fresh} · 3/5 HP"
+    card.tapped = True
+    assert card_line(card) == f"{hurt} · tapped"
+    laser_handgun.create_instance().attach_to(card)
+    assert card_line(card) == f"{hurt} · tapped · equipped with Laser Handgun"
+
+    # Back in the state it started in, the card renders as its definition again
+    card.hp, card.tapped, card.attachments = fire_elemental.hp, False, ()
+    assert card_line(card) == fresh
+
+def test_copies_in_the_same_state_share_a_line():
+    first, second = fire_elemental.create_instance(), fire_elemental.create_instance()
+    first.hp = second.hp = 1
+    assert card_line(first) is card_line(second)
+    # Another card with the same hp is not confused with them
+    other = holy_elemental.create_instance()
+    other.hp = 1
+    assert card_line(other) != card_line(first)
+
+def test_fit_lines_notes_the_lines_left_out():
+    lines = [f"line {number}" for number in range(1, 11)]
+    assert fit_lines(lines, 1000) == "\n".join(lines)
+    text = fit_lines(lines, 40)
+    assert len(text) <= 40
+    assert text == "line 1\nline 2\nline 3\nline 4\n…and 6 more"
+    assert fit_lines([], 10) == ""
+
+def test_embeds_stay_within_discord_limits():
+    player = Player("Alice", 1, build_decks()[0])
+    for _ in range(500):
+        player.hand.add_card(physics_lab.create_instance())
+    description = hand_embed(player)["description"]
+    assert len(description) <= EMBED_DESCRIPTION_LIMIT and description.endswith("more")
+
+    players = [Player(name, discord_id, deck, agent=GreedyAgent()) for (name, discord_id), deck in zip((("Alice", 1), ("Bob", 2)), build_decks())]
+    game = Gamestate(*players, headless=True, seed=1)
+    for _ in range(200):
+        players[0].enter_battlefield(fire_elemental.create_instance())
+    fields = board_embed(game, viewer_id=1)["fields"]
+    assert len(fields[0]["value"]) <= EMBED_FIELD_VALUE_LIMIT
+    assert fields[1]["value"] == "Nothing on the battlefield."
+
+def test_collection_pages():
+    counts = {f"card_{number:03}": 1 for number in range(45)}
+    embed = collection_embed("Collection", counts, page=3)
+    assert embed["description"].splitlines() == [f"1× card_{number:03}" for number in range(40, 45)]
+    assert embed["footer"]["text"] == "Page 3 of 3 · 45 cards"
+    assert collection_embed("Collection", {})["description"] == "No cards yet."
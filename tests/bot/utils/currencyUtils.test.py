@@ -0,0 +1,33 @@
+import pytest
+from bot.utils.currencyUtils import MAX_AMOUNT, format_amount, interaction_key, parse_amount
+
+def test_parse_amount_reads_separators_and_thousands():
+    assert parse_amount("250") == 250
+    assert parse_amount(" 1,500 ") == 1500
+    assert parse_amount("10_000") == 10000
+    assert parse_amount("2k") == 2000
+    assert parse_amount("1.5K") == 1500
+    assert parse_amount(str(MAX_AMOUNT)) == MAX_AMOUNT
+
+@pytest.mark.parametrize("text", ["0", "-5", "-2k", "1.5", "0.0005k"])
+def test_parse_amount_refuses_amounts_that_are_not_positive_and_whole(text):
+    with pytest.raises(ValueError, match="not a positive whole amount"):
+        parse_amount(text)
+
+@pytest.mark.parametrize("text", [str(MAX_AMOUNT + 1), "99999999999999999999999", "1e400", "inf", "-inf"])
+def test_parse_amount_refuses_amounts_too_large_to_store(text):
+    with pytest.raises(ValueError, match="not a positive whole amount"):
+        parse_amount(text)
+
+@pytest.mark.parametrize("text", ["", "k", "abc", "nan", "12 coins", "0x10", "1,2,3k!"])
+def test_parse_amount_refuses_junk(text):
+    with pytest.raises(ValueError, match="not a positive whole amount"):
+        parse_amount(text)
+
+def test_interaction_key_is_unique_per_interaction_and_action():
+    assert interaction_key(42, "purchase") == "purchase:42"
+    keys = {interaction_key(interaction_id, action) for interaction_id in (1, 2) for action in ("purchase", "pack")}
+    assert len(keys) == 4
+
+def test_format_amount_groups_thousands():
+    assert format_amount(1250) == "🪙 1,250 coins"
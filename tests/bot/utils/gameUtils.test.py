@@ -0,0 +1,34 @@
+import pytest
+from bot.utils.gameUtils import format_reply, parse_action
+
+def test_attack_numbers_are_one_based():
+    assert parse_action("attack 1 3") == ("attack", [0, 2])
+    assert parse_action("Attack 2, 1") == ("attack", [1, 0])
+    # No numbers holds every creature back
+    assert parse_action("attack") == ("attack", [])
+
+@pytest.mark.parametrize("text", ["attack 0", "attack 1 0", "attack -1", "attack one", "attack 1.5"])
+def test_attack_refuses_numbers_that_are_not_creatures(text):
+    assert parse_action(text) is None
+
+def test_attach_names_the_equipment_and_the_creature():
+    assert parse_action("attach Laser Handgun to Fire Elemental") == ("attach", "Laser Handgun", "Fire Elemental")
+    assert parse_action("attach  Laser Handgun  to  Holy Angel ") == ("attach", "Laser Handgun", "Holy Angel")
+    assert parse_action("attach Laser Handgun") is None
+
+def test_other_moves():
+    assert parse_action("play Physics Lab") == ("play", "Physics Lab")
+    assert parse_action("activate Laser Beam") == ("activate", "Laser Beam")
+    assert parse_action(" SKIP ") == ("skip",)
+    assert parse_action("concede") == ("concede",)
+
+@pytest.mark.parametrize("text", ["", "   ", "play", "activate", "skip now", "concede please", "hello there"])
+def test_text_that_is_not_a_move(text):
+    assert parse_action(text) is None
+
+def test_long_replies_keep_the_newest_lines():
+    assert format_reply("Your move.", ["a", "b"]) == "Your move.\na\nb"
+    assert format_reply("", ["a"]) == "a"
+    reply = format_reply("Your move.", [str(number) * 10 for number in range(10)], max_length=50)
+    assert len(reply) == 50
+    assert reply.startswith("…") and reply.endswith("9" * 10)
@@ -0,0 +1,16 @@
+import os
+import sys
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+# Services and the bot import from src, the game models import each other by module name
+sys.path[:0] = [os.path.abspath(SRC), os.path.abspath(os.path.join(SRC, "models"))]
+
+def pytest_configure(config):
+    # Test modules are named like the modules they test, with a dot pytest's default import mode cannot import
+    config.option.importmode = "importlib"
+
+def pytest_collect_file(parent, file_path):
+    # A module named on the command line is collected by pytest itself
+    if file_path.name.endswith(".test.py") and not parent.session.isinitpath(file_path):
+        return pytest.Module.from_parent(parent, path=file_path)
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import pytest
+from database.connection import Database, DatabaseError
+
+def run(test, path=":memory:", **options):
+    async def main():
+        async with Database(path, **options) as database:
+            await database.execute("CREATE TABLE ledger (user_id INTEGER PRIMARY KEY, amount INTEGER NOT NULL)")
+            await test(database)
+    asyncio.run(main())
+
+def test_memory_database_is_one_connection():
+    async def test(database):
+        assert database.pool_size == 1
+        await database.insert("INSERT INTO ledger VALUES (?, ?)", (1, 10))
+        assert await database.fetchval("SELECT amount FROM ledger WHERE user_id = ?", (1,)) == 10
+        assert await database.fetchval("SELECT amount FROM ledger WHERE user_id = ?", (2,), "none") == "none"
+    run(test)
+
+def test_pool_lends_at_most_pool_size_connections(tmp_path):
+    async def test(database):
+        borrowed, most = 0, 0
+
+        async def borrow():
+            nonlocal borrowed, most
+            async with database.acquire() as connection:
+                borrowed += 1
+                most = max(most, borrowed)
+                await connection.fetchall("SELECT * FROM ledger")
+                await asyncio.sleep(0.01)
+                borrowed -= 1
+        await asyncio.gather(*(borrow() for _ in range(10)))
+        assert most == 2
+        assert await database.fetchval("PRAGMA journal_mode") == "wal"
+    run(test, os.path.join(tmp_path, "pool.db"), pool_size=2)
+
+def test_readers_see_only_committed_writes(tmp_path):
+    async def test(database):
+        async with database.transaction() as connection:
+            await connection.execute("INSERT INTO ledger VALUES (1, 10)")
+            # Another connection of the pool reads the last committed state
+            assert await database.fetchval("SELECT COUNT(*) FROM ledger") == 0
+        assert await database.fetchval("SELECT COUNT(*) FROM ledger") == 1
+    run(test, os.path.join(tmp_path, "wal.db"), pool_size=2)
+
+def test_transaction_rolls_back_when_the_block_raises():
+    async def test(database):
+        with pytest.raises(ValueError):
+            async with database.transaction() as connection:
+                await connection.execute("INSERT INTO ledger VALUES (1, 10)")
+                raise ValueError("changed my mind")
+        assert await database.fetchval("SELECT COUNT(*) FROM ledger") == 0
+        async with database.transaction() as connection:
+            assert connection.in_transaction
+            await connection.execute("INSERT INTO ledger VALUES (1, 10)")
+        assert not connection.in_transaction
+        assert await database.fetchval("SELECT COUNT(*) FROM ledger") == 1
+    run(test)
+
+def test_transactions_cannot_be_nested():
+    async def test(database):
+        async with database.transaction() as connection:
+            with pytest.raises(DatabaseError):
+                async with connection.transaction():
+                    pass
+    run(test)
+
+def test_cancelled_transaction_leaves_nothing_open():
+    async def test(database):
+        async def write(pause: float):
+            async with database.transaction() as connection:
+                await asyncio.sleep(pause)
+                await connection.execute("INSERT INTO ledger VALUES (1, 10)")
+
+        # Cancelled while BEGIN is in the connection's thread, and inside the block
+        for ticks in (1, 2, 3):
+            task = asyncio.create_task(write(0))
+            for _ in range(ticks):
+                await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await database.execute("DELETE FROM ledger")
+        task = asyncio.create_task(write(1))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        async with database.acquire() as connection:
+            assert not connection.in_transaction
+            assert not await connection.run(lambda sqlite: sqlite.in_transaction)
+        async with database.transaction() as connection:
+            await connection.execute("INSERT INTO ledger VALUES (2, 20)")
+        assert await database.fetchval("SELECT COUNT(*) FROM ledger") == 1
+    run(test)
+
+def test_executemany_batches_a_generator_in_one_transaction():
+    async def test(database):
+        rows = ((user_id, user_id * 10) for user_id in range(2500))
+        assert await database.executemany("INSERT INTO ledger VALUES (?, ?)", rows, batch_size=1000) == 2500
+        assert await database.fetchval("SELECT SUM(amount) FROM ledger") == sum(range(2500)) * 10
+        # A failing batch undoes the ones before it
+        with pytest.raises(Exception):
+            await database.executemany("INSERT INTO ledger VALUES (?, ?)", [(5000, 1), (5001, 1), (0, 1)], batch_size=2)
+        assert await database.fetchval("SELECT COUNT(*) FROM ledger") == 2500
+    run(test)
+
+def test_executemany_joins_an_open_transaction():
+    async def test(database):
+        with pytest.raises(RuntimeError):
+            async with database.transaction() as connection:
+                await connection.executemany("INSERT INTO ledger VALUES (?, ?)", [(1, 1), (2, 2)])
+                raise RuntimeError("undo")
+        assert await database.fetchval("SELECT COUNT(*) FROM ledger") == 0
+    run(test)
+
+def test_closed_database_refuses_calls():
+    async def main():
+        database = Database()
+        with pytest.raises(DatabaseError):
+            await database.fetchall("SELECT 1")
+        await database.open()
+        await database.close()
+        with pytest.raises(DatabaseError):
+            await database.fetchall("SELECT 1")
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from Catalog import load_catalog
+from database.connection import Database
+from database.migrate import migrate
+from database.migrations.initialMigration import import_catalog
+
+CATALOG = "SELECT * FROM card_definitions ORDER BY card_id"
+
+def run(test):
+    async def main():
+        async with Database() as database:
+            await migrate(database)
+            await test(database)
+    asyncio.run(main())
+
+def test_reimporting_the_catalog_changes_nothing():
+    async def test(database):
+        catalog = load_catalog(cache=False)
+        assert await import_catalog(database, catalog.definitions.values(), catalog.rarities) == len(catalog.definitions)
+        imported = [tuple(row) for row in await database.fetchall(CATALOG)]
+        assert len(imported) == len(catalog.definitions)
+        await import_catalog(database, catalog.definitions.values(), catalog.rarities)
+        assert [tuple(row) for row in await database.fetchall(CATALOG)] == imported
+    run(test)
+
+def test_import_updates_cards_in_place():
+    async def test(database):
+        catalog = load_catalog(cache=False)
+        await import_catalog(database, catalog.definitions.values(), catalog.rarities)
+        card_id = next(iter(catalog.definitions))
+        # Owned copies keep pointing at a card whose definition changes
+        await database.execute("INSERT INTO users (user_id) VALUES (1)")
+        await database.execute("INSERT INTO owned_cards (user_id, card_id) VALUES (1, ?)", (card_id,))
+        await import_catalog(database, [catalog.definitions[card_id]], {card_id: "mythic"})
+        assert await database.fetchval("SELECT rarity FROM card_definitions WHERE card_id = ?", (card_id,)) == "mythic"
+        assert await database.fetchval("SELECT COUNT(*) FROM card_definitions") == len(catalog.definitions)
+        assert await database.fetchval("SELECT COUNT(*) FROM owned_cards WHERE card_id = ?", (card_id,)) == 1
+    run(test)
+
+# The hot queries of the services and commands, with the index that answers each alone
+@pytest.mark.parametrize("query, index", [
+    ("SELECT balance FROM currency_ledger WHERE user_id = ? ORDER BY entry_id DESC LIMIT 1", "currency_ledger_user"),
+    ("SELECT card_id, COUNT(*) FROM owned_cards WHERE user_id = ? GROUP BY card_id", "owned_cards_collection"),
+    ("SELECT card_id FROM card_definitions WHERE rarity = ?", "card_definitions_rarity"),
+    ("SELECT deck_id, name FROM decks WHERE user_id = ? ORDER BY name", "decks_user"),
+    ("SELECT match_id FROM match_results WHERE winner_id = ? ORDER BY match_id DESC", "match_results_winner"),
+    ("SELECT match_id FROM match_results WHERE loser_id = ? ORDER BY match_id DESC", "match_results_loser"),
+    ("SELECT user_id, rating, victories FROM users INDEXED BY users_leaderboard "
+     "WHERE games > 0 ORDER BY rating DESC, victories DESC, user_id", "users_leaderboard"),
+])
+def test_hot_queries_are_answered_by_a_covering_index(query, index):
+    async def test(database):
+        plan = [row[3] for row in await database.fetchall("EXPLAIN QUERY PLAN " + query, (1,) * query.count("?"))]
+        # Sorting or grouping would add a "USE TEMP B-TREE" step
+        assert len(plan) == 1 and f"USING COVERING INDEX {index}" in plan[0]
+    run(test)
@@ -0,0 +1,33 @@
+import random
+from Agent import GreedyAgent
+from Card import Creature, Trap
+from Deck import Deck
+from Gamestate import Gamestate
+from Player import Player
+from Triggers import ATTACKED
+
+GOBLIN = Creature(name="Test Goblin", attributes={"attack": 2}, cost={"Common": 1}, hp=6)
+MINES = Trap(name="Test Mines", attributes={"damage": 2}, cost={"Common": 1}, trigger_condition="Attacked", effect_name="deal_damage")
+
+def new_game():
+    players = [Player(name, number, Deck(), agent=GreedyAgent(random.Random(number))) for number, name in enumerate(("Alice", "Bob"), 1)]
+    return Gamestate(*players, headless=True, seed=1)
+
+def test_fired_trap_leaves_the_battlefield():
+    game = new_game()
+    attacker = GOBLIN.create_instance()
+    trap = MINES.create_instance()
+    game.current_player.enter_battlefield(attacker)
+    game.opponent.enter_battlefield(trap)
+    assert game.triggers.listeners(game.opponent, ATTACKED) == [trap]
+
+    game.check_traps_on_attack([attacker])
+    assert trap.triggered
+    assert attacker.hp == 4
+    assert trap not in game.opponent.traps
+    assert trap not in game.opponent.battlefield
+    assert game.triggers.listeners(game.opponent, ATTACKED) == []
+    # A clone no longer sees it either, and a second attack springs nothing
+    assert not game.clone().opponent.traps
+    game.check_traps_on_attack([attacker])
+    assert attacker.hp == 4
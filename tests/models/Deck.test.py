@@ -0,0 +1,90 @@
+import random
+from Card import Creature, Resource
+from Deck import Deck
+from Events import EventKind, MemorySink
+
+ANGEL = Creature(name="Holy Angel", attributes={"attack": 2, "defense": 1}, cost={"Common": 1}, hp=5)
+LAB = Resource(name="Physics Lab", resource_type="Physics", amount=1, cost={"Common": 0})
+GOBLIN = Creature(name="Goblin", attributes={"attack": 1, "defense": 1}, cost={"Common": 1}, hp=2)
+
+def new_deck(definitions) -> Deck:
+    deck = Deck()
+    for definition in definitions:
+        deck.add_card(definition)
+    return deck
+
+def test_cards_are_drawn_from_the_top_in_the_order_added():
+    deck = new_deck([ANGEL, LAB, GOBLIN])
+    assert [card.name for card in deck.cards] == ["Holy Angel", "Physics Lab", "Goblin"]
+    assert [card.name for card in deck.draw_many(5)] == ["Holy Angel", "Physics Lab", "Goblin"]
+    assert deck.draw() is None and len(deck) == 0
+
+def test_remove_takes_the_topmost_copy():
+    deck = new_deck([LAB, ANGEL, GOBLIN, ANGEL, ANGEL])
+    first, second, third = deck.cards[1], deck.cards[3], deck.cards[4]
+    # By name or by card id
+    assert deck.remove_card("Holy Angel") is first
+    assert deck.remove_card(ANGEL.card_id) is second
+    assert [card.name for card in deck.cards] == ["Physics Lab", "Goblin", "Holy Angel"]
+    # The removed copies are skipped when they reach the top
+    assert deck.draw().name == "Physics Lab" and deck.draw().name == "Goblin"
+    assert deck.draw() is third and deck.draw() is None
+
+def test_removed_cards_are_compacted_once_they_outnumber_the_rest():
+    deck = new_deck([LAB, GOBLIN, GOBLIN, GOBLIN])
+    deck.remove_card("Goblin")
+    deck.remove_card("Goblin")
+    assert len(deck._removed) == 2 and len(deck._pile) == 4
+    deck.remove_card("Goblin")
+    assert not deck._removed and [card.name for card in deck._pile] == ["Physics Lab"]
+    assert deck.draw().name == "Physics Lab" and deck.draw() is None
+
+def test_remove_reports_missing_cards():
+    events = MemorySink()
+    deck = new_deck([LAB])
+    deck.events = events
+    assert deck.remove_card("Goblin") is None
+    deck.draw()
+    assert deck.remove_card("Physics Lab") is None
+    assert [event.kind for event in events.drain()] == [EventKind.CARD_NOT_IN_DECK, EventKind.DECK_EMPTY]
+
+def test_draws_and_removes_interleaved_match_a_list():
+    rng = random.Random(5)
+    for _ in range(50):
+        deck = new_deck(rng.choice([ANGEL, LAB, GOBLIN]) for _ in range(rng.randint(0, 60)))
+        expected = deck.cards
+        while expected or rng.random() < 0.5:
+            if rng.random() < 0.5:
+                assert deck.draw() is (expected.pop(0) if expected else None)
+            else:
+                name = rng.choice(["Holy Angel", "Physics Lab", "Goblin"])
+                copy = next((card for card in expected if card.name == name), None)
+                if copy is not None:
+                    expected.remove(copy)
+                assert deck.remove_card(name) is copy
+            assert deck.cards == expected and len(deck) == len(expected)
+            # Removed cards stay in the pile until they reach the top or are compacted away
+            assert len(deck._pile) == len(deck) + len(deck._removed)
+            assert deck._removed <= set(deck._pile)
+            assert list(reversed(deck.snapshot())) == expected
+
+def test_snapshot_restore_and_shuffle_drop_removed_cards():
+    deck = new_deck([ANGEL, LAB, GOBLIN, ANGEL])
+    deck.remove_card("Physics Lab")
+    state = deck.snapshot()
+    assert [card.name for card in reversed(state)] == ["Holy Angel", "Goblin", "Holy Angel"]
+    deck.draw_many(3)
+    deck.restore(state)
+    assert [card.name for card in deck.cards] == ["Holy Angel", "Goblin", "Holy Angel"]
+    deck.remove_card("Goblin")
+    deck.shuffle(random.Random(1))
+    assert sorted(card.name for card in deck.cards) == ["Holy Angel", "Holy Angel"]
+    assert not deck._removed and deck.remove_card("Goblin") is None
+
+def test_full_deck_refuses_cards():
+    events = MemorySink()
+    deck = new_deck([GOBLIN] * 60)
+    deck.events = events
+    deck.add_card(ANGEL)
+    assert len(deck) == 60 and deck.remove_card("Holy Angel") is None
+    assert [event.kind for event in events.drain()][0] == EventKind.DECK_FULL
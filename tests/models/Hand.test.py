@@ -0,0 +1,96 @@
+import random
+from Card import Creature, Resource
+from Deck import Deck
+from Events import EventKind, MemorySink
+from Hand import Hand
+
+ANGEL = Creature(name="Holy Angel", attributes={"attack": 2, "defense": 1}, cost={"Common": 1}, hp=5)
+LAB = Resource(name="Physics Lab", resource_type="Physics", amount=1, cost={"Common": 0})
+GOBLIN = Creature(name="Goblin", attributes={"attack": 1, "defense": 1}, cost={"Common": 1}, hp=2)
+NAMES = ["Holy Angel", "Physics Lab", "Goblin"]
+
+def new_hand(definitions) -> Hand:
+    hand = Hand()
+    for definition in definitions:
+        hand.add_card(definition.create_instance())
+    return hand
+
+def check_indexes(hand: Hand):
+    """Every slot and copy index agrees with the cards of the hand."""
+    assert hand._slots == {card: slot for slot, card in enumerate(hand.cards)}
+    assert sorted(hand._slots.values()) == list(range(len(hand.cards)))
+    for name in NAMES:
+        assert hand.count_of(name) == sum(card.name == name for card in hand.cards)
+    assert sum(len(copies) for copies in hand._by_id.values()) == len(hand.cards)
+
+def test_removing_a_card_moves_the_last_card_into_its_slot():
+    hand = new_hand([ANGEL, LAB, GOBLIN, LAB])
+    angel, lab, goblin, last = hand.cards
+    assert hand.remove_card(lab)
+    assert hand.cards == [angel, last, goblin]
+    assert hand._slots[last] == 1
+    assert not hand.remove_card(lab)
+    assert hand.remove_card(goblin) and hand.cards == [angel, last]
+    check_indexes(hand)
+
+def test_find_card_returns_the_newest_copy():
+    hand = new_hand([LAB, GOBLIN, LAB, LAB])
+    older, newest = hand.cards[2], hand.cards[3]
+    assert hand.find_card("Physics Lab") is newest
+    assert hand.find_card(LAB.card_id) is newest
+    assert hand.place_card("Physics Lab") is newest
+    assert hand.find_card("Physics Lab") is older
+    assert hand.count_of("Physics Lab") == 2 and hand.find_card("Holy Angel") is None
+
+def test_discards_keep_the_indexes_consistent():
+    rng = random.Random(3)
+    for _ in range(50):
+        hand = new_hand(rng.choice([ANGEL, LAB, GOBLIN]) for _ in range(rng.randint(0, 20)))
+        kept = rng.randint(0, 8)
+        expected = len(hand.cards) if len(hand.cards) <= kept else kept
+        hand.discard_excess(kept, lambda: rng.choice(hand.cards))
+        assert len(hand.cards) == expected
+        check_indexes(hand)
+        # Placing and adding keep them consistent too
+        for name in NAMES * 2:
+            card = hand.place_card(name)
+            if card is not None and rng.random() < 0.5:
+                hand.add_card(card)
+            check_indexes(hand)
+
+def test_discarding_a_card_not_in_the_hand_is_reported():
+    events = MemorySink()
+    hand = new_hand([ANGEL, GOBLIN])
+    hand.events = events
+    stranger, goblin = LAB.create_instance(), hand.cards[1]
+    choices = iter([stranger, goblin])
+    hand.discard_excess(1, lambda: next(choices))
+    assert [event.kind for event in events.drain()] == [EventKind.INVALID_DISCARD, EventKind.CARD_DISCARDED]
+    assert [card.name for card in hand.cards] == ["Holy Angel"]
+    check_indexes(hand)
+
+def test_snapshot_and_clone_keep_which_copy_is_found():
+    hand = new_hand([LAB, LAB, ANGEL, LAB])
+    hand.remove_card(hand.cards[0])
+    newest = hand.find_card("Physics Lab")
+    state = hand.snapshot()
+    hand.place_card("Physics Lab")
+    hand.restore(state)
+    assert hand.find_card("Physics Lab") is newest
+    check_indexes(hand)
+    memo = {card: card.definition.create_instance() for card in hand.cards}
+    clone = hand.clone(memo)
+    assert clone.find_card("Physics Lab") is memo[newest]
+    assert clone.cards == [memo[card] for card in hand.cards]
+    check_indexes(clone)
+
+def test_drawn_cards_join_the_hand():
+    deck = Deck()
+    for definition in [ANGEL, LAB] * 5:
+        deck.add_card(definition)
+    hand = Hand()
+    hand.draw_initial_hand(deck)
+    assert len(hand.cards) == 8 and len(deck) == 2
+    assert hand.draw_card(deck) is not None and hand.draw_card(deck) is not None
+    assert hand.draw_card(deck) is None and len(hand.cards) == 10
+    check_indexes(hand)
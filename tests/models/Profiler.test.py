@@ -0,0 +1,41 @@
+import random
+import tracemalloc
+from Agent import GreedyAgent
+from Gamestate import Gamestate
+from Player import Player
+from Profiler import Profiler
+from TestingModels import build_decks
+
+def new_game(seed: int = 0) -> Gamestate:
+    deck1, deck2 = build_decks()
+    return Gamestate(Player("Player 1", 1, deck1, agent=GreedyAgent(random.Random(seed))),
+                     Player("Player 2", 2, deck2, agent=GreedyAgent(random.Random(seed + 1))), headless=True, seed=seed)
+
+def test_allocation_profiler_stops_the_tracing_it_started():
+    assert not tracemalloc.is_tracing()
+    with Profiler(allocations=True) as profiler:
+        assert tracemalloc.is_tracing()
+        game = new_game()
+        profiler.attach(game)
+        game.start_game(max_turns=20)
+    assert not tracemalloc.is_tracing()
+    assert any(entry["allocated"] for entry in profiler.report())
+    profiler.close()
+
+def test_allocation_profiler_leaves_outer_tracing_running():
+    tracemalloc.start()
+    try:
+        Profiler(allocations=True).close()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+def test_detached_game_is_no_longer_recorded():
+    profiler = Profiler()
+    game = new_game()
+    profiler.attach(game)
+    game.play_turn()
+    Profiler.detach(game)
+    recorded = {path: list(totals) for path, totals in profiler.stats.items()}
+    game.play_turn()
+    assert recorded and profiler.stats == recorded
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from database.connection import Database
+from database.migrate import migrate
+from services.currencyService import CurrencyService, InsufficientFunds
+
+def run(test):
+    async def main():
+        async with Database() as database:
+            await migrate(database)
+            async with CurrencyService(database) as currency:
+                await test(database, currency)
+    asyncio.run(main())
+
+def test_credit_debit_and_balance():
+    async def test(database, currency):
+        await currency.credit(1, 500, "purchase")
+        entry = await currency.debit(1, 120, "pack:standard")
+        assert entry.balance == 380
+        assert await currency.balance(1) == 380
+        with pytest.raises(InsufficientFunds):
+            await currency.debit(1, 400, "pack:standard")
+    run(test)
+
+def test_idempotency_key_is_charged_once():
+    async def test(database, currency):
+        await currency.credit(1, 100, "purchase")
+        first = await currency.debit(1, 30, "pack:standard", idempotency_key="interaction-1")
+        again = await currency.debit(1, 30, "pack:standard", idempotency_key="interaction-1")
+        assert again.duplicate and again.entry_id == first.entry_id
+        assert await currency.balance(1) == 70
+    run(test)
+
+def test_transfer_moves_both_balances():
+    async def test(database, currency):
+        await currency.credit(1, 100, "purchase")
+        sent, received = await currency.transfer(1, 2, 40, "trade")
+        assert (sent.balance, received.balance) == (60, 40)
+        with pytest.raises(InsufficientFunds):
+            await currency.transfer(1, 2, 61, "trade")
+    run(test)
+
+def hold_writes(database):
+    """Make the writer wait at its next commit until the returned gate is set; writing is set once it does."""
+    gate, writing = asyncio.Event(), asyncio.Event()
+    run = database.run
+
+    async def held(function):
+        writing.set()
+        await gate.wait()
+        return await run(function)
+    database.run = held
+    return gate, writing
+
+def test_cancelled_change_keeps_the_balance_right():
+    async def test(database, currency):
+        await currency.credit(1, 100, "purchase")
+        gate, writing = hold_writes(database)
+        debit = asyncio.create_task(currency.debit(1, 80, "pack:standard"))
+        await writing.wait()
+        debit.cancel()
+        await asyncio.sleep(0.01)
+        released = debit.done()
+        gate.set()
+        # The debit keeps the user's lock until the writer is done with it
+        assert not released
+        with pytest.raises(asyncio.CancelledError):
+            await debit
+        # The writer committed the debit, so the next one sees 20 and cannot overdraw
+        assert await currency.balance(1) == 20
+        with pytest.raises(InsufficientFunds):
+            await currency.debit(1, 80, "pack:standard")
+    run(test)
+
+def test_cancelled_transfer_keeps_both_balances_right():
+    async def test(database, currency):
+        await currency.credit(1, 100, "purchase")
+        gate, writing = hold_writes(database)
+        transfer = asyncio.create_task(currency.transfer(1, 2, 70, "trade"))
+        await writing.wait()
+        transfer.cancel()
+        gate.set()
+        with pytest.raises(asyncio.CancelledError):
+            await transfer
+        assert await currency.balance(1) == 30
+        assert await currency.balance(2) == 70
+    run(test)
@@ -0,0 +1,37 @@
+import asyncio
+from database.connection import Database
+from database.migrate import migrate
+from services.gameService import COMPUTER_ID, GameService
+from TestingModels import build_decks
+
+def recorded(play):
+    """Finish a match as play decides and return the match_results row stored for it."""
+    async def main():
+        async with Database() as database:
+            await migrate(database)
+            service = GameService(lambda user_id: build_decks()[user_id % 2], database)
+            match, _ = play(service)
+            await service.record(match)
+            await service.close()
+            return tuple(await database.fetchone("SELECT winner_id, loser_id, outcome FROM match_results"))
+    return asyncio.run(main())
+
+def test_human_win_is_recorded():
+    def play(service):
+        match, opening = service.create_match(1, 2, seed=3)
+        match.game.winner = match.seat(2)
+        return match, opening
+    assert recorded(play) == (2, 1, "win")
+
+def test_computer_win_is_not_a_draw():
+    def play(service):
+        match, opening = service.create_match(1, seed=3)
+        match.game.winner = match.game.player2
+        assert match.game.player2.discord_id == COMPUTER_ID
+        return match, opening
+    assert recorded(play) == (None, 1, "win")
+
+def test_draw_keeps_both_seats():
+    def play(service):
+        return service.create_match(1, 2, seed=3)
+    assert recorded(play) == (1, 2, "draw")
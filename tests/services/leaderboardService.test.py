@@ -0,0 +1,79 @@
+import asyncio
+import bisect
+import random
+from types import SimpleNamespace
+import pytest
+from database.connection import Database
+from database.migrate import migrate
+from services.gameService import COMPUTER_ID
+from services.leaderboardService import DEFAULT_RATING, LeaderboardService, RankedSkipList, expected_score
+
+def test_skip_list_agrees_with_a_sorted_list():
+    rng = random.Random(5)
+    expected = sorted(rng.sample(range(10000), 300))
+    ranking = RankedSkipList(expected, seed=1)
+    for step in range(2000):
+        if expected and rng.random() < 0.5:
+            key = rng.choice(expected)
+            ranking.remove(key)
+            expected.remove(key)
+        else:
+            key = rng.randrange(10000)
+            if key not in expected:
+                ranking.insert(key)
+                bisect.insort(expected, key)
+        if step % 50 == 0:
+            assert list(ranking) == expected
+            probe = rng.randrange(10000)
+            assert ranking.rank(probe) == bisect.bisect_left(expected, probe)
+            start = rng.randrange(len(expected) + 5)
+            assert ranking.slice(start, start + 10) == expected[start:start + 10]
+    assert len(ranking) == len(expected)
+    assert [ranking[index] for index in range(len(expected))] == expected
+    assert ranking[-1] == expected[-1]
+    with pytest.raises(IndexError):
+        ranking[len(expected)]
+    with pytest.raises(KeyError):
+        ranking.remove(-1)
+
+def test_elo_moves_both_players_by_the_same_amount():
+    board = LeaderboardService(None)
+    board.record(1, 2)
+    assert (board.rating(1), board.rating(2)) == (DEFAULT_RATING + 16, DEFAULT_RATING - 16)
+    # The favourite gains less for beating the underdog than the underdog would for an upset
+    board.record(1, 2)
+    assert board.rating(1) - (DEFAULT_RATING + 16) == 15
+    before = board.rating(2)
+    board.record(2, 1)
+    assert board.rating(2) - before == round(32 * (1 - expected_score(before, DEFAULT_RATING + 31))) > 16
+    assert board.rating(1) + board.rating(2) == 2 * DEFAULT_RATING
+    assert [standing.user_id for standing in board.top()] == [1, 2]
+
+def test_matches_against_the_computer_count_victories_only():
+    board = LeaderboardService(None)
+    board.record(1, None)
+    board.record(None, 2)
+    assert board.standing(1) == (1, 1, DEFAULT_RATING, 1)
+    assert board.standing(2) == (2, 2, DEFAULT_RATING, 0)
+    assert board.rank(3) is None and board.around(3) == []
+
+def match(seat_ids, winner=None):
+    players = [SimpleNamespace(discord_id=seat_id) for seat_id in seat_ids]
+    return SimpleNamespace(players=players, winner=None if winner is None else players[winner])
+
+def test_load_brings_back_every_ranked_player():
+    async def main():
+        async with Database() as database:
+            await migrate(database)
+            board = await LeaderboardService.load(database)
+            await board.record_match(match((1, 2)))
+            await board.record_match(match((3, 4), winner=0))
+            await board.record_match(match((5, COMPUTER_ID), winner=1))
+            # A user who has never finished a match is not ranked
+            await database.execute("INSERT INTO users (user_id) VALUES (6)")
+            reloaded = await LeaderboardService.load(database)
+            ranked = [(standing.user_id, standing.rating) for standing in board.top()]
+            assert [(standing.user_id, standing.rating) for standing in reloaded.top()] == ranked
+            assert reloaded.standing(1).rating == DEFAULT_RATING
+            assert reloaded.rank(6) is None
+    asyncio.run(main())
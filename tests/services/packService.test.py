@@ -0,0 +1,76 @@
+import asyncio
+from collections import Counter
+import numpy as np
+import pytest
+from database.connection import Database
+from database.migrate import migrate
+from services.packService import AliasTable, PackService, build_pack_types
+
+CATALOG = [("c1", "common"), ("c2", "common"), ("c3", "common"), ("u1", "uncommon"), ("r1", "rare"), ("r2", "rare"), ("l1", "legendary")]
+SPECS = {
+    "standard": {"name": "Standard Pack", "price": 100, "slots": [
+        {"count": 5, "rarities": {"common": 1}},
+        {"count": 1, "rarities": {"rare": 3, "legendary": 1, "mythic": 5}},
+    ]},
+    "mythic": {"slots": [{"count": 2, "rarities": {"mythic": 1}}]},
+}
+
+def test_alias_table_samples_its_weights():
+    weights = [0.5, 3, 1, 0, 5.5]
+    table = AliasTable(weights)
+    draws = table.sample(np.random.default_rng(1), 200000)
+    frequencies = np.bincount(draws, minlength=len(weights)) / len(draws)
+    assert frequencies == pytest.approx(np.array(weights) / sum(weights), abs=0.005)
+    assert frequencies[3] == 0
+    assert ((table.probability >= 0) & (table.probability <= 1)).all()
+
+def test_alias_table_rejects_bad_weights():
+    for weights in ([], [0, 0], [1, -1], [[1, 2]]):
+        with pytest.raises(ValueError):
+            AliasTable(weights)
+
+def test_pack_types_share_a_rarity_evenly_and_skip_empty_rarities():
+    pack_types = build_pack_types(SPECS, CATALOG)
+    standard = pack_types["standard"]
+    assert (standard.name, standard.price, standard.size) == ("Standard Pack", 100, 6)
+    commons, rares = standard.slots
+    assert sorted(commons.card_ids) == ["c1", "c2", "c3"]
+    # Mythic has no cards, so only rare and legendary are drawn, at 3 to 1
+    draws = Counter(rares.card_ids[rares.table.sample(np.random.default_rng(2), 100000)])
+    assert set(draws) == {"r1", "r2", "l1"}
+    assert (draws["r1"] + draws["r2"]) / draws["l1"] == pytest.approx(3, rel=0.05)
+    assert draws["r1"] / draws["r2"] == pytest.approx(1, rel=0.05)
+    # A slot none of whose rarities has cards draws from the whole catalog
+    assert len(pack_types["mythic"].slots[0].card_ids) == len(CATALOG)
+    assert pack_types["mythic"].name == "mythic" and pack_types["mythic"].price == 0
+    with pytest.raises(ValueError):
+        build_pack_types(SPECS, [])
+
+def test_generation_is_reproducible():
+    pack_types = build_pack_types(SPECS, CATALOG)
+    first = PackService(None, pack_types, seed=9).generate("standard", 4)
+    assert first.shape == (4, 6)
+    assert (first == PackService(None, pack_types, seed=9).generate("standard", 4)).all()
+    assert set(first[:, :5].flat) <= {"c1", "c2", "c3"}
+
+def test_opened_packs_are_added_to_the_collection():
+    async def main():
+        async with Database() as database:
+            await migrate(database)
+            await database.executemany(
+                "INSERT INTO card_definitions (card_id, name, card_type, rarity, cost, attributes, details) VALUES (?, ?, 'Creature', ?, '{}', '{}', '{}')",
+                [(card_id, card_id.upper(), rarity) for card_id, rarity in CATALOG])
+            packs = await PackService.load(database, seed=3)
+            packs.pack_types = build_pack_types(SPECS, CATALOG)
+            opened = await packs.open_packs(7, "standard", 3)
+            assert len(opened) == 3 and all(len(pack) == 6 for pack in opened)
+            rows = await database.fetchall("SELECT card_id, source FROM owned_cards WHERE user_id = 7")
+            assert Counter(row["card_id"] for row in rows) == Counter(card_id for pack in opened for card_id in pack)
+            assert {row["source"] for row in rows} == {"standard"}
+            assert packs.card_name("c1") == "C1"
+            with pytest.raises(KeyError):
+                await packs.open_packs(7, "premium")
+            with pytest.raises(ValueError):
+                await packs.open_packs(7, "standard", 0)
+            assert await database.fetchval("SELECT COUNT(*) FROM owned_cards") == 18
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+import pytest
+from database.connection import Database
+from database.migrate import migrate
+from services.gameService import COMPUTER_ID
+from services.statsService import StatsService
+
+def run(test):
+    async def main():
+        async with Database() as database:
+            await migrate(database)
+            await test(database)
+    asyncio.run(main())
+
+async def stored(database, user_id):
+    row = await database.fetchone("SELECT victories, losses FROM users WHERE user_id = ?", (user_id,))
+    plays = await database.fetchall("SELECT card_id, plays FROM user_card_plays WHERE user_id = ?", (user_id,))
+    return (tuple(row) if row else None), {card_id: count for card_id, count in plays}
+
+def hold_transactions(database):
+    """Make the next transactions wait until the returned gate is set; started is set once one waits."""
+    gate, started = asyncio.Event(), asyncio.Event()
+    transaction = database.transaction
+
+    @asynccontextmanager
+    async def held(*args, **kwargs):
+        started.set()
+        await gate.wait()
+        async with transaction(*args, **kwargs) as connection:
+            yield connection
+    database.transaction = held
+    return gate, started
+
+def test_evicted_user_is_found_while_a_flush_writes_it():
+    async def test(database):
+        stats = StatsService(database, capacity=1)
+        user = await stats.get(1)
+        user.record_result(True)
+        await stats.get(2)
+        gate, started = hold_transactions(database)
+        flushing = asyncio.create_task(stats.flush())
+        await started.wait()
+        # Not reloaded from the row the flush has not written yet
+        found = await stats.get(1)
+        assert found is user and found.victories == 1
+        found.record_result(True)
+        gate.set()
+        assert await flushing == 1
+        assert (await stored(database, 1))[0] == (1, 0)
+        # The change made during the write is saved by the next flush
+        assert found.changed
+        await stats.flush()
+        assert (await stored(database, 1))[0] == (2, 0)
+    run(test)
+
+def test_evicted_user_is_dropped_once_saved():
+    async def test(database):
+        stats = StatsService(database, capacity=1)
+        (await stats.get(1)).record_play("goblin", 3)
+        await stats.get(2)
+        assert 1 in stats._evicted
+        assert await stats.flush() == 1
+        assert stats._evicted == {}
+        assert await stored(database, 1) == ((0, 0), {"goblin": 3})
+    run(test)
+
+def test_failed_flush_keeps_every_change():
+    async def test(database):
+        stats = StatsService(database, capacity=1)
+        evicted = await stats.get(1)
+        evicted.record_result(False)
+        cached = await stats.get(2)
+        cached.record_play("goblin")
+        transaction = database.transaction
+
+        @asynccontextmanager
+        async def failing(*args, **kwargs):
+            raise OSError("disk full")
+            yield
+        database.transaction = failing
+        with pytest.raises(OSError):
+            await stats.flush()
+        assert evicted.results_changed and cached.changed_cards == {"goblin"}
+        assert stats._evicted == {1: evicted}
+        database.transaction = transaction
+        assert await stats.flush() == 2
+        assert await stored(database, 1) == ((0, 1), {})
+        assert await stored(database, 2) == ((0, 0), {"goblin": 1})
+    run(test)
+
+def test_close_saves_every_recorded_match():
+    async def test(database):
+        stats = StatsService(database, capacity=2, flush_interval=60)
+        await stats.start()
+        for number in range(3):
+            winner = SimpleNamespace(discord_id=1, card_plays={"goblin": 2})
+            loser = SimpleNamespace(discord_id=2 + number, card_plays={"knight": 1})
+            await stats.record_match(SimpleNamespace(players=(winner, loser), winner=winner))
+        computer = SimpleNamespace(discord_id=COMPUTER_ID, card_plays={"goblin": 5})
+        human = SimpleNamespace(discord_id=1, card_plays={})
+        await stats.record_match(SimpleNamespace(players=(human, computer), winner=computer))
+        assert await stored(database, 1) == (None, {})
+        await stats.close()
+        assert await stored(database, 1) == ((3, 1), {"goblin": 6})
+        for user_id in (2, 3, 4):
+            assert await stored(database, user_id) == ((0, 1), {"knight": 1})
+        assert await stored(database, COMPUTER_ID) == (None, {})
+    run(test)